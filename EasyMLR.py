@@ -2,19 +2,38 @@
 
 __version__ = "1.1.111"
 
-def check_X_y(X,y):
+def check_X_y(X,y,dtype=None,copy=True):
 
     '''
     Check the X and y inputs used in regression 
+    (X and y may also be .npy or Parquet files or Arrow tables, see read_X_y,
+    X may be a scipy sparse matrix, which is returned as CSR,
+    and the floating point data of X are cast to dtype if it is not None, 
+    e.g. dtype=np.float32 to halve the memory of X,
+    and X and y are not copied if copy=False)
     '''
     
     import pandas as pd
     import numpy as np
     import sys
+    from scipy.sparse import issparse, csr_matrix
+    from EasyMLR import as_dtype, read_X_y
+
+    # open .npy files (memory-mapped), Parquet files, and Arrow tables
+    X, y = read_X_y(X, y)
 
     # start with copies of X and y to avoid changing the original
-    X = X.copy()
-    y = y.copy()
+    # (nothing below changes X or y, so copy=False is also safe)
+    if copy:
+        X = X.copy()
+        y = y.copy()
+
+    if issparse(X):
+        X = csr_matrix(X, dtype=float if dtype is None else dtype)
+        ctrl = np.isfinite(X.data).all()
+        if not ctrl:
+            print('Check X: it needs to have no nan or inf values!','\n')
+            sys.exit()
 
     if isinstance(X, pd.DataFrame) and isinstance(y, pd.Series):
         ctrl = (X.index == y.index).all()
@@ -51,7 +70,7 @@ def check_X_y(X,y):
         if not ctrl:
             print('Check X: it needs to have no nan values!','\n')
             sys.exit()
-        ctrl = not np.any([np.isinf(val) if isinstance(val, (int, float)) else False for val in X])
+        ctrl = not (np.issubdtype(X.dtype, np.number) and np.isinf(X).any())
         if not ctrl:
             print('Check X: it needs to have no inf values!','\n')
             sys.exit()
@@ -61,12 +80,12 @@ def check_X_y(X,y):
         if not ctrl:
             print('Check y: it needs to have no nan values!','\n')
             sys.exit()
-        ctrl = not np.any([np.isinf(val) if isinstance(val, (int, float)) else False for val in y])
+        ctrl = not (np.issubdtype(y.dtype, np.number) and np.isinf(y).any())
         if not ctrl:
             print('Check y: it needs to have no inf values!','\n')
             sys.exit()
     
-    ctrl = np.isreal(X).all()
+    ctrl = issparse(X) or np.isreal(X).all()
     if not ctrl:
         print('Check X: it needs be all real numbers!','\n')
         sys.exit()
@@ -88,8 +107,9 @@ def check_X_y(X,y):
         sys.exit()
 
     # convert X and y to pandas dataframe and series if not already
+    # (sparse X stays a CSR matrix, its column names are passed separately)
     # if isinstance(X, np.ndarray):
-    if not isinstance(X, pd.DataFrame):
+    if not isinstance(X, pd.DataFrame) and not issparse(X):
         X = pd.DataFrame(X)
         X.columns = ['X' + str(i) for i in X.columns]       
     # if isinstance(y, np.ndarray):
@@ -97,38 +117,314 @@ def check_X_y(X,y):
         y = pd.Series(y)
         y.name = 'y'
 
+    X = as_dtype(X, dtype)
+
+    return X, y
+
+def as_dtype(X, dtype=None):
+
+    '''
+    PURPOSE
+    Cast the floating point data of X to dtype, e.g. np.float32 to halve
+    the memory of X for the estimators that compute in float32 (XGBoost,
+    LightGBM, CatBoost, and the sklearn trees), leaving the integer, bool, 
+    and categorical columns of a dataframe as they are
+    USAGE
+    X = as_dtype(X, dtype)
+    INPUT
+    X = dataframe, numpy array, or scipy sparse matrix
+    dtype = numpy floating point dtype, or None to return X as it is
+    OUTPUT
+    X = X with its floating point data cast to dtype 
+        (X itself if it is already dtype)
+    '''
+
+    import numpy as np
+    import pandas as pd
+    from scipy.sparse import issparse
+
+    if dtype is None:
+        return X
+    if isinstance(X, pd.DataFrame):
+        cols = [col for col in X.columns 
+            if pd.api.types.is_float_dtype(X[col].dtype) and X[col].dtype != dtype]
+        if cols:
+            X = X.astype({col: dtype for col in cols})
+        return X
+    if issparse(X) or np.issubdtype(X.dtype, np.floating):
+        return X.astype(dtype, copy=False)
+    return X
+
+def peak_memory():
+
+    '''
+    PURPOSE
+    Peak memory of this python process, which is the high-water mark of 
+    the resident memory since the process started, including the memory 
+    allocated outside of python by numpy, XGBoost, LightGBM, and CatBoost
+    USAGE
+    peak = peak_memory()
+    INPUT
+    none
+    OUTPUT
+    peak = peak memory in MB (None if it is not available, which is 
+        on Windows without psutil)
+    '''
+
+    import sys
+
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 2**20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kB on linux
+    if sys.platform == 'darwin':
+        return peak / 2**20
+    return peak / 2**10
+
+def read_X_y(X, y=None):
+
+    """
+    PURPOSE
+    Open the X and y inputs from files or Arrow tables without loading 
+    them into pandas twice: .npy files are memory-mapped (read-only),
+    Parquet files are read into Arrow tables with memory mapping, and 
+    Arrow tables are converted to pandas with the column names of their 
+    schema, one block per column so that the numeric columns without 
+    nulls are zero-copy views of the Arrow buffers
+    USAGE
+    X, y = read_X_y(X, y)
+    INPUT
+    X = path to a .npy or .parquet file, pyarrow Table or RecordBatch,
+        or a dataframe, array, or sparse matrix (returned as it is)
+    y = path to a .npy or .parquet file (one column), pyarrow Array, 
+        ChunkedArray, or one-column Table, name of the column of y in 
+        the Parquet file or Arrow table of X, or a series or array 
+        (returned as it is), or None
+    OUTPUT
+    X = np.memmap of a .npy file, dataframe of a Parquet file or Arrow 
+        table (without the column of y if y is its name), or X as it is
+    y = np.memmap of a .npy file, series of a Parquet file or Arrow 
+        column, or y as it is
+    """
+
+    import os
+    import sys
+    import numpy as np
+
+    # paths of .npy and Parquet files
+    paths = []
+    for v in (X, y):
+        if isinstance(v, (str, os.PathLike)):
+            paths.append(str(v).lower())
+        else:
+            paths.append('')
+    if any(path.endswith(('.parquet', '.pq')) for path in paths):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            print('Check X and y: pyarrow is needed to read Parquet files!','\n')
+            sys.exit()
+    own = False     # True for tables read here, which can be freed as converted
+    if paths[0].endswith('.npy'):
+        X = np.load(X, mmap_mode='r')
+    elif paths[0].endswith(('.parquet', '.pq')):
+        X = pq.read_table(X, memory_map=True)
+        own = True
+    if paths[1].endswith('.npy'):
+        y = np.load(y, mmap_mode='r')
+    elif paths[1].endswith(('.parquet', '.pq')):
+        y = pq.read_table(y, memory_map=True)
+
+    # Arrow table or record batch of X, with y as the name of one of its columns
+    if type(X).__module__.split('.')[0] == 'pyarrow':
+        import pyarrow as pa
+        if isinstance(X, pa.RecordBatch):
+            X = pa.Table.from_batches([X])
+        if isinstance(y, str) and y in X.column_names:
+            y = X.select([y])
+            X = X.drop_columns([y.column_names[0]])
+        X = X.to_pandas(split_blocks=True, self_destruct=own)
+
+    # Arrow array, chunked array, or one-column table of y
+    if type(y).__module__.split('.')[0] == 'pyarrow':
+        name = 'y'
+        if hasattr(y, 'column_names'):
+            ctrl = len(y.column_names) == 1
+            if not ctrl:
+                print('Check y: it needs to have only one column!','\n')
+                sys.exit()
+            name = y.column_names[0]
+            y = y.column(0)
+        y = y.to_pandas().rename(name)
+
     return X, y
 
-def preprocess_train(df, threshold=10, scale='standard'):
+def column_names(X, feature_names=None):
+
+    """
+    PURPOSE
+    Names of the columns of X, which are the column names of a dataframe,
+    or the feature_names given for a scipy sparse matrix or array
+    (default 'X0', 'X1', ... as in check_X_y)
+    USAGE
+    names = column_names(X, feature_names=None)
+    INPUT
+    X = dataframe, array, or scipy sparse matrix
+    feature_names = list of the names of the columns of a sparse matrix 
+        or array, such as preprocess_train(df, sparse=True)['feature_names']
+    OUTPUT
+    names = list of the names of the columns of X
+    """
+
+    import pandas as pd
+    import sys
+
+    if isinstance(X, pd.DataFrame):
+        return list(X.columns)
+    if feature_names is None:
+        return ['X' + str(i) for i in range(X.shape[1])]
+    ctrl = len(feature_names) == X.shape[1]
+    if not ctrl:
+        print('Check feature_names: it needs one name for every column of X!','\n')
+        sys.exit()
+
+    return list(feature_names)
+
+def select_columns(X, features, feature_names):
+
+    """
+    PURPOSE
+    Select the named columns of a dataframe, array, or scipy sparse matrix X 
+    without converting a sparse X to a dense array, and without a copy 
+    if all of the columns are selected in their order
+    USAGE
+    X_selected = select_columns(X, features, feature_names)
+    INPUT
+    X = dataframe, array, or scipy sparse CSR matrix
+    features = list of the names of the columns to select
+    feature_names = list of the names of all of the columns of X
+    OUTPUT
+    X_selected = X[features] of a dataframe, or an array or CSR matrix 
+        of the selected columns (column-index array) in the order of features
+    """
+
+    import pandas as pd
+
+    if list(features) == list(feature_names):
+        return X
+    if isinstance(X, pd.DataFrame):
+        return X[features]
+    position = {name: i for i, name in enumerate(feature_names)}
+
+    return X[:, [position[f] for f in features]]
+
+def hash_tokens(df_cat):
+
+    """
+    PURPOSE
+    Strings 'column=value' of the categorical columns of each row,
+    which are the input of the FeatureHasher of preprocess_train
+    USAGE
+    tokens = hash_tokens(df_cat)
+    INPUT
+    df_cat = dataframe of the categorical columns
+    OUTPUT
+    tokens = 2-D object array of the 'column=value' strings of each row
+    """
+
+    import numpy as np
+
+    return np.column_stack([(str(col) + '=' + df_cat[col].astype(str)).to_numpy(dtype=object)
+        for col in df_cat.columns])
+
+def preprocess_train(df, threshold=10, scale='standard', sparse=False,
+        encoding='onehot', y=None, hash_buckets=1024, target_folds=5, dtype=None,
+        copy=True):
     """
     Detects categorical (numeric and non-numeric) columns, applies one-hot encoding,
     scales continuous numeric columns, and safely handles cases with missing types.
     All categorical features are cast to float.
 
     Args:
-        df (pd.DataFrame): Training data
+        df (pd.DataFrame): Training data (or a Parquet file or Arrow table, see read_X_y)
         threshold (int): Max unique values for numeric columns to be considered categorical
         scale (str): 'minmax' or 'standard' for scaler selection
+        sparse (bool): True to return a scipy CSR matrix instead of a DataFrame,
+            so that high-cardinality one-hot columns are never densified
+        encoding (str): encoder of the categorical columns, with a number of
+            output columns that does not grow with the number of categories
+            for 'hashing' and 'target':
+            'onehot': OneHotEncoder, one column per category (default)
+            'hashing': FeatureHasher of the 'column=value' strings 
+                into hash_buckets columns
+            'target': TargetEncoder with out-of-fold (target_folds-fold)
+                target means, one column per categorical column
+                (one per class for a multiclass y)
+        y (pd.Series): Target values, needed for encoding='target'
+        hash_buckets (int): Number of columns for encoding='hashing'
+        target_folds (int): Number of folds for encoding='target'
+        dtype: Floating point dtype of the output, e.g. np.float32 to
+            halve the memory of df_processed (default None is np.float64)
+        copy (bool): False to use a shallow copy of df instead of a full copy
+            (df is not changed either way, only its bool columns are replaced)
 
     Returns:
         dict: {
-            'df_processed': Preprocessed DataFrame,
-            'encoder': Fitted OneHotEncoder or None,
+            'df_processed': Preprocessed DataFrame (CSR matrix if sparse=True),
+            'feature_names': List of the column names of df_processed,
+            'sparse': True if df_processed is a CSR matrix,
+            'dtype': Floating point dtype of df_processed,
+            'encoding': 'onehot', 'hashing', or 'target',
+            'encoded_cols': List of the column names made by the encoder,
+            'encoder': Fitted OneHotEncoder, FeatureHasher, TargetEncoder or None,
             'scaler': Fitted Scaler or None,
             'categorical_cols': List of all categorical columns,
             'non_numeric_cats': List of object/category columns,
             'continuous_cols': List of numeric continuous columns,
-            'category_mappings': Mapping of categories or {}
+            'category_mappings': Mapping of categories or {} (hashing)
         }
     """
     import pandas as pd
+    import numpy as np
+    import sys
+    from scipy.sparse import csr_matrix, hstack, issparse
     from sklearn.preprocessing import OneHotEncoder, MinMaxScaler, StandardScaler
+    from sklearn.preprocessing import TargetEncoder
+    from sklearn.model_selection import KFold, StratifiedKFold
+    from sklearn.utils.multiclass import type_of_target
+    from sklearn.feature_extraction import FeatureHasher
+    from EasyMLR import hash_tokens, read_X_y
+
+    ctrl = encoding in ['onehot', 'hashing', 'target']
+    if not ctrl:
+        print("Check encoding: it needs to be 'onehot', 'hashing', or 'target'!",'\n')
+        sys.exit()
+    ctrl = encoding != 'target' or y is not None
+    if not ctrl:
+        print("Check y: it is needed for encoding='target'!",'\n')
+        sys.exit()
+
+    dtype = np.float64 if dtype is None else dtype
+    df = read_X_y(df)[0]
 
     # Start with a copy to avoid changing the original df
-    df = df.copy()
+    # (a shallow copy shares the data of df, and the bool columns
+    # are replaced in the copy without changing df)
+    df = df.copy(deep=copy)
     
     bool_cols = df.select_dtypes(include='bool').columns.tolist()
-    df[bool_cols] = df[bool_cols].astype(int)
+    if copy:
+        df[bool_cols] = df[bool_cols].astype(int)
+    else:
+        for col in bool_cols:
+            df[col] = df[col].astype(int)
 
     numerical_cols = df.select_dtypes(include='number').columns.tolist()
     non_numeric_cats = df.select_dtypes(include=['object', 'category']).columns.tolist()
@@ -138,36 +434,79 @@ def preprocess_train(df, threshold=10, scale='standard'):
 
     all_cat_cols = categorical_numeric + non_numeric_cats + bool_cols
 
-    # One-hot encoding
-    if all_cat_cols:
-        encoder = OneHotEncoder(handle_unknown='ignore', sparse_output=False)
+    # Encoding of the categorical columns
+    if all_cat_cols and encoding == 'hashing':
+        # fixed number of columns of the hashed 'column=value' strings
+        encoder = FeatureHasher(n_features=hash_buckets, input_type='string', 
+            dtype=dtype)
+        encoded_array = encoder.transform(hash_tokens(df[all_cat_cols]))
+        encoded_cols = ['hash_' + str(i) for i in range(hash_buckets)]
+        category_mappings = {}
+    elif all_cat_cols and encoding == 'target':
+        # out-of-fold target means of the training data (fit_transform), 
+        # and target means of all of the training data for test data
+        # shuffled folds, stratified for class labels as in TargetEncoder
+        if type_of_target(y) in ['binary', 'multiclass']:
+            folds = StratifiedKFold(n_splits=target_folds, shuffle=True, random_state=42)
+        else:
+            folds = KFold(n_splits=target_folds, shuffle=True, random_state=42)
+        encoder = TargetEncoder(cv=folds)
+        encoded_array = encoder.fit_transform(df[all_cat_cols], y)
+        encoded_cols = list(encoder.get_feature_names_out(all_cat_cols))
+    elif all_cat_cols:
+        encoder = OneHotEncoder(handle_unknown='ignore', sparse_output=sparse, 
+            dtype=dtype)
         encoded_array = encoder.fit_transform(df[all_cat_cols])
-        encoded_df = pd.DataFrame(encoded_array,
-                                  columns=encoder.get_feature_names_out(all_cat_cols),
-                                  index=df.index).astype(float)
+        encoded_cols = list(encoder.get_feature_names_out(all_cat_cols))
+    else:
+        encoder, encoded_array, encoded_cols, category_mappings = None, None, [], {}
+    if encoder is not None and encoding != 'hashing':
         category_mappings = {
             col: encoder.categories_[i].tolist()
             for i, col in enumerate(all_cat_cols)
         }
+    if encoder is not None and not sparse:
+        if issparse(encoded_array):
+            encoded_array = encoded_array.toarray()
+        encoded_df = pd.DataFrame(encoded_array,
+                                  columns=encoded_cols,
+                                  index=df.index).astype(dtype)
     else:
-        encoder, encoded_df, category_mappings = None, pd.DataFrame(index=df.index), {}
+        encoded_df = pd.DataFrame(index=df.index)
 
     # Scaling
     if continuous_cols:
         scaler = StandardScaler() if scale == 'standard' else MinMaxScaler()
         scaled_array = scaler.fit_transform(df[continuous_cols])
-        scaled_df = pd.DataFrame(scaled_array, columns=continuous_cols, index=df.index).astype(float)
+        scaled_df = pd.DataFrame(scaled_array, columns=continuous_cols, index=df.index).astype(dtype)
     else:
         scaler, scaled_df = None, pd.DataFrame(index=df.index)
 
     # Merge all transformed features
     drop_cols = all_cat_cols + continuous_cols
     df_processed = df.drop(columns=drop_cols, errors='ignore')
-    df_processed = df_processed.join([encoded_df, scaled_df])
-    df_processed = df_processed.astype(float)
+    if sparse:
+        # same columns as the dense join, stacked as CSR blocks
+        blocks = [csr_matrix(df_processed.to_numpy(dtype=dtype))]
+        feature_names = list(df_processed.columns)
+        if encoder is not None:
+            blocks.append(csr_matrix(encoded_array, dtype=dtype))
+            feature_names += encoded_cols
+        blocks.append(csr_matrix(scaled_df.to_numpy(dtype=dtype)))
+        feature_names += list(scaled_df.columns)
+        df_processed = hstack(blocks, format='csr', dtype=dtype)
+    else:
+        df_processed = df_processed.join([encoded_df, scaled_df])
+        df_processed = df_processed.astype(dtype)
+        feature_names = list(df_processed.columns)
 
     return {
         'df_processed': df_processed,
+        'feature_names': feature_names,
+        'sparse': sparse,
+        'dtype': dtype,
+        'encoding': encoding,
+        'encoded_cols': encoded_cols,
         'encoder': encoder,
         'scaler': scaler,
         'categorical_cols': all_cat_cols,
@@ -182,22 +521,31 @@ def preprocess_test(df_test, preprocess_results):
     Handles missing columns and unknown categories safely.
 
     Args:
-        df_test (pd.DataFrame): Input test DataFrame
+        df_test (pd.DataFrame): Input test DataFrame (or a Parquet file or Arrow table)
         preprocess_results (dict): Output dictionary from preprocess_train
 
     Returns:
-        pd.DataFrame: Preprocessed test DataFrame
+        pd.DataFrame: Preprocessed test DataFrame (scipy CSR matrix with the 
+            columns of preprocess_results['feature_names'] if preprocess_train 
+            was used with sparse=True), in the dtype of preprocess_results
     """
     import pandas as pd
     import numpy as np
+    from scipy.sparse import csr_matrix, hstack, issparse
+    from EasyMLR import hash_tokens, read_X_y
 
 
     encoder = preprocess_results['encoder']
     scaler = preprocess_results['scaler']
     categorical_cols = preprocess_results['categorical_cols']
     continuous_cols = preprocess_results['continuous_cols']
+    encoding = preprocess_results.get('encoding', 'onehot')
+    dtype = preprocess_results.get('dtype', np.float64)
+    encoded_cols = preprocess_results.get('encoded_cols')
+    if encoded_cols is None and encoder is not None and categorical_cols:
+        encoded_cols = list(encoder.get_feature_names_out(categorical_cols))
 
-    df_test = df_test.copy()
+    df_test = read_X_y(df_test)[0].copy()
 
     for col in categorical_cols:
         if df_test.get(col, pd.Series(dtype=object)).dtype == bool:
@@ -209,12 +557,20 @@ def preprocess_test(df_test, preprocess_results):
         for col in categorical_cols:
             df_cat[col] = df_test[col] if col in df_test.columns else np.nan
 
-        encoded_array = encoder.transform(df_cat[categorical_cols])
-        encoded_df = pd.DataFrame(
-            encoded_array,
-            columns=encoder.get_feature_names_out(categorical_cols),
-            index=df_test.index
-        ).astype(float)
+        if encoding == 'hashing':
+            encoded_array = encoder.transform(hash_tokens(df_cat[categorical_cols]))
+        else:
+            encoded_array = encoder.transform(df_cat[categorical_cols])
+        if preprocess_results.get('sparse', False):
+            encoded_df = None
+        else:
+            if issparse(encoded_array):
+                encoded_array = encoded_array.toarray()
+            encoded_df = pd.DataFrame(
+                encoded_array,
+                columns=encoded_cols,
+                index=df_test.index
+            ).astype(dtype)
     else:
         encoded_df = pd.DataFrame(index=df_test.index)
 
@@ -225,18 +581,556 @@ def preprocess_test(df_test, preprocess_results):
             df_num[col] = df_test[col] if col in df_test.columns else 0.0
 
         scaled_array = scaler.transform(df_num[continuous_cols])
-        scaled_df = pd.DataFrame(scaled_array, columns=continuous_cols, index=df_test.index).astype(float)
+        scaled_df = pd.DataFrame(scaled_array, columns=continuous_cols, index=df_test.index).astype(dtype)
     else:
         scaled_df = pd.DataFrame(index=df_test.index)
 
     drop_cols = set(categorical_cols + continuous_cols)
     remaining = df_test.drop(columns=[col for col in drop_cols if col in df_test.columns], errors='ignore')
 
+    if preprocess_results.get('sparse', False):
+        # CSR blocks in the same columns as the training data
+        encoded_names = set(encoded_cols if encoder is not None and categorical_cols else [])
+        other_cols = [col for col in preprocess_results['feature_names']
+            if col not in encoded_names and col not in continuous_cols]
+        remaining = remaining.reindex(columns=other_cols, fill_value=0.0)
+        blocks = [csr_matrix(remaining.to_numpy(dtype=dtype))]
+        if encoder is not None and categorical_cols:
+            blocks.append(csr_matrix(encoded_array, dtype=dtype))
+        blocks.append(csr_matrix(scaled_df.to_numpy(dtype=dtype)))
+        return hstack(blocks, format='csr', dtype=dtype)
+
     df_processed = remaining.join([encoded_df, scaled_df])
-    df_processed = df_processed.astype(float)
+    df_processed = df_processed.astype(dtype)
 
     return df_processed
 
+def df_chunks(source, chunksize=100000):
+
+    """
+    PURPOSE
+    Generator of the chunks of rows of a source of dataframes
+    USAGE
+    for chunk in df_chunks(source, chunksize=100000):
+    INPUT
+    source = any of the following sources of dataframes:
+        - iterator of dataframes, such as pd.read_csv(file, chunksize=100000)
+        - path to a .csv file (read with pd.read_csv in chunks)
+        - path to a .parquet file (read in batches of rows with pyarrow)
+        - pyarrow Table (split into batches of rows)
+        - dataframe (split into chunks of rows)
+    chunksize = number of rows per chunk of .csv and .parquet files, 
+        Arrow tables, and dataframes
+    OUTPUT
+    chunk = dataframe of the next chunk of rows
+    """
+
+    import pandas as pd
+
+    if isinstance(source, str) and source.lower().endswith(('.parquet', '.pq')):
+        import pyarrow.parquet as pq
+        source = pq.ParquetFile(source, memory_map=True).iter_batches(batch_size=chunksize)
+    elif isinstance(source, str):
+        source = pd.read_csv(source, chunksize=chunksize)
+    elif type(source).__module__.split('.')[0] == 'pyarrow':
+        source = source.to_batches(max_chunksize=chunksize)
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, source.shape[0], chunksize):
+            yield source.iloc[start:start + chunksize]
+    else:
+        for chunk in source:
+            if not isinstance(chunk, pd.DataFrame):
+                # Arrow record batch, with one block per column as in read_X_y
+                chunk = chunk.to_pandas(split_blocks=True)
+            yield chunk
+
+def preprocess_train_chunked(source, threshold=10, scale='standard', sparse=False,
+        chunksize=100000, dtype=None):
+    """
+    Same as preprocess_train, fitted in one pass over the chunks of rows of
+    data that are too large to fit in memory. The categories of each column 
+    are found chunk by chunk, the distinct values of the numeric columns are 
+    kept only up to threshold + 1 values to find the categorical numeric 
+    columns, and the scaler is fitted with partial_fit.
+
+    Args:
+        source: iterator of DataFrames (e.g. pd.read_csv(file, chunksize=100000)),
+            path to a .csv file, or DataFrame (see df_chunks)
+        threshold (int): Max unique values for numeric columns to be considered categorical
+        scale (str): 'minmax' or 'standard' for scaler selection
+        sparse (bool): True for preprocess_test to return scipy CSR matrices
+        chunksize (int): Number of rows per chunk of .csv files and DataFrames
+        dtype: Floating point dtype of the output of preprocess_test 
+            (default None is np.float64)
+
+    Returns:
+        dict: same as preprocess_train with 'df_processed': None
+            (use preprocess_test_chunked to transform the training data)
+    """
+    import pandas as pd
+    import numpy as np
+    import sys
+    from EasyMLR import df_chunks
+    from sklearn.preprocessing import OneHotEncoder, MinMaxScaler, StandardScaler
+
+    columns = None
+    for chunk in df_chunks(source, chunksize):
+        if chunk.shape[0] == 0:
+            continue
+        if columns is None:
+            # column types from the first chunk
+            columns = list(chunk.columns)
+            bool_cols = chunk.select_dtypes(include='bool').columns.tolist()
+            numeric = chunk.select_dtypes(include='number').columns.tolist()
+            non_numeric_cats = chunk.select_dtypes(include=['object', 'category']).columns.tolist()
+            # distinct values (None after a numeric column has more than threshold)
+            distinct = {col: set() for col in numeric + non_numeric_cats + bool_cols}
+            missing = {col: [] for col in distinct}    # first missing value found
+            scaler = StandardScaler() if scale == 'standard' else MinMaxScaler()
+        chunk = chunk.copy()
+        chunk[bool_cols] = chunk[bool_cols].astype(int)
+        for col in distinct:
+            if distinct[col] is None:
+                continue
+            values = chunk[col]
+            if not missing[col] and values.isna().any():
+                missing[col] = [values[values.isna()].iloc[0]]
+            values = values.dropna().unique()
+            if col in numeric:
+                values = values + 0    # same category for -0.0 and 0.0
+            distinct[col].update(values.tolist())
+            if col in numeric and len(distinct[col]) > threshold:
+                distinct[col] = None
+        if numeric:
+            scaler.partial_fit(chunk[numeric])
+
+    if columns is None:
+        print('Check source: it needs to have at least one row of data!','\n')
+        sys.exit()
+
+    categorical_numeric = [col for col in numeric if distinct[col] is not None]
+    continuous_cols = [col for col in numeric if distinct[col] is None]
+    all_cat_cols = categorical_numeric + non_numeric_cats + bool_cols
+
+    # One-hot encoder fitted to one row of each distinct value
+    if all_cat_cols:
+        values = {}
+        for col in all_cat_cols:
+            values[col] = list(distinct[col]) + missing[col]
+        n_rows = max(len(v) for v in values.values())
+        df_cat = pd.DataFrame({col: pd.Series([v[i % len(v)] for i in range(n_rows)])
+            for col, v in values.items()})
+        encoder = OneHotEncoder(handle_unknown='ignore', sparse_output=sparse, 
+            dtype=np.float64 if dtype is None else dtype)
+        encoder.fit(df_cat[all_cat_cols])
+        category_mappings = {
+            col: encoder.categories_[i].tolist()
+            for i, col in enumerate(all_cat_cols)
+        }
+        encoded_names = list(encoder.get_feature_names_out(all_cat_cols))
+    else:
+        encoder, category_mappings, encoded_names = None, {}, []
+
+    # Scaler of only the continuous columns
+    if continuous_cols:
+        idx = [numeric.index(col) for col in continuous_cols]
+        fitted = scaler
+        scaler = StandardScaler() if scale == 'standard' else MinMaxScaler()
+        for key, value in vars(fitted).items():
+            if key.endswith('_') and isinstance(value, np.ndarray) and value.shape == (len(numeric),):
+                value = value[idx]
+            setattr(scaler, key, value)
+        scaler.n_features_in_ = len(continuous_cols)
+        scaler.feature_names_in_ = np.array(continuous_cols, dtype=object)
+    else:
+        scaler = None
+
+    drop_cols = set(all_cat_cols + continuous_cols)
+    other_cols = [col for col in columns if col not in drop_cols]
+
+    return {
+        'df_processed': None,
+        'feature_names': other_cols + encoded_names + continuous_cols,
+        'sparse': sparse,
+        'dtype': np.float64 if dtype is None else dtype,
+        'encoding': 'onehot',
+        'encoded_cols': encoded_names,
+        'encoder': encoder,
+        'scaler': scaler,
+        'categorical_cols': all_cat_cols,
+        'non_numeric_cats': non_numeric_cats,
+        'continuous_cols': continuous_cols,
+        'category_mappings': category_mappings
+    }
+
+def preprocess_test_chunked(source, preprocess_results, chunksize=100000):
+    """
+    Generator of preprocess_test of each chunk of rows of data that are 
+    too large to fit in memory, using the artifacts from preprocess_train 
+    or preprocess_train_chunked.
+
+    Args:
+        source: iterator of DataFrames (e.g. pd.read_csv(file, chunksize=100000)),
+            path to a .csv file, or DataFrame (see df_chunks)
+        preprocess_results (dict): Output dictionary from preprocess_train 
+            or preprocess_train_chunked
+        chunksize (int): Number of rows per chunk of .csv files and DataFrames
+
+    Yields:
+        Preprocessed DataFrame (or scipy CSR matrix) of each chunk
+    """
+    from EasyMLR import df_chunks, preprocess_test
+
+    for chunk in df_chunks(source, chunksize):
+        yield preprocess_test(chunk, preprocess_results)
+
+def compile_transform(preprocess_results):
+
+    """
+    PURPOSE
+    Compile the artifacts of preprocess_train into a transform plan that 
+    apply_transform uses to transform test data with low latency, 
+    e.g. one request at a time in online scoring. The plan holds the output 
+    position of each column, a dictionary from each category to the position 
+    of its one-hot column, and the scaler vectors, so that no intermediate 
+    dataframes are made
+    USAGE
+    plan = compile_transform(preprocess_results)
+    INPUT
+    preprocess_results = output dictionary from preprocess_train 
+        or preprocess_train_chunked
+    OUTPUT
+    plan = dictionary of the following:
+        - 'feature_names': column names of the output
+        - 'other': (column, position) of the columns that are not 
+            encoded or scaled
+        - 'categorical': (column, {category: position}, position of the 
+            missing-value category or -1, pd.Index of the categories, 
+            first position) of each one-hot encoded column
+        - 'target': (column, {category: values}, values of the missing-value
+            category or None, pd.Index of the categories, array of the values,
+            positions, values of unknown categories) of each target encoded column
+        - 'hashing': FeatureHasher, categorical columns, and first position
+            of the hashed columns, or None
+        - 'continuous': names, positions, and 'mode' ('standard' or 
+            'minmax') with the vectors 'a' and 'b' of the scaler
+            ((x - a) / b for 'standard', x * a + b for 'minmax')
+        - 'buffer': preallocated output array of one row
+    """
+
+    import numpy as np
+    import pandas as pd
+
+    encoder = preprocess_results['encoder']
+    scaler = preprocess_results['scaler']
+    categorical_cols = preprocess_results['categorical_cols']
+    continuous_cols = preprocess_results['continuous_cols']
+    encoding = preprocess_results.get('encoding', 'onehot')
+    encoded_names = preprocess_results.get('encoded_cols')
+    if encoder is None or not categorical_cols:
+        encoded_names = []
+    elif encoded_names is None:
+        encoded_names = list(encoder.get_feature_names_out(categorical_cols))
+    encoded_names = list(encoded_names)
+    feature_names = preprocess_results.get('feature_names')
+    if feature_names is None:
+        feature_names = encoded_names + list(continuous_cols)
+    feature_names = list(feature_names)
+    position = {name: i for i, name in enumerate(feature_names)}
+
+    skip = set(encoded_names) | set(continuous_cols)
+    other = [(col, position[col]) for col in feature_names if col not in skip]
+
+    categorical = []
+    target = []
+    hashing = None
+    if encoded_names and encoding == 'hashing':
+        hashing = (encoder, list(categorical_cols), position[encoded_names[0]])
+    elif encoded_names and encoding == 'target':
+        # target means of each category (one per class for multiclass)
+        n_out = len(encoded_names) // len(categorical_cols)
+        default = np.resize(np.asarray(encoder.target_mean_, dtype=float), n_out)
+        for i, col in enumerate(categorical_cols):
+            positions = np.array([position[name] 
+                for name in encoded_names[i * n_out:(i + 1) * n_out]])
+            values = np.column_stack([encoder.encodings_[i * n_out + k] for k in range(n_out)])
+            lookup = {}
+            missing = None
+            known = []
+            rows = []
+            for j, category in enumerate(encoder.categories_[i]):
+                if pd.isna(category):
+                    missing = values[j]
+                else:
+                    category = category.item() if hasattr(category, 'item') else category
+                    lookup[category] = values[j]
+                    known.append(category)
+                    rows.append(j)
+            target.append((col, lookup, missing, pd.Index(known), values[rows], 
+                positions, default))
+    elif encoded_names:
+        start = position[encoded_names[0]]    # the one-hot columns are contiguous
+        for i, col in enumerate(categorical_cols):
+            lookup = {}
+            missing = -1
+            known = []
+            for j, category in enumerate(encoder.categories_[i]):
+                if pd.isna(category):
+                    missing = start + j
+                else:
+                    category = category.item() if hasattr(category, 'item') else category
+                    lookup[category] = start + j
+                    known.append(category)
+            categorical.append((col, lookup, missing, pd.Index(known), start))
+            start += len(encoder.categories_[i])
+
+    continuous = None
+    if scaler is not None and continuous_cols:
+        if hasattr(scaler, 'data_min_'):
+            mode, a, b = 'minmax', scaler.scale_, scaler.min_
+        else:
+            n = len(continuous_cols)
+            a = scaler.mean_ if scaler.mean_ is not None else np.zeros(n)
+            b = scaler.scale_ if scaler.scale_ is not None else np.ones(n)
+            mode = 'standard'
+        continuous = {
+            'names': list(continuous_cols),
+            'positions': np.array([position[col] for col in continuous_cols]),
+            'mode': mode,
+            'a': np.asarray(a, dtype=float),
+            'b': np.asarray(b, dtype=float)
+            }
+
+    plan = {
+        'feature_names': feature_names,
+        'other': other,
+        'categorical': categorical,
+        'target': target,
+        'hashing': hashing,
+        'continuous': continuous,
+        'buffer': np.zeros((1, len(feature_names)), 
+            dtype=preprocess_results.get('dtype', np.float64))
+        }
+
+    return plan
+
+def apply_transform(plan, X_test, out=None):
+
+    """
+    PURPOSE
+    Transform test data with a plan from compile_transform, with the same 
+    result as preprocess_test (always as a dense array), writing directly 
+    into a preallocated output array
+    USAGE
+    X = apply_transform(plan, X_test, out=None)
+    INPUT
+    plan = output of compile_transform
+    X_test = dictionary of the column values of one row (fastest), 
+        or dataframe of any number of rows
+    out = optional array of shape (number of rows, len(plan['feature_names'])) 
+        to write the output in (default for one dictionary row is 
+        plan['buffer'], which is overwritten by the next call)
+    OUTPUT
+    X = 2-D numpy array of the transformed rows in the columns 
+        of plan['feature_names'] 
+    """
+
+    import numpy as np
+    import pandas as pd
+    from sklearn.utils import murmurhash3_32
+    from EasyMLR import hash_tokens
+
+    continuous = plan['continuous']
+    hashing = plan['hashing']
+
+    # one row as a dictionary of column values
+    if isinstance(X_test, dict):
+        if out is None:
+            out = plan['buffer']
+        out.fill(0.0)
+        row = out[0]
+        for col, pos in plan['other']:
+            row[pos] = X_test.get(col, 0.0)
+        for col, lookup, missing, index, start in plan['categorical']:
+            value = X_test.get(col)
+            if pd.isna(value):
+                pos = missing
+            else:
+                pos = lookup.get(value, -1)
+            if pos >= 0:
+                row[pos] = 1.0
+        for col, lookup, missing, index, values, positions, default in plan['target']:
+            value = X_test.get(col)
+            if pd.isna(value):
+                encoded = missing
+            else:
+                encoded = lookup.get(value)
+            row[positions] = default if encoded is None else encoded
+        if hashing is not None:
+            # same signed murmurhash3 as FeatureHasher
+            hasher, columns, start = hashing
+            for col in columns:
+                value = X_test.get(col, np.nan)
+                if isinstance(value, bool):
+                    value = int(value)
+                h = murmurhash3_32(str(col) + '=' + str(value), seed=0)
+                row[start + abs(h) % hasher.n_features] += 1.0 if h >= 0 else -1.0
+        if continuous is not None:
+            x = np.array([X_test.get(col, 0.0) for col in continuous['names']], dtype=float)
+            if continuous['mode'] == 'standard':
+                row[continuous['positions']] = (x - continuous['a']) / continuous['b']
+            else:
+                row[continuous['positions']] = x * continuous['a'] + continuous['b']
+        return out
+
+    # dataframe of rows
+    n = X_test.shape[0]
+    if out is None:
+        out = np.zeros((n, len(plan['feature_names'])), dtype=plan['buffer'].dtype)
+    else:
+        out.fill(0.0)
+    rows = np.arange(n)
+    for col, pos in plan['other']:
+        if col in X_test.columns:
+            out[:, pos] = X_test[col].to_numpy(dtype=float)
+    for col, lookup, missing, index, start in plan['categorical']:
+        if col in X_test.columns:
+            values = X_test[col].to_numpy()
+            if values.dtype == bool:
+                values = values.astype(int)
+            idx = index.get_indexer(values)
+            idx = np.where(idx >= 0, start + idx, -1)
+            idx[pd.isna(values)] = missing
+        else:
+            idx = np.full(n, missing)
+        hit = idx >= 0
+        out[rows[hit], idx[hit]] = 1.0
+    for col, lookup, missing, index, values, positions, default in plan['target']:
+        encoded = np.tile(default, (n, 1))
+        if col in X_test.columns:
+            x = X_test[col].to_numpy()
+            if x.dtype == bool:
+                x = x.astype(int)
+            idx = index.get_indexer(x)
+            encoded[idx >= 0] = values[idx[idx >= 0]]
+            if missing is not None:
+                encoded[pd.isna(x)] = missing
+        elif missing is not None:
+            encoded[:] = missing
+        out[:, positions] = encoded
+    if hashing is not None:
+        hasher, columns, start = hashing
+        df_cat = pd.DataFrame({col: (X_test[col].astype(int) if X_test[col].dtype == bool
+            else X_test[col]) if col in X_test.columns else np.nan for col in columns},
+            index=X_test.index)
+        out[:, start:start + hasher.n_features] = hasher.transform(hash_tokens(df_cat)).toarray()
+    if continuous is not None:
+        x = np.zeros((n, len(continuous['names'])))
+        for j, col in enumerate(continuous['names']):
+            if col in X_test.columns:
+                x[:, j] = X_test[col].to_numpy(dtype=float)
+        if continuous['mode'] == 'standard':
+            out[:, continuous['positions']] = (x - continuous['a']) / continuous['b']
+        else:
+            out[:, continuous['positions']] = x * continuous['a'] + continuous['b']
+
+    return out
+
+def native_categorical(X, categorical=True, preprocess_result=None, standardize=True,
+    strings=False):
+
+    """
+    PURPOSE
+    Prepare X for the native categorical support of XGBoost 
+    (enable_categorical), LightGBM (categorical_feature), and CatBoost 
+    (cat_features) instead of one-hot encoding with preprocess_train. 
+    The categorical columns become pandas category dtype with the 
+    categories of the training data (bool columns as 0 and 1), so that 
+    test data get the same category codes (unknown categories are missing), 
+    and the continuous numeric columns are standardized. CatBoost does not
+    accept missing values in cat_features, so with strings=True the 
+    categorical columns are strings instead, with 'nan' for the missing 
+    values and for the categories that are not in the training data
+    USAGE
+    result = native_categorical(X, categorical=True, preprocess_result=None,
+        standardize=True, strings=False)
+    INPUT
+    X = dataframe of the candidate independent variables
+    categorical = True to use the object, category, and bool columns of X,
+        or list of the names of the categorical columns
+    preprocess_result = output of native_categorical for the training data
+        to transform test data with the same categories and scaler
+        (default None fits them to X)
+    standardize = True (default) or False to standardize the continuous columns
+    strings = True to make the categorical columns strings with 'nan' for
+        missing and unknown categories (for CatBoost), or False (default) 
+        for pandas category dtype (for XGBoost and LightGBM)
+    OUTPUT
+    result = dictionary of the following:
+        - 'df_processed': copy of X with category dtypes (or strings) and 
+            scaled columns
+        - 'feature_names': column names of df_processed
+        - 'categorical_cols': names of the categorical columns
+        - 'categories': dictionary of the list of categories of each 
+            categorical column
+        - 'continuous_cols': names of the continuous numeric columns
+        - 'scaler': StandardScaler fitted to the continuous columns or None
+        - 'standardize': True if the continuous columns were scaled
+        - 'strings': True if the categorical columns are strings
+    """
+
+    import pandas as pd
+    import sys
+    from sklearn.preprocessing import StandardScaler
+
+    X = X.copy()
+    if preprocess_result is None:
+        if categorical is True:
+            categorical_cols = X.select_dtypes(include=['object', 'category', 'bool']).columns.tolist()
+        else:
+            categorical_cols = list(categorical)
+        ctrl = set(categorical_cols) <= set(X.columns)
+        if not ctrl:
+            print('Check categorical: it needs to be True or a list of columns of X!','\n')
+            sys.exit()
+        continuous_cols = [col for col in X.select_dtypes(include='number').columns
+            if col not in categorical_cols]
+        categories = None
+        scaler = StandardScaler().fit(X[continuous_cols]) if continuous_cols else None
+    else:
+        categorical_cols = preprocess_result['categorical_cols']
+        continuous_cols = preprocess_result['continuous_cols']
+        categories = preprocess_result['categories']
+        scaler = preprocess_result['scaler']
+        standardize = preprocess_result['standardize']
+        strings = preprocess_result['strings']
+
+    found = {}
+    for col in categorical_cols:
+        values = X[col].astype(int) if X[col].dtype == bool else X[col]
+        if categories is None:
+            X[col] = pd.Categorical(values)
+        else:
+            X[col] = pd.Categorical(values, categories=categories[col])
+        found[col] = X[col].cat.categories.tolist()
+        if strings:
+            X[col] = X[col].astype(object).where(X[col].notna(), 'nan').astype(str)
+    if standardize and scaler is not None:
+        X[continuous_cols] = scaler.transform(X[continuous_cols])
+
+    result = {
+        'df_processed': X,
+        'feature_names': list(X.columns),
+        'categorical_cols': categorical_cols,
+        'categories': found,
+        'continuous_cols': continuous_cols,
+        'scaler': scaler,
+        'standardize': standardize,
+        'strings': strings
+        }
+
+    return result
+
 def show_optuna(study):
 
     '''
@@ -386,11 +1280,8 @@ def test_linear_model(
     import warnings
     import sys
 
-    # copy X and y to avoid altering originals
-    X = X.copy()
-    y = y.copy()
-
     # check X and y and put into dataframe if needed
+    # (check_X_y copies X and y to avoid altering originals)
     X, y = check_X_y(X, y)
     
     if selected_features==None:
@@ -471,11 +1362,8 @@ def plot_linear_results_test(
     import warnings
     import sys
 
-    # copy X and y to avoid altering originals
-    X = X.copy()
-    y = y.copy()
-
     # check X and y and put into dataframe if needed
+    # (check_X_y copies X and y to avoid altering originals)
     X, y = check_X_y(X, y)
     
     if selected_features==None:
@@ -544,11 +1432,8 @@ def plot_predictions_from_test(
     import warnings
     import sys
 
-    # copy X and y to avoid altering originals
-    X = X.copy()
-    y = y.copy()
-
     # check X and y and put into dataframe if needed
+    # (check_X_y copies X and y to avoid altering originals)
     X, y = check_X_y(X, y)
     
     if standardize and scaler == None:
@@ -740,13 +1625,23 @@ def detect_dummy_variables(df, sep=None):
     Detects dummy variables in a Pandas DataFrame.
 
     Args:
-        df (pd.DataFrame): The DataFrame to check.
+        df (pd.DataFrame): The DataFrame to check (or a scipy sparse matrix).
         sep (str, optional): Separator used in column names if dummy variables were created with pd.get_dummies. Defaults to None.
 
     Returns:
         bool: True if dummy variables are likely present, False otherwise.
     """
     import pandas as pd
+    import numpy as np
+    from scipy.sparse import issparse
+
+    if issparse(df):
+        # columns whose stored values are all 1 with at least one 0
+        X = df.tocsc()
+        nnz = np.diff(X.indptr)
+        ones = np.add.reduceat(np.append(X.data == 1, False), X.indptr[:-1])
+        ones[nnz == 0] = 0
+        return bool(np.any((ones == nnz) & (nnz > 0) & (nnz < X.shape[0])))
 
     for col in df.columns:
         if df[col].nunique() == 2 and df[col].isin([0, 1]).all():
@@ -801,19 +1696,1487 @@ def nnn(x):
     
     return result
 
-def stepwise(X, y, **kwargs):
+def gram_matrix(X, y):
 
     """
-    Python function for stepwise linear regression to minimize AIC or BIC
-    and eliminate non-signficant predictors
+    PURPOSE
+    Build the centered cross-product matrix of X and y used by the
+    sweep engine of stepwise regression
+    USAGE
+    gram = gram_matrix(X, y)
+    INPUT
+    X = dataframe of the candidate independent variables
+    y = series of the dependent variable
+    OUTPUT
+    gram = dictionary of the following:
+        'A': (p+1) x (p+1) array [[Xc'Xc, Xc'yc], [yc'Xc, yc'yc]]
+            where Xc and yc are X and y centered on their means
+            (the last row and column belong to y)
+        'n': number of samples
+        'features': list of the column names of X
+        'x_mean': means of the columns of X
+        'y_mean': mean of y
+    """
 
-    by
-    Greg Pelletier
-    gjpelletier@gmail.com
-    17-May-2025
+    import numpy as np
 
-    REQUIRED INPUTS (X and y should have same number of rows and 
-    only contain real numbers)
+    Xv = np.asarray(X, dtype=float)
+    yv = np.asarray(y, dtype=float)
+    x_mean = Xv.mean(axis=0)
+    y_mean = yv.mean()
+    Z = np.column_stack([Xv - x_mean, yv - y_mean])
+    A = Z.T @ Z
+
+    gram = {
+        'A': A,
+        'n': Xv.shape[0],
+        'features': list(map(str, X.columns)) if hasattr(X, 'columns')
+            else ['X' + str(i) for i in range(Xv.shape[1])],
+        'x_mean': x_mean,
+        'y_mean': y_mean
+        }
+
+    return gram
+
+def gram_matrix_chunked(source, **kwargs):
+
+    """
+    PURPOSE
+    Build the same centered cross-product matrix as gram_matrix,
+    one chunk of rows at a time, so that X and y never need to be
+    in memory all at once. The chunks are merged with the pairwise update
+    of the means and centered cross-products (Chan, Golub, and LeVeque),
+    which is as accurate as centering all of the data at once.
+    USAGE
+    gram = gram_matrix_chunked(source, **kwargs)
+    INPUT
+    source = any of the following sources of the rows of X and y:
+        - iterator of dataframes, such as pd.read_csv(file, chunksize=100000)
+        - path to a .csv file (read with pd.read_csv in chunks)
+        - path to a .parquet file or pyarrow Table (read in batches of rows)
+        - path to a .npy file (memory-mapped with np.load(mmap_mode='r'))
+        - 2-D numpy array or np.memmap (read in chunks of rows)
+        - dataframe (used as a single chunk)
+    **kwargs (optional keyword arguments):
+        y= name (dataframes) or column index (arrays) of the
+            dependent variable (default is the last column)
+        features= list of the names (dataframes) or column indices (arrays)
+            of the candidate features (default is every column except y)
+        chunksize= number of rows per chunk of .csv files and arrays
+            (default 100000)
+    OUTPUT
+    gram = dictionary of 'A', 'n', 'features', 'x_mean', and 'y_mean'
+        (same as the output of gram_matrix)
+    """
+
+    import numpy as np
+    import pandas as pd
+    import sys
+    from EasyMLR import df_chunks
+
+    defaults = {
+        'y': None,
+        'features': None,
+        'chunksize': 100000
+        }
+    data = {**defaults, **kwargs}
+    chunksize = data['chunksize']
+
+    if isinstance(source, str) and source.lower().endswith('.npy'):
+        source = np.load(source, mmap_mode='r')
+    elif isinstance(source, str) or type(source).__module__.split('.')[0] == 'pyarrow':
+        # dataframes of the chunks of .csv and .parquet files and Arrow tables
+        source = df_chunks(source, chunksize)
+    if isinstance(source, pd.DataFrame):
+        chunks = [source]
+    elif isinstance(source, np.ndarray):
+        chunks = (source[start:start + chunksize]
+            for start in range(0, source.shape[0], chunksize))
+    else:
+        chunks = source
+
+    n = 0
+    mean = None
+    M = None
+    features = None
+    for chunk in chunks:
+        if isinstance(chunk, pd.DataFrame):
+            y_col = chunk.columns[-1] if data['y'] is None else data['y']
+            x_cols = ([c for c in chunk.columns if c != y_col]
+                if data['features'] is None else list(data['features']))
+            Z = chunk[x_cols + [y_col]].to_numpy(dtype=float)
+            if features is None:
+                features = list(map(str, x_cols))
+        else:
+            chunk = np.asarray(chunk, dtype=float)
+            y_col = chunk.shape[1] - 1 if data['y'] is None else data['y'] % chunk.shape[1]
+            x_cols = ([c for c in range(chunk.shape[1]) if c != y_col]
+                if data['features'] is None else list(data['features']))
+            Z = chunk[:, x_cols + [y_col]]
+            if features is None:
+                features = ['X' + str(c) for c in x_cols]
+        if Z.shape[0] == 0:
+            continue
+        ctrl = np.isfinite(Z).all()
+        if not ctrl:
+            print('Check X and y: they need to have no nan or inf values!','\n')
+            sys.exit()
+
+        # centered cross-products of this chunk
+        n_b = Z.shape[0]
+        mean_b = Z.mean(axis=0)
+        Zc = Z - mean_b
+        M_b = Zc.T @ Zc
+
+        # merge with the chunks so far
+        if M is None:
+            n, mean, M = n_b, mean_b, M_b
+        else:
+            delta = mean_b - mean
+            n_ab = n + n_b
+            M = M + M_b + np.outer(delta, delta) * (n * n_b / n_ab)
+            mean = mean + delta * (n_b / n_ab)
+            n = n_ab
+
+    if M is None:
+        print('Check source: it needs to have at least one row of data!','\n')
+        sys.exit()
+
+    gram = {
+        'A': M,
+        'n': n,
+        'features': features,
+        'x_mean': mean[:-1],
+        'y_mean': mean[-1]
+        }
+
+    return gram
+
+def gram_folds(X, y, nfolds=5, random_state=42):
+
+    """
+    PURPOSE
+    Centered cross-product matrices of the held-out rows of each fold of 
+    k-fold cross-validation. With the totals of gram_matrix(X, y), the 
+    cross-products of the training rows of a fold are the totals minus 
+    the fold block, so that the held-out error of any subset of features 
+    is computed from these matrices without touching the rows again.
+    USAGE
+    folds = gram_folds(X, y, nfolds=5, random_state=42)
+    INPUT
+    X = dataframe of the candidate independent variables
+    y = series of the dependent variable
+    nfolds = number of folds of sklearn KFold with shuffle=True (default 5)
+    random_state = random seed of the shuffle of KFold (default 42)
+    OUTPUT
+    folds = list of dictionaries of each fold with the following:
+        'index': positions of the held-out rows of the fold
+        'n': number of held-out rows
+        'mean': means of the columns of X and y of the held-out rows
+        'M': centered cross-product matrix of X and y of the held-out rows
+    """
+
+    import numpy as np
+    from sklearn.model_selection import KFold
+
+    Z = np.column_stack([np.asarray(X, dtype=float), np.asarray(y, dtype=float)])
+    kf = KFold(n_splits=nfolds, shuffle=True, random_state=random_state)
+    folds = []
+    for train_index, test_index in kf.split(Z):
+        Zf = Z[test_index]
+        mean_f = Zf.mean(axis=0)
+        Zc = Zf - mean_f
+        folds.append({
+            'index': test_index,
+            'n': Zf.shape[0],
+            'mean': mean_f,
+            'M': Zc.T @ Zc
+            })
+
+    return folds
+
+def sweep(A, k, reverse=False):
+
+    """
+    PURPOSE
+    Sweep (or reverse sweep) the symmetric matrix A in place on pivot k.
+    Sweeping column k of a cross-product matrix adds feature k to the
+    regression in O(p^2) operations, and reverse sweeping removes it again.
+    After sweeping a set S of features of gram_matrix(X, y)['A']:
+        A[-1,-1] is the residual sum of squares of y regressed on S
+        A[S,-1] are the regression coefficients of S
+        -A[S,S] is the inverse of Xc[S]'Xc[S]
+        A[j,j] and A[j,-1] for j not in S are the residual sum of squares
+            of x_j and the residual cross-product of x_j and y given S
+    USAGE
+    sweep(A, k)                 # add feature k
+    sweep(A, k, reverse=True)   # remove feature k
+    INPUT
+    A = symmetric numpy array (modified in place)
+    k = index of the pivot
+    reverse = False (default) to sweep, or True to reverse sweep
+    OUTPUT
+    A = the swept array (same object as the input)
+    """
+
+    import numpy as np
+
+    d = A[k, k]
+    col = A[:, k].copy()
+    A -= np.outer(col, col) / d
+    if reverse:
+        A[k, :] = -col / d
+        A[:, k] = -col / d
+    else:
+        A[k, :] = col / d
+        A[:, k] = col / d
+    A[k, k] = -1.0 / d
+
+    return A
+
+def ols_criteria(rss, tss, n, k):
+
+    """
+    PURPOSE
+    Goodness of fit criteria of an OLS model with an intercept
+    computed from its residual sum of squares,
+    matching statsmodels OLS llf, aic, bic, and rsquared_adj
+    USAGE
+    crit = ols_criteria(rss, tss, n, k)
+    INPUT
+    rss = residual sum of squares (scalar or numpy array)
+    tss = total sum of squares of y about its mean
+    n = number of samples
+    k = number of features in the model, excluding the intercept
+        (scalar or numpy array of the same shape as rss)
+    OUTPUT
+    crit = dictionary of 'llf', 'AIC', 'BIC', and 'rsq_adj'
+    """
+
+    import numpy as np
+
+    rss = np.asarray(rss, dtype=float)
+    k = np.asarray(k, dtype=float)
+    llf = -0.5 * n * (np.log(2 * np.pi) + np.log(rss / n) + 1)
+    crit = {
+        'llf': llf,
+        'AIC': -2 * llf + 2 * (k + 1),
+        'BIC': -2 * llf + np.log(n) * (k + 1),
+        'rsq_adj': 1 - (n - 1) / (n - k - 1) * rss / tss
+        }
+
+    return crit
+
+def sweep_pvalues(A, selected, n):
+
+    """
+    PURPOSE
+    Coefficients, standard errors, t-values and p-values of the features
+    that are swept into the cross-product matrix A
+    USAGE
+    result = sweep_pvalues(A, selected, n)
+    INPUT
+    A = gram_matrix(X, y)['A'] after sweeping the selected features
+    selected = list of the indices of the swept features
+    n = number of samples
+    OUTPUT
+    result = dictionary of numpy arrays 'params', 'bse', 'tvalues', 'pvalues'
+        in the order of selected, and 'df_resid'
+    """
+
+    import numpy as np
+    from scipy import stats
+
+    idx = np.array(selected, dtype=int)
+    df_resid = n - len(selected) - 1
+    scale = A[-1, -1] / df_resid
+    params = A[idx, -1]
+    bse = np.sqrt(scale * -A[idx, idx])
+    tvalues = params / bse
+    pvalues = 2 * stats.t.sf(np.abs(tvalues), df_resid)
+
+    result = {
+        'params': params,
+        'bse': bse,
+        'tvalues': tvalues,
+        'pvalues': pvalues,
+        'df_resid': df_resid
+        }
+
+    return result
+
+def subset_sweep(A, j, collinear, tol, reverse=False):
+
+    """
+    PURPOSE
+    Add or remove feature j of a subset of features that may be rank deficient.
+    A keeps a maximal set of independent features of the subset swept in,
+    and the other features of the subset, which are exactly collinear with
+    the swept features, are listed in collinear. The subset is rank deficient
+    while collinear is not empty, and A[-1,-1] is always the residual sum
+    of squares of y regressed on the span of the subset.
+    USAGE
+    subset_sweep(A, j, collinear, tol)                  # add feature j
+    subset_sweep(A, j, collinear, tol, reverse=True)    # remove feature j
+    INPUT
+    A = gram_matrix(X, y)['A'] with the features of the subset swept in,
+        except for the features in collinear (modified in place)
+    j = index of the feature to add or remove
+    collinear = list of the indices of the collinear features of the subset
+        (start with an empty list, modified in place)
+    tol = numpy array of the smallest pivot of each feature that is swept in
+    reverse = False (default) to add j, or True to remove j
+    OUTPUT
+    A, collinear = the updated array and list (same objects as the input)
+    """
+
+    if not reverse:
+        if A[j, j] > tol[j]:
+            sweep(A, j)
+        else:
+            collinear.append(j)
+    elif j in collinear:
+        collinear.remove(j)
+    else:
+        sweep(A, j, reverse=True)
+        # one collinear feature may now be independent of the swept features
+        for c in collinear:
+            if A[c, c] > tol[c]:
+                sweep(A, c)
+                collinear.remove(c)
+                break
+
+    return A, collinear
+
+def gram_collinear(gram):
+
+    """
+    PURPOSE
+    Features of X that are exactly collinear with the previous features
+    of X, so that the OLS model with all features is rank deficient
+    USAGE
+    collinear_features = gram_collinear(gram)
+    INPUT
+    gram = output dictionary of gram_matrix(X, y)
+    OUTPUT
+    collinear_features = list of the names of the collinear features
+        (empty if X has full column rank)
+    """
+
+    import numpy as np
+
+    A = gram['A'].copy()
+    features = gram['features']
+    p = len(features)
+    tol = 1e-10 * np.maximum(np.diag(A)[:p], np.finfo(float).tiny)
+    collinear = []
+    for j in range(p):
+        subset_sweep(A, j, collinear, tol)
+    collinear_features = [features[j] for j in collinear]
+
+    return collinear_features
+
+def sweep_drop_insig(gram, selected_features, p_threshold=0.05, A=None):
+
+    """
+    PURPOSE
+    Backward elimination of non-significant features using the sweep operator.
+    The feature with the largest p-value above p_threshold is removed
+    with one O(p^2) reverse sweep, until all remaining p-values are
+    below p_threshold.
+    USAGE
+    selected_features, crit = sweep_drop_insig(gram, selected_features)
+    INPUT
+    gram = output dictionary of gram_matrix(X, y)
+    selected_features = list of the names of the starting features
+    p_threshold = threshold p-value to eliminate features (default 0.05)
+    A = optional copy of gram['A'] with exactly selected_features swept
+        (it is built from gram['A'] if A=None)
+    OUTPUT
+    selected_features = list of the remaining features
+    crit = ols_criteria of the final model
+    """
+
+    import numpy as np
+
+    features = gram['features']
+    n = gram['n']
+    p = len(features)
+    tss = gram['A'][p, p]
+    selected = [features.index(f) for f in selected_features]
+    if A is None:
+        A = gram['A'].copy()
+        for j in selected:
+            sweep(A, j)
+
+    while selected:
+        p_values = sweep_pvalues(A, selected, n)['pvalues']
+        i_worst = int(np.argmax(p_values))
+        if p_values[i_worst] > p_threshold:
+            sweep(A, selected[i_worst], reverse=True)
+            del selected[i_worst]
+        else:
+            break
+
+    selected_features = [features[j] for j in selected]
+    crit = ols_criteria(A[p, p], tss, n, len(selected))
+
+    return selected_features, crit
+
+def topk_push(heap, k, score, key, item):
+
+    """
+    PURPOSE
+    Keep the k items with the lowest score in a bounded heap,
+    so that memory stays constant however many items are pushed
+    USAGE
+    topk_push(heap, k, score, key, item)
+    INPUT
+    heap = list used as the heap (start with an empty list, modified in place)
+    k = maximum number of items to keep
+    score = score of the item where lower is better
+    key = sortable tie-breaker, where the item with the larger key is kept
+        when two scores are equal (e.g. use -i to keep the earlier item i)
+    item = any object to keep with the score
+    OUTPUT
+    heap = list of (-score, key, item) entries of the k best items
+    """
+
+    import heapq
+
+    entry = (-score, key, item)
+    if len(heap) < k:
+        heapq.heappush(heap, entry)
+    elif entry[:2] > heap[0][:2]:
+        heapq.heapreplace(heap, entry)
+
+    return heap
+
+def topk_sorted(heap):
+
+    """
+    PURPOSE
+    Sort the items of a heap made by topk_push from best to worst score
+    USAGE
+    ranked = topk_sorted(heap)
+    INPUT
+    heap = heap made by topk_push
+    OUTPUT
+    ranked = list of (score, key, item) sorted from best (lowest) score
+    """
+
+    ranked = sorted(heap, key=lambda e: e[:2], reverse=True)
+    ranked = [(-e[0], e[1], e[2]) for e in ranked]
+
+    return ranked
+
+def stepwise_sweep(gram, **kwargs):
+
+    """
+    PURPOSE
+    Stepwise feature selection on the cross-product matrix of X and y
+    using the sweep operator instead of refitting OLS for each candidate.
+    Every candidate of a step is scored from the current swept matrix
+    in O(p) operations, and adding or removing the chosen feature 
+    is one O(p^2) sweep or reverse sweep.
+    USAGE
+    selected_features, step_features = stepwise_sweep(gram, **kwargs)
+    INPUT
+    gram = output dictionary of gram_matrix(X, y)
+    **kwargs (optional keyword arguments):
+        criterion= 'AIC' (default), 'BIC', 'r2', 'p_coef', or 'cv_mse'
+            ('p_coef' always uses the backward direction)
+            ('cv_mse' is the k-fold cross-validated mean squared error,
+            computed from the cross-products of the folds in folds)
+        direction= 'forward' (default) or 'backward'
+        drop_insig= 'on' (default) or 'off'
+        p_threshold= threshold p-value to eliminate predictors (default 0.05)
+        folds= output of gram_folds(X, y) (required if criterion='cv_mse')
+    OUTPUT
+    selected_features = list of the selected features
+    step_features = dataframe of the features and fitness score at each step
+        (same format as model_output['step_features'] of stepwise)
+    NOTE
+    The backward direction starts from the features that are not collinear
+    with the previous features, so it only matches stepwise with
+    engine='statsmodels' if gram_collinear(gram) is empty
+    (stepwise itself uses engine='statsmodels' for a rank deficient X)
+    """
+
+    import numpy as np
+    import pandas as pd
+
+    defaults = {
+        'criterion': 'AIC',
+        'direction': 'forward',
+        'drop_insig': 'on',
+        'p_threshold': 0.05,
+        'folds': None
+        }
+    data = {**defaults, **kwargs}
+    if data['criterion'] == 'p_coef':
+        data['direction'] = 'backward'
+    use_cv = data['criterion'] == 'cv_mse'
+
+    A = gram['A'].copy()
+    n = gram['n']
+    features = gram['features']
+    p = len(features)
+    tss = A[p, p]
+    tol = 1e-10 * np.maximum(np.diag(A)[:p], np.finfo(float).tiny)
+
+    # centered cross-products of the training rows of each fold 
+    # (the totals minus the fold block), and cross-products of the 
+    # held-out rows centered on the means of the training rows
+    cv = []
+    if use_cv:
+        mean = np.append(gram['x_mean'], gram['y_mean'])
+        for fold in data['folds']:
+            n_f = fold['n']
+            n_t = n - n_f
+            mean_t = (n * mean - n_f * fold['mean']) / n_t
+            delta = fold['mean'] - mean_t
+            T = gram['A'] - fold['M'] - np.outer(delta, delta) * (n_t * n_f / n)
+            H = fold['M'] + np.outer(delta, delta) * n_f
+            cv.append({'T': T, 'H': H, 
+                'tol': 1e-10 * np.maximum(np.diag(T)[:p], np.finfo(float).tiny)})
+
+    def cv_mse(selected, cand=None):
+        # cross-validated MSE of the selected features (if cand is None),
+        # or of the selected features with each candidate j of cand added
+        # (j not in selected) or dropped (j in selected), using the
+        # rank-one change of the training coefficients of each fold
+        sel = np.array(selected, dtype=int)
+        sse = 0.0
+        for f in cv:
+            T, H = f['T'], f['H']
+            w = np.zeros(p + 1)
+            w[sel] = -T[sel, p]
+            w[p] = 1.0
+            Hw = H @ w
+            if cand is None:
+                sse = sse + w @ Hw
+                continue
+            V = np.zeros((p + 1, len(cand)))
+            V[sel, :] = T[np.ix_(sel, cand)]
+            add = ~np.isin(cand, sel)
+            V[cand[add], np.nonzero(add)[0]] = -1.0
+            c = T[cand, p] / T[cand, cand]
+            sse = sse + w @ Hw + 2 * c * (V.T @ Hw) + c**2 * np.einsum('ij,ij->j', V, H @ V)
+        return sse / n
+
+    def cv_sweep(j, reverse=False):
+        # add or remove feature j in the training matrices of every fold
+        for f in cv:
+            sweep(f['T'], j, reverse=reverse)
+
+    def score(crit):
+        # statsmodels-equivalent score where lower is better
+        if data['criterion'] == 'AIC':
+            return crit['AIC']
+        elif data['criterion'] == 'BIC':
+            return crit['BIC']
+        elif data['criterion'] == 'r2':
+            return 1 - crit['rsq_adj']
+
+    def new_row(step, crit, selected, cv_score=None):
+        row = {'Step': step, 'AIC': float(crit['AIC']), 'BIC': float(crit['BIC']),
+               'rsq_adj': float(crit['rsq_adj'])}
+        if use_cv:
+            row['cv_mse'] = float(cv_score)
+        row['Features'] = np.array([features[j] for j in selected])
+        return row
+
+    if data['direction'] == 'forward':
+
+        # start with only a constant in the model
+        selected = []
+        remaining = list(range(p))
+        crit = ols_criteria(tss, tss, n, 0)
+        best_score = float(cv_mse(selected)) if use_cv else float(score(crit))
+        step_rows = [{**new_row(0, crit, selected, best_score), 
+            'rsq_adj': 0.0, 'Features': []}]
+
+        istep = 0
+        while remaining:
+            # score every remaining candidate with a rank-one update of RSS
+            idx = np.array(remaining)
+            pivots = A[idx, idx]
+            ok = pivots > tol[idx]
+            for f in cv:
+                ok &= f['T'][idx, idx] > f['tol'][idx]
+            if not ok.any():
+                break
+            idx = idx[ok]
+            if use_cv:
+                scores = cv_mse(selected, idx)
+            else:
+                rss = A[p, p] - A[idx, p]**2 / A[idx, idx]
+                scores = score(ols_criteria(rss, tss, n, len(selected) + 1))
+            score_with_candidates = sorted(
+                zip(scores.tolist(), [features[j] for j in idx], idx.tolist()))
+            best_new_score, best_name, best_j = score_with_candidates[0]
+            if best_new_score < best_score:
+                best_score = best_new_score
+                sweep(A, best_j)
+                cv_sweep(best_j)
+                selected.append(best_j)
+                remaining.remove(best_j)
+                istep += 1
+                crit = ols_criteria(A[p, p], tss, n, len(selected))
+                # add new row to output dataframe
+                step_rows.append(new_row(istep, crit, selected, best_score))
+            else:
+                break
+
+    if data['direction'] == 'backward':
+
+        # start with all predictors swept into the model 
+        # (skip any column that is collinear with the previous columns)
+        selected = []
+        for j in range(p):
+            if A[j, j] > tol[j] and all(f['T'][j, j] > f['tol'][j] for f in cv):
+                sweep(A, j)
+                cv_sweep(j)
+                selected.append(j)
+        crit = ols_criteria(A[p, p], tss, n, len(selected))
+        step_rows = [new_row(0, crit, selected, cv_mse(selected) if use_cv else None)]
+        istep = 0
+
+    if data['direction'] == 'backward' and data['criterion'] != 'p_coef':
+
+        while selected:
+            idx = np.array(selected)
+            if use_cv:
+                best_score = float(cv_mse(selected))
+                scores = cv_mse(selected, idx)
+            else:
+                best_score = float(score(ols_criteria(A[p, p], tss, n, len(selected))))
+                # RSS after dropping each swept feature is RSS + beta**2 / inv_jj
+                rss = A[p, p] + A[idx, p]**2 / -A[idx, idx]
+                scores = score(ols_criteria(rss, tss, n, len(selected) - 1))
+            score_with_candidates = sorted(
+                zip(scores.tolist(), [features[j] for j in idx], idx.tolist()))
+            best_new_score, best_name, best_j = score_with_candidates[0]
+            if best_new_score < best_score:
+                sweep(A, best_j, reverse=True)
+                cv_sweep(best_j, reverse=True)
+                selected.remove(best_j)
+                istep += 1
+                crit = ols_criteria(A[p, p], tss, n, len(selected))
+                # add new row to output dataframe
+                step_rows.append(new_row(istep, crit, selected, best_new_score))
+            else:
+                break
+
+    if data['direction'] == 'backward' and data['criterion'] == 'p_coef':
+
+        # Backward selection to keep only features with p_coef <= p_threshold
+        while selected:
+            crit = ols_criteria(A[p, p], tss, n, len(selected))
+            step_rows.append(new_row(istep, crit, selected))
+            p_values = sweep_pvalues(A, selected, n)['pvalues']
+            i_worst = int(np.argmax(p_values))
+            istep += 1
+            if p_values[i_worst] > data['p_threshold']:
+                sweep(A, selected[i_worst], reverse=True)
+                del selected[i_worst]
+            else:
+                step_rows.append(new_row(istep, crit, selected))
+                break
+
+    selected_features = [features[j] for j in selected]
+
+    if data['drop_insig'] == 'on' and data['criterion'] != 'p_coef':
+
+        # Backward elimination of features with p > p_threshold
+        if selected_features:
+            selected_features, crit = sweep_drop_insig(gram, selected_features, 
+                data['p_threshold'], A=A)
+        if selected_features and use_cv:
+            # cross-validated MSE of the remaining features
+            for j in selected[::-1]:
+                if features[j] not in selected_features:
+                    cv_sweep(j, reverse=True)
+            selected = [features.index(f) for f in selected_features]
+            step_rows.append(new_row(istep+1, crit, selected, cv_mse(selected)))
+        elif selected_features:
+            step_rows.append({'Step': istep+1, 'AIC': float(crit['AIC']), 
+                'BIC': float(crit['BIC']), 'rsq_adj': float(crit['rsq_adj']),
+                'Features': np.array(selected_features)})
+
+    # output dataframe of the features and score at each step
+    step_features = pd.DataFrame(step_rows)
+
+    return selected_features, step_features
+
+def subset_score(rss, tss, n, k, criterion='AIC'):
+
+    """
+    PURPOSE
+    Score of OLS subsets from the residual sum of squares,
+    where lower is better for every criterion
+    USAGE
+    score = subset_score(rss, tss, n, k, criterion)
+    INPUT
+    rss = residual sum of squares (scalar or numpy array)
+    tss = total sum of squares about the mean of y
+    n = number of observations
+    k = number of features in the subset, not counting the constant
+    criterion = 'AIC' (default), 'BIC', or 'r2'
+    OUTPUT
+    score = AIC, BIC, or 1 - adjusted r-squared (same shape as rss)
+    """
+
+    crit = ols_criteria(rss, tss, n, k)
+    if criterion == 'AIC':
+        return crit['AIC']
+    elif criterion == 'BIC':
+        return crit['BIC']
+    elif criterion == 'r2':
+        return 1 - crit['rsq_adj']
+
+def shared_array(a):
+
+    """
+    PURPOSE
+    Copy a numpy array into shared memory once, so that worker processes
+    can read it by name instead of receiving a pickled copy with every task
+    USAGE
+    shm, spec = shared_array(a)
+    INPUT
+    a = numpy array
+    OUTPUT
+    shm = multiprocessing.shared_memory.SharedMemory block of the copy
+        (call shm.close() and shm.unlink() when the workers are done)
+    spec = tuple of (name, shape, dtype) to pass to attach_shared_array
+    """
+
+    import numpy as np
+    from multiprocessing import shared_memory
+
+    a = np.ascontiguousarray(a)
+    shm = shared_memory.SharedMemory(create=True, size=max(a.nbytes, 1))
+    b = np.ndarray(a.shape, dtype=a.dtype, buffer=shm.buf)
+    b[...] = a
+    del b
+    spec = (shm.name, a.shape, a.dtype.str)
+
+    return shm, spec
+
+def attach_shared_array(spec):
+
+    """
+    PURPOSE
+    Attach to a numpy array in shared memory made by shared_array
+    USAGE
+    shm, a = attach_shared_array(spec)
+    INPUT
+    spec = tuple of (name, shape, dtype) returned by shared_array
+    OUTPUT
+    shm = multiprocessing.shared_memory.SharedMemory block
+        (delete a and call shm.close() when done, but do not unlink)
+    a = numpy array that reads the shared memory without a copy
+    """
+
+    import numpy as np
+    from multiprocessing import shared_memory
+
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    a = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+    return shm, a
+
+def pool_size(n_jobs):
+
+    """
+    PURPOSE
+    Number of worker processes for n_jobs,
+    where n_jobs=-1 uses all cores and n_jobs=-2 all cores but one
+    USAGE
+    n_jobs = pool_size(n_jobs)
+    """
+
+    import os
+
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return max(1, n_jobs)
+
+def subset_bound_threshold(state):
+
+    """
+    PURPOSE
+    Score that a subset must beat to enter the nbest subsets of
+    the branch and bound search state used by subset_bound_search
+    """
+
+    import numpy as np
+
+    heap = state['heap']
+    threshold = np.inf if len(heap) < state['nbest'] else -heap[0][0]
+
+    return min(threshold, state['bound'])
+
+def subset_bound_search(A, forced, free, state, spawn=None, collinear=None):
+
+    """
+    PURPOSE
+    Recursive branch and bound search of best_subsets below one node
+    of the search tree, keeping the nbest subsets in state['heap']
+    USAGE
+    subset_bound_search(A, forced, free, state, spawn=None, collinear=None)
+    INPUT
+    A = cross-product matrix with the features in forced + free swept in
+        (the subset forced + free itself must already have been scored)
+    forced = list of features that are in every subset below this node
+    free = list of features that may be dropped below this node
+    state = dictionary of 'n', 'tss', 'criterion', 'nbest', 'heap',
+        'best_empty' (score of the constant-only model), 'bound'
+        (score that is already known to be beaten by nbest subsets),
+        and 'tol' (smallest pivot of each feature that is swept in)
+    spawn = optional function spawn(forced, free) that returns True if
+        it takes over the search below a child node (e.g. in another process)
+    collinear = optional list of the features of forced + free that are
+        not swept into A because they are collinear with the swept features
+        (see subset_sweep). The subset forced + free is then rank deficient
+        and is not scored, and only the full rank subsets below it are scored.
+    """
+
+    import numpy as np
+
+    p = A.shape[0] - 1
+    n = state['n']
+    tss = state['tss']
+    criterion = state['criterion']
+    if collinear:
+        # drop each free feature from the rank deficient subset
+        children = []
+        for j in free:
+            B, child_collinear = subset_sweep(A.copy(), j, list(collinear), 
+                state['tol'], reverse=True)
+            children.append((B, child_collinear))
+        drop_rss = np.array([B[p, p] for B, child_collinear in children])
+    else:
+        idx = np.array(free)
+        drop_rss = A[p, p] + A[idx, p]**2 / -A[idx, idx]
+    order = np.argsort(-drop_rss, kind='stable')
+    free = [free[i] for i in order]
+    drop_rss = drop_rss[order]
+    if collinear:
+        children = [children[i] for i in order]
+    m = len(free)
+    # score of each child subset (one feature dropped), and the lower bound
+    # of the score of every subset below each child
+    scores = subset_score(drop_rss, tss, n, len(forced) + m - 1, criterion).tolist()
+    bounds = subset_score(drop_rss, tss, n, len(forced) + np.arange(m), criterion).tolist()
+    for i in range(m):
+        if collinear and children[i][1]:
+            # the child subset is still rank deficient
+            continue
+        if scores[i] < subset_bound_threshold(state):
+            subset_bound_push(state, scores[i], forced + free[:i] + free[i+1:])
+    for i in range(m - 1):
+        if bounds[i] >= subset_bound_threshold(state):
+            continue
+        if spawn is not None and spawn(forced + free[:i], free[i+1:]):
+            continue
+        if collinear:
+            B, child_collinear = children[i]
+        else:
+            B = A.copy()
+            sweep(B, free[i], reverse=True)
+            child_collinear = None
+        subset_bound_search(B, forced + free[:i], free[i+1:], state, spawn, child_collinear)
+
+def subset_bound_push(state, score, subset):
+
+    """
+    PURPOSE
+    Add a scored subset to the nbest subsets of a branch and bound search state
+    """
+
+    if not subset:
+        # the constant-only model competes for the best model
+        # but is not listed in step_features
+        state['best_empty'] = min(state['best_empty'], score)
+        return
+    subset = tuple(sorted(subset))
+    topk_push(state['heap'], state['nbest'], score, subset, subset)
+
+def subset_bound_shard(spec, state, roots):
+
+    """
+    PURPOSE
+    Worker process of best_subsets with n_jobs > 1 that searches
+    below a list of nodes of the search tree
+    USAGE
+    heap, best_empty = subset_bound_shard(spec, state, roots)
+    INPUT
+    spec = shared memory spec of gram['A'] made by shared_array
+    state = search state of subset_bound_search (with an empty heap)
+    roots = list of (forced, free) nodes to search below
+    OUTPUT
+    heap = heap of the nbest subsets found below the nodes
+    best_empty = score of the constant-only model if it was reached
+    """
+
+    shm, A0 = attach_shared_array(spec)
+    try:
+        for forced, free in roots:
+            A = A0.copy()
+            collinear = []
+            for j in sorted(forced + free):
+                subset_sweep(A, j, collinear, state['tol'])
+            subset_bound_search(A, forced, free, state, collinear=collinear)
+    finally:
+        del A0
+        shm.close()
+
+    return state['heap'], state['best_empty']
+
+def best_subsets(gram, **kwargs):
+
+    """
+    PURPOSE
+    Best subsets of features of all possible subsets using a
+    leaps-and-bounds style branch and bound search with the sweep operator.
+    A branch of the search tree is skipped when the residual sum of squares
+    of its largest subset, combined with the penalty of its smallest subset,
+    can not beat the nbest-th best AIC, BIC, or adjusted r-squared found so far.
+    Every feature is searched, and only the subsets that are rank deficient
+    because of exactly collinear features are skipped.
+    USAGE
+    selected_features, step_features = best_subsets(gram, **kwargs)
+    INPUT
+    gram = output dictionary of gram_matrix(X, y)
+    **kwargs (optional keyword arguments):
+        criterion= 'AIC' (default), 'BIC', or 'r2'
+        nbest= number of best subsets to return in step_features (default 10)
+        n_jobs= number of worker processes (default 1, -1 uses all cores).
+            The top of the search tree is searched in this process, and the
+            branches below it are searched by a process pool that reads
+            gram['A'] from shared memory. The result does not depend on n_jobs.
+    OUTPUT
+    selected_features = list of the features of the best subset
+    step_features = dataframe of the nbest best subsets of features
+        sorted by the criterion (same format as model_output['step_features']
+        of stepwise with direction='all')
+    """
+
+    import numpy as np
+    import pandas as pd
+    from concurrent.futures import ProcessPoolExecutor
+
+    defaults = {
+        'criterion': 'AIC',
+        'nbest': 10,
+        'n_jobs': 1
+        }
+    data = {**defaults, **kwargs}
+    n_jobs = pool_size(data['n_jobs'])
+
+    A0 = gram['A']
+    A = A0.copy()
+    n = gram['n']
+    features = gram['features']
+    p = len(features)
+    tss = A[p, p]
+    tol = 1e-10 * np.maximum(np.diag(A)[:p], np.finfo(float).tiny)
+    nbest = data['nbest']
+
+    # sweep all features into the root of the search tree, except the features
+    # that are collinear with the previous features, so that only the rank
+    # deficient subsets are skipped (a feature with zero variance is in no
+    # full rank subset and is left out of the search)
+    full = []
+    collinear = []
+    for j in range(p):
+        if A0[j, j] > 0:
+            subset_sweep(A, j, collinear, tol)
+            full.append(j)
+
+    # search state with a bounded heap of the nbest subsets
+    state = {'n': n, 'tss': tss, 'criterion': data['criterion'], 'nbest': nbest,
+             'heap': [], 'best_empty': np.inf, 'bound': np.inf, 'tol': tol}
+    if not collinear:
+        subset_bound_push(state, float(subset_score(A[p, p], tss, n, len(full),
+            data['criterion'])), list(full))
+
+    if full and n_jobs == 1:
+        subset_bound_search(A, [], list(full), state, collinear=collinear)
+
+    elif full:
+        # search the top of the tree here and hand each branch
+        # with no more than m - split free features to the process pool
+        m = len(full)
+        split = m - min(m, int(np.ceil(np.log2(4 * n_jobs))) + 1)
+        roots = []
+        def spawn(forced, free):
+            if len(free) > split:
+                return False
+            roots.append((forced, free))
+            return True
+        subset_bound_search(A, [], list(full), state, spawn, collinear)
+        # deal the branches to 4 shards per worker from largest to smallest
+        nshards = min(len(roots), 4 * n_jobs)
+        shards = [[] for i in range(nshards)]
+        sizes = [0] * nshards
+        for forced, free in sorted(roots, key=lambda r: -len(r[1])):
+            i = sizes.index(min(sizes))
+            shards[i].append((forced, free))
+            sizes[i] += 2**len(free)
+        # every shard starts from the nbest-th best score of the top of the tree
+        shard_state = {**state, 'heap': [], 'bound': subset_bound_threshold(state)}
+        shm, spec = shared_array(A0)
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                futures = [executor.submit(subset_bound_shard, spec, shard_state, shard)
+                           for shard in shards]
+                for future in futures:
+                    heap, best_empty = future.result()
+                    for score, key, subset in heap:
+                        topk_push(state['heap'], nbest, -score, key, subset)
+                    state['best_empty'] = min(state['best_empty'], best_empty)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    # output dataframe of the nbest subsets sorted by criterion
+    # (refit each subset from gram['A'] so the table does not depend on
+    # the path of sweeps that reached it)
+    ranked = topk_sorted(state['heap'])
+    rows = []
+    for s, key, subset in ranked:
+        B = A0.copy()
+        for j in subset:
+            sweep(B, j)
+        crit = ols_criteria(B[p, p], tss, n, len(subset))
+        rows.append({'Rank': len(rows), 'AIC': float(crit['AIC']), 'BIC': float(crit['BIC']),
+                     'rsq_adj': float(crit['rsq_adj']),
+                     'Features': np.array([features[j] for j in subset])})
+    step_features = pd.DataFrame(rows, columns=['Rank', 'AIC', 'BIC', 'rsq_adj', 'Features'])
+
+    if ranked and ranked[0][0] < state['best_empty']:
+        selected_features = [features[j] for j in ranked[0][2]]
+    else:
+        selected_features = []
+
+    return selected_features, step_features
+
+def gray_walk(A0, n, cols, nlow, high=0, criterion='AIC', nbest=10, block=4096, tol=None):
+
+    """
+    PURPOSE
+    Gray-code walk of gray_subsets over the subsets of the first nlow
+    columns of cols, with the columns of cols[nlow:] that are set in the
+    bits of high swept into every subset
+    USAGE
+    best_scores, best_codes = gray_walk(A0, n, cols, nlow, high, criterion, nbest, block, tol)
+    INPUT
+    tol = None (default) if the columns of cols are linearly independent,
+        or numpy array of the smallest pivot of each feature, in which case
+        the rank deficient subsets are walked with subset_sweep and skipped
+    OUTPUT
+    best_scores = scores of the nbest subsets of the walk
+    best_codes = subsets of the nbest subsets as bit codes over cols
+        (the constant-only model with code 0 is never included)
+    """
+
+    import numpy as np
+
+    p = A0.shape[0] - 1
+    tss = A0[p, p]
+    nhigh = len(cols) - nlow
+    base = [cols[nlow + b] for b in range(nhigh) if high >> b & 1]
+    offset = high << nlow
+    A1 = A0.copy()
+    collinear1 = []
+    for j in base:
+        if tol is None:
+            sweep(A1, j)
+        else:
+            subset_sweep(A1, j, collinear1, tol)
+    nsubsets = 2**nlow
+
+    best_scores = np.array([])
+    best_codes = np.array([], dtype=np.int64)
+    if base and not collinear1:
+        # the subset of only the columns set in high
+        best_scores = np.atleast_1d(subset_score(A1[p, p], tss, n, len(base), criterion))
+        best_codes = np.array([offset], dtype=np.int64)
+    A = A1.copy()
+    collinear = list(collinear1)
+    code = 0
+    for start in range(1, nsubsets, block):
+        stop = min(start + block, nsubsets)
+        if start > 1:
+            # resync the swept matrix to limit the accumulation of round-off
+            A = A1.copy()
+            collinear = list(collinear1)
+            for b in range(nlow):
+                if code >> b & 1:
+                    if tol is None:
+                        sweep(A, cols[b])
+                    else:
+                        subset_sweep(A, cols[b], collinear, tol)
+        rss = np.empty(stop - start)
+        if tol is None:
+            for i in range(start, stop):
+                b = (i & -i).bit_length() - 1
+                sweep(A, cols[b], reverse=bool(code >> b & 1))
+                code ^= 1 << b
+                rss[i - start] = A[p, p]
+        else:
+            # the rank deficient subsets get an infinite residual sum of squares
+            for i in range(start, stop):
+                b = (i & -i).bit_length() - 1
+                subset_sweep(A, cols[b], collinear, tol, reverse=bool(code >> b & 1))
+                code ^= 1 << b
+                rss[i - start] = np.inf if collinear else A[p, p]
+        # Gray codes and number of features of the subsets of this block
+        i = np.arange(start, stop, dtype=np.int64)
+        codes = i ^ (i >> 1)
+        k = np.full(codes.shape, len(base), dtype=np.int64)
+        for b in range(nlow):
+            k += codes >> b & 1
+        scores = subset_score(rss, tss, n, k, criterion)
+        if tol is not None:
+            ok = np.isfinite(rss)
+            codes = codes[ok]
+            scores = scores[ok]
+        # keep the nbest subsets so far
+        best_scores = np.concatenate([best_scores, scores])
+        best_codes = np.concatenate([best_codes, codes | offset])
+        keep = np.lexsort((best_codes, best_scores))[:nbest]
+        best_scores = best_scores[keep]
+        best_codes = best_codes[keep]
+
+    return best_scores, best_codes
+
+def gray_walk_shard(spec, n, cols, nlow, high, criterion, nbest, block, tol=None):
+
+    """
+    PURPOSE
+    Worker process of gray_subsets with n_jobs > 1 that runs gray_walk
+    on gram['A'] in shared memory made by shared_array
+    """
+
+    shm, A0 = attach_shared_array(spec)
+    try:
+        result = gray_walk(A0, n, cols, nlow, high, criterion, nbest, block, tol)
+    finally:
+        del A0
+        shm.close()
+
+    return result
+
+def gray_subsets(gram, **kwargs):
+
+    """
+    PURPOSE
+    Best subsets of features by exhaustive evaluation of all possible subsets
+    walked in Gray-code order. Adjacent subsets differ by exactly one feature,
+    so each subset is scored after one sweep or reverse sweep of the
+    cross-product matrix instead of a full OLS fit.
+    USAGE
+    selected_features, step_features = gray_subsets(gram, **kwargs)
+    INPUT
+    gram = output dictionary of gram_matrix(X, y)
+    **kwargs (optional keyword arguments):
+        criterion= 'AIC' (default), 'BIC', or 'r2'
+        nbest= number of best subsets to return in step_features (default 10)
+        block= number of subsets scored together between resyncs of the
+            swept matrix against gram['A'] (default 4096)
+        n_jobs= number of worker processes (default 1, -1 uses all cores).
+            The subsets are split into equal shards by fixing the last
+            features, and each shard is walked by a process pool that reads
+            gram['A'] from shared memory. The result does not depend on n_jobs.
+    OUTPUT
+    selected_features = list of the features of the best subset
+    step_features = dataframe of the nbest best subsets of features
+        sorted by the criterion (same format as model_output['step_features']
+        of stepwise with direction='all')
+    """
+
+    import numpy as np
+    import pandas as pd
+    from concurrent.futures import ProcessPoolExecutor
+
+    defaults = {
+        'criterion': 'AIC',
+        'nbest': 10,
+        'block': 4096,
+        'n_jobs': 1
+        }
+    data = {**defaults, **kwargs}
+    n_jobs = pool_size(data['n_jobs'])
+
+    A0 = gram['A']
+    n = gram['n']
+    features = gram['features']
+    p = len(features)
+    tss = A0[p, p]
+    tol = 1e-10 * np.maximum(np.diag(A0)[:p], np.finfo(float).tiny)
+    nbest = data['nbest']
+
+    # walk every column with nonzero variance, and skip the rank deficient
+    # subsets only if some columns are collinear with the previous columns
+    A = A0.copy()
+    cols = []
+    collinear = []
+    for j in range(p):
+        if A0[j, j] > 0:
+            subset_sweep(A, j, collinear, tol)
+            cols.append(j)
+    m = len(cols)
+    walk_tol = tol if collinear else None
+    empty_score = float(subset_score(tss, tss, n, 0, data['criterion']))
+
+    if n_jobs == 1:
+        best_scores, best_codes = gray_walk(A0, n, cols, m, 0,
+            data['criterion'], nbest, data['block'], walk_tol)
+    else:
+        # one shard for each setting of the last nhigh columns
+        nhigh = min(m, int(np.ceil(np.log2(4 * n_jobs))))
+        shm, spec = shared_array(A0)
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                futures = [executor.submit(gray_walk_shard, spec, n, cols, m - nhigh,
+                    high, data['criterion'], nbest, data['block'], walk_tol)
+                    for high in range(2**nhigh)]
+                results = [future.result() for future in futures]
+        finally:
+            shm.close()
+            shm.unlink()
+        best_scores = np.concatenate([r[0] for r in results])
+        best_codes = np.concatenate([r[1] for r in results]).astype(np.int64)
+        keep = np.lexsort((best_codes, best_scores))[:nbest]
+        best_scores = best_scores[keep]
+        best_codes = best_codes[keep]
+
+    # output dataframe of the nbest subsets sorted by criterion
+    rows = []
+    subsets = []
+    for c in best_codes.tolist():
+        subset = [cols[b] for b in range(m) if c >> b & 1]
+        B = A0.copy()
+        for j in subset:
+            sweep(B, j)
+        crit = ols_criteria(B[p, p], tss, n, len(subset))
+        rows.append({'Rank': len(rows), 'AIC': float(crit['AIC']), 'BIC': float(crit['BIC']),
+                     'rsq_adj': float(crit['rsq_adj']),
+                     'Features': np.array([features[j] for j in subset])})
+        subsets.append(subset)
+    step_features = pd.DataFrame(rows, columns=['Rank', 'AIC', 'BIC', 'rsq_adj', 'Features'])
+
+    if rows and best_scores[0] < empty_score:
+        selected_features = [features[j] for j in subsets[0]]
+    else:
+        selected_features = []
+
+    return selected_features, step_features
+
+def ols_scores_shard(spec_X, spec_y, columns, subsets, criterion='AIC'):
+
+    """
+    PURPOSE
+    Worker process of stepwise with engine='statsmodels' and n_jobs > 1
+    that fits statsmodels OLS to a list of candidate subsets of the
+    columns of X in shared memory made by shared_array
+    USAGE
+    scores = ols_scores_shard(spec_X, spec_y, columns, subsets, criterion)
+    INPUT
+    spec_X, spec_y = shared memory specs of X and y made by shared_array
+    columns = list of the column names of X
+    subsets = list of the lists of column names of each candidate
+    criterion = 'AIC' (default), 'BIC', or 'r2'
+    OUTPUT
+    scores = list of AIC, BIC, or 1 - adjusted r-squared of each candidate
+    """
+
+    import statsmodels.api as sm
+    import pandas as pd
+
+    shm_X, X = attach_shared_array(spec_X)
+    shm_y, y = attach_shared_array(spec_y)
+    try:
+        scores = []
+        Xdf = pd.DataFrame(X, columns=columns, copy=False)
+        for subset in subsets:
+            model = sm.OLS(y, sm.add_constant(Xdf[list(subset)])).fit()
+            if criterion == 'AIC':
+                scores.append(float(model.aic))
+            elif criterion == 'BIC':
+                scores.append(float(model.bic))
+            elif criterion == 'r2':
+                scores.append(float(1-model.rsquared_adj))
+    finally:
+        del X, y
+        Xdf = model = None
+        shm_X.close()
+        shm_y.close()
+
+    return scores
+
+def ols_subsets_shard(spec_X, spec_y, columns, start, stop, criterion='AIC', nbest=10):
+
+    """
+    PURPOSE
+    Worker process of stepwise with direction='all', engine='statsmodels',
+    and n_jobs > 1 that fits statsmodels OLS to the subsets start to stop-1
+    of all possible subsets of the columns of X in shared memory
+    USAGE
+    heap, empty_score = ols_subsets_shard(spec_X, spec_y, columns, start, stop, criterion, nbest)
+    OUTPUT
+    heap = topk_push heap of the nbest rows of step_features of the shard,
+        using -i of subset i as the tie-breaker
+    empty_score = score of the constant-only model (None if start > 0)
+    """
+
+    import statsmodels.api as sm
+    import pandas as pd
+    import numpy as np
+    from itertools import combinations, chain, islice
+
+    shm_X, X = attach_shared_array(spec_X)
+    shm_y, y = attach_shared_array(spec_y)
+    try:
+        heap = []
+        empty_score = None
+        Xdf = pd.DataFrame(X, columns=columns, copy=False)
+        all_combinations = chain.from_iterable(
+            combinations(columns, n) for n in range(len(columns) + 1))
+        for i, combination in enumerate(islice(all_combinations, start, stop), start):
+            selected_features = list(map(str,combination))
+            model = sm.OLS(y, sm.add_constant(Xdf[selected_features])).fit()
+            if criterion == 'AIC':
+                score = model.aic
+            elif criterion == 'BIC':
+                score = model.bic
+            elif criterion == 'r2':
+                score = 1-model.rsquared_adj
+            if i == 0:
+                # the constant-only model is not listed in step_features
+                empty_score = float(score)
+                continue
+            new_row = {'Rank': i, 'AIC': float(model.aic), 'BIC': float(model.bic),
+                       'rsq_adj': float(model.rsquared_adj),
+                       'Features': np.array(selected_features)}
+            topk_push(heap, nbest, float(score), -i, new_row)
+    finally:
+        del X, y
+        Xdf = model = None
+        shm_X.close()
+        shm_y.close()
+
+    return heap, empty_score
+
+def ols_cache(maxsize=256):
+
+    """
+    PURPOSE
+    Empty bounded LRU cache of the statsmodels OLS fits of subsets of
+    features, shared by every phase of stepwise through cached_ols
+    USAGE
+    cache = ols_cache(maxsize=256)
+    INPUT
+    maxsize = maximum number of subsets kept in the cache (default 256)
+    OUTPUT
+    cache = dictionary of the following:
+        'fits': OrderedDict of the fitted quantities of each subset
+            keyed by the frozenset of its feature names, in LRU order
+        'maxsize': maximum number of subsets in 'fits'
+        'full': (features, results) of the last full statsmodels fit
+        'hits': number of fits served from the cache
+        'misses': number of fits that needed statsmodels OLS
+    """
+
+    from collections import OrderedDict
+
+    cache = {
+        'fits': OrderedDict(),
+        'maxsize': maxsize,
+        'full': None,
+        'hits': 0,
+        'misses': 0
+        }
+
+    return cache
+
+def cached_ols(cache, X, y, features, full=False):
+
+    """
+    PURPOSE
+    Fit statsmodels OLS of y on a constant and X[features], or reuse 
+    the fit of the same subset of features from an ols_cache
+    USAGE
+    model = cached_ols(cache, X, y, features, full=False)
+    INPUT
+    cache = output dictionary of ols_cache (modified in place)
+    X = dataframe of the candidate independent variables
+    y = series of the dependent variable
+    features = list of the names of the columns of X in the model
+    full = False (default) to return only the fitted quantities, or True to
+        return the statsmodels results object (e.g. for summary or predict)
+    OUTPUT
+    model = statsmodels OLS results if full=True, or otherwise a namespace of 
+        the params, bse, pvalues, llf, aic, bic, rsquared, and rsquared_adj
+        of the fit (the same as the attributes of the statsmodels results)
+    """
+
+    import statsmodels.api as sm
+    from types import SimpleNamespace
+
+    features = list(features)
+    key = frozenset(features)
+    fits = cache['fits']
+
+    if full and cache['full'] is not None and cache['full'][0] == features:
+        cache['hits'] += 1
+        return cache['full'][1]
+    if not full and key in fits:
+        cache['hits'] += 1
+        fits.move_to_end(key)
+        fit = fits[key]
+        if fit.features == features:
+            return fit
+        # same subset in another order
+        index = [c for c in fit.params.index if c not in key] + features
+        return SimpleNamespace(**{**vars(fit), 'features': features,
+            'params': fit.params.reindex(index), 'bse': fit.bse.reindex(index),
+            'pvalues': fit.pvalues.reindex(index)})
+
+    cache['misses'] += 1
+    model = sm.OLS(y, sm.add_constant(X[features])).fit()
+    fits[key] = SimpleNamespace(features=features, params=model.params, 
+        bse=model.bse, pvalues=model.pvalues, llf=model.llf, aic=model.aic, 
+        bic=model.bic, rsquared=model.rsquared, rsquared_adj=model.rsquared_adj)
+    fits.move_to_end(key)
+    while len(fits) > cache['maxsize']:
+        fits.popitem(last=False)
+    if full:
+        cache['full'] = (features, model)
+        return model
+
+    return fits[key]
+
+def stepwise(X, y, **kwargs):
+
+    """
+    Python function for stepwise linear regression to minimize AIC or BIC
+    and eliminate non-signficant predictors
+
+    by
+    Greg Pelletier
+    gjpelletier@gmail.com
+    17-May-2025
+
+    REQUIRED INPUTS (X and y should have same number of rows and 
+    only contain real numbers)
     X = dataframe of the candidate independent variables 
         (as many columns of data as needed)
     y = dataframe of the dependent variable (one column of data)
@@ -826,6 +3189,17 @@ def stepwise(X, y, **kwargs):
             'r2': use the adjusted r-squared to score the model
             'p_coef': use p-values of coefficients to select features
                 using p_coef  as criterion automatically uses backward direction
+            'cv_mse': use the k-fold cross-validated mean squared error
+                to score the model (forward or backward direction with
+                engine='sweep'), where the held-out error of each candidate
+                is computed from the cross-products of the folds
+        nfolds= number of folds for criterion='cv_mse' (default 5)
+        random_state= random seed of the shuffled folds for criterion='cv_mse'
+            (default 42)
+        cache_size= maximum number of subsets of features whose OLS fits
+            are kept in an LRU cache, so that a subset that is fitted again 
+            by a later step, by the removal of insignificant features, or 
+            for the final model is not refitted (default 256)
         verbose= 'on' (default) or 'off'
         direction= 'forward' (default), 'backward', or 'all' where
             'forward' (default): 
@@ -837,7 +3211,9 @@ def stepwise(X, y, **kwargs):
                 2) Remove the predictor that results in the lowest AIC
                 3) Keep removing predictors as long as it reduces AIC
             'all': find the best model of all possibe subsets of predictors
-                Note: 'all' requires no more than 20 columns in X
+                Note: 'all' requires no more than 50 columns in X with 
+                engine='sweep' (branch and bound search of the best subsets),
+                or no more than 20 columns with engine='statsmodels'
         standardize= True or False (default) where
             True: standardize X using sklearn.preprocessing StandardScaler
             False: do not standardize X (default)
@@ -846,6 +3222,29 @@ def stepwise(X, y, **kwargs):
             'off': keep all predictors regardless of p-value
         p_threshold= threshold p-value to eliminate predictors (default 0.05)                
         allow_dummies= True or False (default)                
+        engine= 'sweep' (default) or 'statsmodels' where
+            'sweep': score candidate models from the cross-product matrix
+                of X and y using the sweep operator (fast for wide X),
+                and use statsmodels OLS only to fit the final model
+                (direction='backward' uses 'statsmodels' instead if columns
+                of X are exactly collinear, unless criterion='cv_mse')
+            'statsmodels': refit statsmodels OLS for every candidate model
+        search= 'bound' (default) or 'gray' for direction='all' with engine='sweep'
+            'bound': branch and bound search that skips subsets 
+                that can not be among the best 10 subsets (<= 50 columns in X)
+            'gray': evaluate every subset, walking the subsets in Gray-code 
+                order so that each subset is one sweep away from the 
+                previous subset (<= 30 columns in X)
+        n_jobs= number of worker processes for direction='all' or 
+            engine='statsmodels' (default 1, -1 uses all cores). 
+            The subsets of 'all', or the candidates of each forward or 
+            backward step with engine='statsmodels', are split into shards 
+            that are fitted by a process pool reading X (or the cross-product 
+            matrix of X and y) from shared memory. The results are the same 
+            for any n_jobs. Forward and backward steps with engine='sweep' 
+            score every candidate at once and always use one process.
+            Scripts that use n_jobs > 1 on Windows or macOS need to call 
+            stepwise under if __name__ == '__main__':
 
     RETURNS
         model_object, model_output 
@@ -867,6 +3266,8 @@ def stepwise(X, y, **kwargs):
                 - 'vif': Variance Inlfation Factors of selected_features
                 - 'stats': Regression statistics for each model
                 - 'summary': statsmodels model.summary() of the best fitted model
+                - 'fit_cache': hits, misses, size, and maxsize of the LRU cache
+                    of the OLS fits of subsets of features (see cache_size)
 
     NOTE
     Do any necessary/optional cleaning of data before 
@@ -889,16 +3290,20 @@ def stepwise(X, y, **kwargs):
 
     """
 
-    from EasyMLR import detect_dummy_variables
+    from EasyMLR import detect_dummy_variables, gram_matrix, gram_folds, stepwise_sweep
+    from EasyMLR import best_subsets, gray_subsets, sweep_drop_insig, gram_collinear
+    from EasyMLR import topk_push, topk_sorted, pool_size, shared_array
+    from EasyMLR import ols_scores_shard, ols_subsets_shard, ols_cache, cached_ols
+    from concurrent.futures import ProcessPoolExecutor
     import statsmodels.api as sm
-    from itertools import combinations
+    from itertools import combinations, chain
     import pandas as pd
     import numpy as np
     import sys
     from sklearn.preprocessing import StandardScaler
     import time
     import matplotlib.pyplot as plt
-    from statsmodels.stats.outliers_influence import variance_inflation_factor
+    from EasyMLR import vif_closed_form
     from sklearn.metrics import PredictionErrorDisplay
     import warnings
     
@@ -910,7 +3315,13 @@ def stepwise(X, y, **kwargs):
         'standardize': False,
         'allow_dummies': False,
         'drop_insig': 'on',
-        'p_threshold': 0.05
+        'p_threshold': 0.05,
+        'engine': 'sweep',
+        'search': 'bound',
+        'n_jobs': 1,
+        'nfolds': 5,
+        'random_state': 42,
+        'cache_size': 256
         }
 
     # Update input data argumements with any provided keyword arguments in kwargs
@@ -926,29 +3337,53 @@ def stepwise(X, y, **kwargs):
         crit = 'BIC'
     elif data['criterion'] == 'r2':
         crit = 'rsq_adj'
+    elif data['criterion'] == 'cv_mse':
+        crit = 'cv_mse'
     if data['criterion'] == 'p_coef':
         data['direction'] = 'backward'
     
+    from EasyMLR import check_X_y
+    X, y = check_X_y(X,y)
+
     # check for input errors
     ctrl = detect_dummy_variables(X)
     if ctrl and not data['allow_dummies']:
         print('Check X: X appears to have dummy variables. Use allow_dummies=True, or use Lasso, Ridge, or ElasticNet','\n')
         sys.exit()
 
-    from EasyMLR import check_X_y
-    X, y = check_X_y(X,y)
+    if data['criterion'] == 'cv_mse':
+        ctrl = data['engine'] == 'sweep' and data['direction'] in ['forward', 'backward']
+        if not ctrl:
+            print("criterion='cv_mse' needs engine='sweep' and direction='forward' or 'backward'!",'\n')
+            sys.exit()
 
-    if data['direction'] == 'all':
+    if data['direction'] == 'all' and data['engine'] == 'statsmodels':
         ctrl = X.shape[1]<=20
         if not ctrl:
             print('X needs to have <= 20 columns to use all directions! Try forward or backward stepping instead!','\n')
             sys.exit()
+    if data['direction'] == 'all' and data['engine'] == 'sweep' and data['search'] == 'bound':
+        ctrl = X.shape[1]<=50
+        if not ctrl:
+            print('X needs to have <= 50 columns to use all directions! Try forward or backward stepping instead!','\n')
+            sys.exit()
+    if data['direction'] == 'all' and data['engine'] == 'sweep' and data['search'] == 'gray':
+        ctrl = X.shape[1]<=30
+        if not ctrl:
+            print("X needs to have <= 30 columns to use all directions with search='gray'! Try search='bound' instead!",'\n')
+            sys.exit()
 
     # Suppress warnings
     warnings.filterwarnings('ignore')
     
     # Set start time for calculating run time
-    if data['direction'] == 'all':
+    if data['direction'] == 'all' and data['engine'] == 'sweep' and data['search'] == 'gray':
+        print("Fitting models for all "+str(2**X.shape[1])+
+            " subsets of features in Gray-code order, please wait ...")
+    elif data['direction'] == 'all' and data['engine'] == 'sweep':
+        print("Searching all "+str(2**X.shape[1])+
+            " subsets of features by branch and bound, please wait ...")
+    elif data['direction'] == 'all':
         nsubsets = 2**X.shape[1]
         runtime = (nsubsets / (2**16)) * (120/60)   # guess runtime assuming 120 sec for 16 candidate features
         if X.shape[1] > 15:
@@ -977,355 +3412,370 @@ def stepwise(X, y, **kwargs):
         # Replace X with the standardized X for regression
         # X = X.copy()
         X = X_scaled.copy()
+
+    # The full model of a backward search is rank deficient if columns of X
+    # are exactly collinear, so use the statsmodels engine (pseudoinverse fits)
+    # to get the same model and step_features as engine='statsmodels'
+    gram = None
+    if (data['direction'] == 'backward' and data['engine'] == 'sweep'
+            and data['criterion'] != 'cv_mse'):
+        gram = gram_matrix(X, y)
+        collinear_features = gram_collinear(gram)
+        if collinear_features:
+            if data['verbose'] == 'on':
+                print('Features collinear with the previous features: ', collinear_features)
+                print("Using engine='statsmodels' for the backward search of a rank deficient X",'\n')
+            data['engine'] = 'statsmodels'
+
+    # LRU cache of the OLS fits of subsets of features shared by every phase
+    fit_cache = ols_cache(data['cache_size'])
+
+    # Option to fit the statsmodels candidates in a process pool 
+    # with X and y in shared memory
+    n_jobs = pool_size(data['n_jobs'])
+    executor = None
+    if data['engine'] == 'statsmodels' and n_jobs > 1:
+        columns = list(X.columns)
+        shm_X, spec_X = shared_array(X.to_numpy(dtype=float))
+        shm_y, spec_y = shared_array(np.asarray(y, dtype=float).ravel())
+        executor = ProcessPoolExecutor(max_workers=n_jobs)
+
+    try:
+        def pool_scores(subsets):
+            # fit the candidate subsets in one contiguous shard per worker
+            nshards = min(n_jobs, len(subsets))
+            bounds = np.linspace(0, len(subsets), nshards + 1).astype(int)
+            futures = [executor.submit(ols_scores_shard, spec_X, spec_y, columns, 
+                subsets[start:stop], data['criterion'])
+                for start, stop in zip(bounds[:-1], bounds[1:])]
+            return [score for future in futures for score in future.result()]
         
-    if data['direction'] == 'forward':
+        if data['direction'] in ['forward', 'backward'] and data['engine'] == 'sweep':
+
+            # Forward or backward selection using the sweep engine
+            if gram is None:
+                gram = gram_matrix(X, y)
+            if data['criterion'] == 'cv_mse':
+                folds = gram_folds(X, y, data['nfolds'], data['random_state'])
+            else:
+                folds = None
+            selected_features, step_features = stepwise_sweep(gram, 
+                criterion=data['criterion'], direction=data['direction'],
+                drop_insig=data['drop_insig'], p_threshold=p_threshold, folds=folds)
+            model = cached_ols(fit_cache, X, y, selected_features, full=True)
+
+            if data['verbose'] == 'on':
+                if data['drop_insig'] == 'on' or data['criterion'] == 'p_coef':
+                    when = 'after'
+                else:
+                    when = 'before'
+                print("Model skill and features at each step in model_outputs['step_features']:\n")
+                print(step_features.to_markdown(index=False))
+                print('\nFinal '+data['direction']+' model '+when+' removing insignficant features if any:')
+                print('Best features: ', selected_features,'\n')
+                print(model.summary())
 
-        # Forward selection to minimize AIC or BIC
-        selected_features = []
-        remaining_features = list(X.columns)
+        if data['direction'] == 'forward' and data['engine'] == 'statsmodels':
 
-        # best_score = float('inf')
+            # Forward selection to minimize AIC or BIC
+            selected_features = []
+            remaining_features = list(X.columns)
 
-        istep = 0
-        while remaining_features:
-            score_with_candidates = []        
+            # best_score = float('inf')
+
+            istep = 0
+            while remaining_features:
+                score_with_candidates = []        
             
-            # start with only a constant in the model
-            if istep == 0:
-                X_const = np.ones((len(y), 1))  # column of ones for the intercept
-                X_const = pd.DataFrame(X_const,columns=['constant'])
-                X_const.index = X.index
-                model = sm.OLS(y, X_const).fit()
-
-                # output dataframe of score at each step
-                step_features = {'Step': 0, 'AIC': model.aic, 'BIC': model.bic, 
-                    'rsq_adj': 0.0, 'Features': [[]]}
-                step_features = pd.DataFrame(step_features)
+                # start with only a constant in the model
+                if istep == 0:
+                    X_const = np.ones((len(y), 1))  # column of ones for the intercept
+                    X_const = pd.DataFrame(X_const,columns=['constant'])
+                    X_const.index = X.index
+                    model = sm.OLS(y, X_const).fit()
+
+                    # output dataframe of score at each step
+                    step_rows = [{'Step': 0, 'AIC': model.aic, 'BIC': model.bic, 
+                        'rsq_adj': 0.0, 'Features': []}]
                 
-                if data['criterion'] == 'AIC':
-                    candidate = ['']
-                    score_with_candidates.append((model.aic, candidate))
-                    best_score = model.aic
-                elif data['criterion'] == 'BIC':
-                    candidate = ['']
-                    score_with_candidates.append((model.bic, candidate))
-                    best_score = model.bic
-                elif data['criterion'] == 'r2':
-                    candidate = ['']
-                    score_with_candidates.append((1-model.rsquared_adj, candidate))
-                    best_score = 1-model.rsquared_adj
+                    if data['criterion'] == 'AIC':
+                        candidate = ['']
+                        score_with_candidates.append((model.aic, candidate))
+                        best_score = model.aic
+                    elif data['criterion'] == 'BIC':
+                        candidate = ['']
+                        score_with_candidates.append((model.bic, candidate))
+                        best_score = model.bic
+                    elif data['criterion'] == 'r2':
+                        candidate = ['']
+                        score_with_candidates.append((1-model.rsquared_adj, candidate))
+                        best_score = 1-model.rsquared_adj
                                        
-            for candidate in remaining_features:
-                model = sm.OLS(y, sm.add_constant(X[selected_features + [candidate]])).fit()
-                if data['criterion'] == 'AIC':
-                    score_with_candidates.append((model.aic, candidate))
-                elif data['criterion'] == 'BIC':
-                    score_with_candidates.append((model.bic, candidate))
-                elif data['criterion'] == 'r2':
-                    score_with_candidates.append((1-model.rsquared_adj, candidate))
-            score_with_candidates.sort()  # Sort by criterion
-            best_new_score, best_candidate = score_with_candidates[0]        
-            if best_new_score < best_score:
-                best_score = best_new_score
-                selected_features.append(best_candidate)
-                remaining_features.remove(best_candidate)
-                istep += 1
-                model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
+                if executor is not None:
+                    scores = pool_scores([selected_features + [candidate] 
+                        for candidate in remaining_features])
+                    score_with_candidates += list(zip(scores, remaining_features))
+                else:
+                    for candidate in remaining_features:
+                        model = cached_ols(fit_cache, X, y, selected_features + [candidate])
+                        if data['criterion'] == 'AIC':
+                            score_with_candidates.append((model.aic, candidate))
+                        elif data['criterion'] == 'BIC':
+                            score_with_candidates.append((model.bic, candidate))
+                        elif data['criterion'] == 'r2':
+                            score_with_candidates.append((1-model.rsquared_adj, candidate))
+                score_with_candidates.sort()  # Sort by criterion
+                best_new_score, best_candidate = score_with_candidates[0]        
+                if best_new_score < best_score:
+                    best_score = best_new_score
+                    selected_features.append(best_candidate)
+                    remaining_features.remove(best_candidate)
+                    istep += 1
+                    model = cached_ols(fit_cache, X, y, selected_features)
 
-                # add new row to output dataframe
-                new_row = {'Step': istep, 'AIC': model.aic, 'BIC': model.bic, 
-                           'rsq_adj': model.rsquared_adj, 
-                           'Features': np.array(selected_features)}
-                step_features = pd.concat([step_features, 
-                        pd.DataFrame([new_row])], ignore_index=True)
+                    # add new row to output dataframe
+                    new_row = {'Step': istep, 'AIC': model.aic, 'BIC': model.bic, 
+                               'rsq_adj': model.rsquared_adj, 
+                               'Features': np.array(selected_features)}
+                    step_rows.append(new_row)
                 
-                if data['criterion'] == 'AIC':
-                    score = model.aic
-                elif data['criterion'] == 'BIC':
-                    score = model.bic
-                elif data['criterion'] == 'r2':
-                    score = model.rsquared_adj
-                if (data['verbose'] == 'on' and
-                        (remaining_features == [] and data['drop_insig'] == 'off')):
-                    print("Model skill and features at each step in model_outputs['step_features']:\n")
-                    print(step_features.to_markdown(index=False))
-                    print('\nForward step '+str(istep)+", "+crit+"= {:.2f}".format(score))
-                    print('Features added: ', selected_features,'\n')
-                    print(model.summary())        
-
-            else:            
-                remaining_features.remove(best_candidate)
-                model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
+                    if data['criterion'] == 'AIC':
+                        score = model.aic
+                    elif data['criterion'] == 'BIC':
+                        score = model.bic
+                    elif data['criterion'] == 'r2':
+                        score = model.rsquared_adj
+                    if (data['verbose'] == 'on' and
+                            (remaining_features == [] and data['drop_insig'] == 'off')):
+                        print("Model skill and features at each step in model_outputs['step_features']:\n")
+                        print(pd.DataFrame(step_rows).to_markdown(index=False))
+                        print('\nForward step '+str(istep)+", "+crit+"= {:.2f}".format(score))
+                        print('Features added: ', selected_features,'\n')
+                        print(cached_ols(fit_cache, X, y, selected_features, full=True).summary())        
+
+                else:            
+                    remaining_features.remove(best_candidate)
+                    model = cached_ols(fit_cache, X, y, selected_features)
                                 
-                if (data['verbose'] == 'on' and 
-                        (remaining_features != [] and data['drop_insig'] == 'off')):
-                    print("Model skill and features at each step in model_outputs['step_features']:\n")
-                    print(step_features.to_markdown(index=False))
-                    print('\nFinal forward model before removing insignficant features if any:')
-                    print('Best features: ', selected_features,'\n')
-                    print(model.summary())
-                break            
+                    if (data['verbose'] == 'on' and 
+                            (remaining_features != [] and data['drop_insig'] == 'off')):
+                        print("Model skill and features at each step in model_outputs['step_features']:\n")
+                        print(pd.DataFrame(step_rows).to_markdown(index=False))
+                        print('\nFinal forward model before removing insignficant features if any:')
+                        print('Best features: ', selected_features,'\n')
+                        print(cached_ols(fit_cache, X, y, selected_features, full=True).summary())
+                    break            
 
-        if data['drop_insig'] == 'on':
+            if data['drop_insig'] == 'on':
     
-            # Backward elimination of features with p < p_threshold
-            while selected_features:
+                # Backward elimination of features with p < p_threshold
+                while selected_features:
     
-                # Backward elimination of non-signficant predictors
-                model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
-                p_values = model.pvalues.iloc[1:]  # Ignore intercept
-                max_p_value = p_values.max()
+                    # Backward elimination of non-signficant predictors
+                    model = cached_ols(fit_cache, X, y, selected_features)
+                    p_values = model.pvalues.iloc[1:]  # Ignore intercept
+                    max_p_value = p_values.max()
         
-                if max_p_value > p_threshold:
-                    worst_feature = p_values.idxmax()
-                    selected_features.remove(worst_feature)
-                else:
+                    if max_p_value > p_threshold:
+                        worst_feature = p_values.idxmax()
+                        selected_features.remove(worst_feature)
+                    else:
                     
-                    # add new row to output dataframe
-                    new_row = {'Step': istep+1, 'AIC': model.aic, 'BIC': model.bic, 
-                               'rsq_adj': model.rsquared_adj, 
-                               'Features': np.array(selected_features)}
-                    step_features = pd.concat([step_features, 
-                            pd.DataFrame([new_row])], ignore_index=True)
-
-                    if data['verbose'] == 'on':
-                        print("Model skill and features at each step in model_outputs['step_features']:\n")
-                        print(step_features.to_markdown(index=False))
-                        print('\nFinal forward model after removing insignficant features if any:')
-                        print('Best features: ', selected_features,'\n')
-                        print(model.summary())
-                    break
-    
-    if data['direction'] == 'backward' and data['criterion'] != 'p_coef':
-
-        # Backward selection to minimize AIC or BIC
-        selected_features = list(X.columns)
-        remaining_features = []
-        istep = 0
-        while len(selected_features) > 0:
-            score_with_candidates = []        
-            model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
-
-            # start output dataframe of score at each step
-            if istep == 0:
-                step_features = {'Step': 0, 'AIC': model.aic, 'BIC': model.bic, 
-                    'rsq_adj': model.rsquared_adj, 'Features': [np.array(selected_features)]}
-                step_features = pd.DataFrame(step_features)
+                        # add new row to output dataframe
+                        new_row = {'Step': istep+1, 'AIC': model.aic, 'BIC': model.bic, 
+                                   'rsq_adj': model.rsquared_adj, 
+                                   'Features': np.array(selected_features)}
+                        step_rows.append(new_row)
+
+                        if data['verbose'] == 'on':
+                            print("Model skill and features at each step in model_outputs['step_features']:\n")
+                            print(pd.DataFrame(step_rows).to_markdown(index=False))
+                            print('\nFinal forward model after removing insignficant features if any:')
+                            print('Best features: ', selected_features,'\n')
+                            print(cached_ols(fit_cache, X, y, selected_features, full=True).summary())
+                        break
+    
+        if (data['direction'] == 'backward' and data['criterion'] != 'p_coef' 
+                and data['engine'] == 'statsmodels'):
+
+            # Backward selection to minimize AIC or BIC
+            selected_features = list(X.columns)
+            remaining_features = []
+            istep = 0
+            while len(selected_features) > 0:
+                score_with_candidates = []        
+                model = cached_ols(fit_cache, X, y, selected_features)
+
+                # start output dataframe of score at each step
+                if istep == 0:
+                    step_rows = [{'Step': 0, 'AIC': model.aic, 'BIC': model.bic, 
+                        'rsq_adj': model.rsquared_adj, 'Features': np.array(selected_features)}]
             
-            if data['criterion'] == 'AIC':
-                best_score = model.aic
-            elif data['criterion'] == 'BIC':
-                best_score = model.bic
-            elif data['criterion'] == 'r2':
-                best_score = 1-model.rsquared_adj
-            # for candidate in remaining_features:
-            for candidate in selected_features:
-                # model = sm.OLS(y, sm.add_constant(X[selected_features - [candidate]])).fit()
-                test_features = selected_features.copy()
-                test_features.remove(candidate)
-                model = sm.OLS(y, sm.add_constant(X[test_features])).fit()
                 if data['criterion'] == 'AIC':
-                    score_with_candidates.append((model.aic, candidate))
+                    best_score = model.aic
                 elif data['criterion'] == 'BIC':
-                    score_with_candidates.append((model.bic, candidate))
+                    best_score = model.bic
                 elif data['criterion'] == 'r2':
-                    score_with_candidates.append((1-model.rsquared_adj, candidate))
-            score_with_candidates.sort()  # Sort by criterion
-            best_new_score, best_candidate = score_with_candidates[0]        
-            if best_new_score < best_score:
-                best_score = best_new_score
-                remaining_features.append(best_candidate)
-                selected_features.remove(best_candidate)
-                istep += 1
-                model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
+                    best_score = 1-model.rsquared_adj
+                if executor is not None:
+                    scores = pool_scores([[f for f in selected_features if f != candidate] 
+                        for candidate in selected_features])
+                    score_with_candidates += list(zip(scores, selected_features))
+                else:
+                    # for candidate in remaining_features:
+                    for candidate in selected_features:
+                        # model = sm.OLS(y, sm.add_constant(X[selected_features - [candidate]])).fit()
+                        test_features = selected_features.copy()
+                        test_features.remove(candidate)
+                        model = cached_ols(fit_cache, X, y, test_features)
+                        if data['criterion'] == 'AIC':
+                            score_with_candidates.append((model.aic, candidate))
+                        elif data['criterion'] == 'BIC':
+                            score_with_candidates.append((model.bic, candidate))
+                        elif data['criterion'] == 'r2':
+                            score_with_candidates.append((1-model.rsquared_adj, candidate))
+                score_with_candidates.sort()  # Sort by criterion
+                best_new_score, best_candidate = score_with_candidates[0]        
+                if best_new_score < best_score:
+                    best_score = best_new_score
+                    remaining_features.append(best_candidate)
+                    selected_features.remove(best_candidate)
+                    istep += 1
+                    model = cached_ols(fit_cache, X, y, selected_features)
 
-                # add new row to output dataframe
-                new_row = {'Step': istep, 'AIC': model.aic, 'BIC': model.bic, 
-                           'rsq_adj': model.rsquared_adj, 
-                           'Features': np.array(selected_features)}
-                step_features = pd.concat([step_features, 
-                        pd.DataFrame([new_row])], ignore_index=True)
+                    # add new row to output dataframe
+                    new_row = {'Step': istep, 'AIC': model.aic, 'BIC': model.bic, 
+                               'rsq_adj': model.rsquared_adj, 
+                               'Features': np.array(selected_features)}
+                    step_rows.append(new_row)
                             
-                if data['criterion'] == 'AIC':
-                    score = model.aic
-                elif data['criterion'] == 'BIC':
-                    score = model.bic
-                elif data['criterion'] == 'r2':
-                    score = model.rsquared_adj
-                if (data['verbose'] == 'on' and
-                        (selected_features == [] and data['drop_insig'] == 'off')):
-                    print("Model skill and features at each step in model_outputs['step_features']:\n")
-                    print(step_features.to_markdown(index=False))
-                    print('\nBacksard step '+str(istep)+", "+crit+"= {:.2f}".format(score))
-                    print('Features added: ', selected_features,'\n')
-                    print(model.summary())        
+                    if data['criterion'] == 'AIC':
+                        score = model.aic
+                    elif data['criterion'] == 'BIC':
+                        score = model.bic
+                    elif data['criterion'] == 'r2':
+                        score = model.rsquared_adj
+                    if (data['verbose'] == 'on' and
+                            (selected_features == [] and data['drop_insig'] == 'off')):
+                        print("Model skill and features at each step in model_outputs['step_features']:\n")
+                        print(pd.DataFrame(step_rows).to_markdown(index=False))
+                        print('\nBacksard step '+str(istep)+", "+crit+"= {:.2f}".format(score))
+                        print('Features added: ', selected_features,'\n')
+                        print(cached_ols(fit_cache, X, y, selected_features, full=True).summary())        
 
-            else:            
-                model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
+                else:            
+                    model = cached_ols(fit_cache, X, y, selected_features)
                
-                if data['verbose'] == 'on' and data['drop_insig'] == 'off':
-                    print("Model skill and features at each step in model_outputs['step_features']:\n")
-                    print(step_features.to_markdown(index=False))
-                    print('\nFinal backward model before removing insignficant features if any:')
-                    print('Best features: ', selected_features,'\n')
-                    print(model.summary())
-                break            
+                    if data['verbose'] == 'on' and data['drop_insig'] == 'off':
+                        print("Model skill and features at each step in model_outputs['step_features']:\n")
+                        print(pd.DataFrame(step_rows).to_markdown(index=False))
+                        print('\nFinal backward model before removing insignficant features if any:')
+                        print('Best features: ', selected_features,'\n')
+                        print(cached_ols(fit_cache, X, y, selected_features, full=True).summary())
+                    break            
+
+            if data['drop_insig'] == 'on':
+    
+                while selected_features:
+                    # Backward elimination of non-signficant predictors
+                    model = cached_ols(fit_cache, X, y, selected_features)
+                    p_values = model.pvalues.iloc[1:]  # Ignore intercept
+                    max_p_value = p_values.max()
+                    if max_p_value > p_threshold:
+                        worst_feature = p_values.idxmax()
+                        selected_features.remove(worst_feature)
+                    else:
+                        model = cached_ols(fit_cache, X, y, selected_features)
+
+                        # add new row to output dataframe
+                        new_row = {'Step': istep+1, 'AIC': model.aic, 'BIC': model.bic, 
+                                   'rsq_adj': model.rsquared_adj, 
+                                   'Features': np.array(selected_features)}
+                        step_rows.append(new_row)
+                    
+                        print("Model skill and features at each step in model_outputs['step_features']:\n")
+                        # print(model_outputs['step_features'].to_markdown(index=False))
+                        print(pd.DataFrame(step_rows).to_markdown(index=False))
+                        print('\nFinal backward model after removing insignficant features if any:')
+                        print('Best features: ', selected_features,'\n')
+                        print(cached_ols(fit_cache, X, y, selected_features, full=True).summary())
+                        break
 
-        if data['drop_insig'] == 'on':
-    
+        if (data['direction'] == 'backward' and data['criterion'] == 'p_coef' 
+                and data['engine'] == 'statsmodels'):
+
+            # Backward selection to keep only features with p_coef <= p_threshold
+            selected_features = list(X.columns)
+            remaining_features = []
+            istep = 0
             while selected_features:
                 # Backward elimination of non-signficant predictors
-                model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
+                model = cached_ols(fit_cache, X, y, selected_features)
+
+                # start output dataframe of score at each step
+                if istep == 0:
+                    step_rows = [{'Step': 0, 'AIC': model.aic, 'BIC': model.bic, 
+                        'rsq_adj': model.rsquared_adj, 'Features': np.array(selected_features)}]
+                    new_row = {'Step': istep, 'AIC': model.aic, 'BIC': model.bic, 
+                               'rsq_adj': model.rsquared_adj, 
+                               'Features': np.array(selected_features)}
+                    step_rows.append(new_row)
+                else:
+                    new_row = {'Step': istep, 'AIC': model.aic, 'BIC': model.bic, 
+                               'rsq_adj': model.rsquared_adj, 
+                               'Features': np.array(selected_features)}
+                    step_rows.append(new_row)
+                
                 p_values = model.pvalues.iloc[1:]  # Ignore intercept
                 max_p_value = p_values.max()
+                istep += 1
                 if max_p_value > p_threshold:
                     worst_feature = p_values.idxmax()
                     selected_features.remove(worst_feature)
                 else:
-                    model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
+                    model = cached_ols(fit_cache, X, y, selected_features)
 
                     # add new row to output dataframe
-                    new_row = {'Step': istep+1, 'AIC': model.aic, 'BIC': model.bic, 
+                    new_row = {'Step': istep, 'AIC': model.aic, 'BIC': model.bic, 
                                'rsq_adj': model.rsquared_adj, 
                                'Features': np.array(selected_features)}
-                    step_features = pd.concat([step_features, 
-                            pd.DataFrame([new_row])], ignore_index=True)
-                    
+                    step_rows.append(new_row)
+                
                     print("Model skill and features at each step in model_outputs['step_features']:\n")
-                    # print(model_outputs['step_features'].to_markdown(index=False))
-                    print(step_features.to_markdown(index=False))
+                    print(pd.DataFrame(step_rows).to_markdown(index=False))
                     print('\nFinal backward model after removing insignficant features if any:')
                     print('Best features: ', selected_features,'\n')
-                    print(model.summary())
+                    print(cached_ols(fit_cache, X, y, selected_features, full=True).summary())
                     break
 
-    if data['direction'] == 'backward' and data['criterion'] == 'p_coef':
-
-        # Backward selection to keep only features with p_coef <= p_threshold
-        selected_features = list(X.columns)
-        remaining_features = []
-        istep = 0
-        while selected_features:
-            # Backward elimination of non-signficant predictors
-            model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
-
-            # start output dataframe of score at each step
-            if istep == 0:
-                step_features = {'Step': 0, 'AIC': model.aic, 'BIC': model.bic, 
-                    'rsq_adj': model.rsquared_adj, 'Features': [np.array(selected_features)]}
-                step_features = pd.DataFrame(step_features)
-                new_row = {'Step': istep, 'AIC': model.aic, 'BIC': model.bic, 
-                           'rsq_adj': model.rsquared_adj, 
-                           'Features': np.array(selected_features)}
-                step_features = pd.concat([step_features, 
-                        pd.DataFrame([new_row])], ignore_index=True)
-            else:
-                new_row = {'Step': istep, 'AIC': model.aic, 'BIC': model.bic, 
-                           'rsq_adj': model.rsquared_adj, 
-                           'Features': np.array(selected_features)}
-                step_features = pd.concat([step_features, 
-                        pd.DataFrame([new_row])], ignore_index=True)
-                
-            p_values = model.pvalues.iloc[1:]  # Ignore intercept
-            max_p_value = p_values.max()
-            istep += 1
-            if max_p_value > p_threshold:
-                worst_feature = p_values.idxmax()
-                selected_features.remove(worst_feature)
-            else:
-                model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
-
-                # add new row to output dataframe
-                new_row = {'Step': istep, 'AIC': model.aic, 'BIC': model.bic, 
-                           'rsq_adj': model.rsquared_adj, 
-                           'Features': np.array(selected_features)}
-                step_features = pd.concat([step_features, 
-                        pd.DataFrame([new_row])], ignore_index=True)
-                
-                print("Model skill and features at each step in model_outputs['step_features']:\n")
-                print(step_features.to_markdown(index=False))
-                print('\nFinal backward model after removing insignficant features if any:')
-                print('Best features: ', selected_features,'\n')
-                print(model.summary())
-                break
-        
-    if data['direction'] == 'all':
+        if data['direction'] in ['forward', 'backward'] and data['engine'] == 'statsmodels':
+            # output dataframe of the features and score at each step
+            step_features = pd.DataFrame(step_rows)
 
-        # make a list of lists of all possible combinations of features
-        list_combinations = []
-        for n in range(len(list(X.columns)) + 1):
-            list_combinations += list(combinations(list(X.columns), n))
+        if data['direction'] == 'all' and data['engine'] == 'sweep':
 
-        # loop through all possible combinations and sort by AIC or BIC of each combination
-        score_with_candidates = []        
-        for i in range(len(list_combinations)):
-            selected_features = list(map(str,list_combinations[i]))
-            model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
-
-            if i == 0:
-                # output dataframe of score at each step
-                step_features = {'Rank': i, 'AIC': model.aic, 'BIC': model.bic, 
-                    'rsq_adj': model.rsquared_adj, 'Features': selected_features}
-                step_features = pd.DataFrame(step_features)
+            # branch and bound or exhaustive Gray-code search of the best subsets 
+            # using the sweep engine
+            gram = gram_matrix(X, y)
+            if data['search'] == 'gray':
+                selected_features, step_features = gray_subsets(gram, 
+                    criterion=data['criterion'], nbest=10, n_jobs=n_jobs)
             else:
-                # add new row to output dataframe
-                new_row = {'Rank': i, 'AIC': model.aic, 'BIC': model.bic, 
-                           'rsq_adj': model.rsquared_adj, 
-                           'Features': np.array(selected_features)}
-                step_features = pd.concat([step_features, 
-                        pd.DataFrame([new_row])], ignore_index=True)
-                            
-            if data['criterion'] == 'AIC':
-                score_with_candidates.append((model.aic, selected_features))
-            elif data['criterion'] == 'BIC':
-                score_with_candidates.append((model.bic, selected_features))
-            elif data['criterion'] == 'r2':
-                score_with_candidates.append((1-model.rsquared_adj, selected_features))
-        score_with_candidates.sort()  # Sort by criterion
-        best_score, selected_features = score_with_candidates[0]        
-        model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
-
-        if data['drop_insig'] == 'off':            
-            # sort step_features by criterion
-            if data['criterion'] == 'AIC':
-                step_features = step_features.sort_values(by='AIC')
-            elif data['criterion'] == 'BIC':
-                step_features = step_features.sort_values(by='BIC')            
-            elif data['criterion'] == 'r2':
-                step_features = step_features.sort_values(by='rsq_adj', ascending=False)            
-            ranks = np.arange(0, step_features.shape[0])
-            step_features['Rank'] = ranks        
-            # save best 10 subsets of features in step_features
-            nhead = min(step_features.shape[0],10)
-            step_features = step_features.head(nhead)
-        
-        if data['verbose'] == 'on' and data['drop_insig'] == 'off':            
-            print("Best "+str(nhead)+" subsets of features in model_outputs['step_features']:\n")
-            print(step_features.head(nhead).to_markdown(index=False))
-            print('\nBest of all possible models before removing insignficant features if any:')
-            print('Best features: ', selected_features,'\n')
-            print(model.summary())
- 
-        if data['drop_insig'] == 'on':
-    
-            while selected_features:
-                # Backward elimination of non-signficant predictors
-                model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
-                p_values = model.pvalues.iloc[1:]  # Ignore intercept
-                max_p_value = p_values.max()
-                if max_p_value > p_threshold:
-                    worst_feature = p_values.idxmax()
-                    selected_features.remove(worst_feature)
-                else:
-                    model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
-
+                selected_features, step_features = best_subsets(gram, 
+                    criterion=data['criterion'], nbest=10, n_jobs=n_jobs)
+            nhead = step_features.shape[0]
+            model = cached_ols(fit_cache, X, y, selected_features, full=True)
+
+            if data['drop_insig'] == 'on' and selected_features:
+                selected_features, crit = sweep_drop_insig(gram, selected_features, p_threshold)
+                model = cached_ols(fit_cache, X, y, selected_features, full=True)
+                if selected_features:
                     # add new row to output dataframe
-                    new_row = {'Rank': i+1, 'AIC': model.aic, 'BIC': model.bic, 
-                               'rsq_adj': model.rsquared_adj, 
+                    new_row = {'Rank': nhead, 'AIC': float(crit['AIC']), 'BIC': float(crit['BIC']), 
+                               'rsq_adj': float(crit['rsq_adj']), 
                                'Features': np.array(selected_features)}
                     step_features = pd.concat([step_features, 
                             pd.DataFrame([new_row])], ignore_index=True)
-
                     # sort step_features by criterion
                     if data['criterion'] == 'AIC':
                         step_features = step_features.sort_values(by='AIC')
@@ -1338,22 +3788,131 @@ def stepwise(X, y, **kwargs):
                     # save best 10 subsets of features in step_features
                     nhead = min(step_features.shape[0],10)
                     step_features = step_features.head(nhead)
+
+            if data['verbose'] == 'on':
+                if data['drop_insig'] == 'on':
+                    when = 'after'
+                else:
+                    when = 'before'
+                print("Best "+str(nhead)+" subsets of features in model_outputs['step_features']:\n")
+                print(step_features.head(nhead).to_markdown(index=False))
+                print('\nBest of all possible models '+when+' removing insignficant features if any:')
+                print('Best features: ', selected_features,'\n')
+                print(model.summary())
+
+        if data['direction'] == 'all' and data['engine'] == 'statsmodels':
+
+            # loop through all possible combinations of features and keep 
+            # the best 10 subsets by AIC, BIC, or adjusted r-squared in a bounded heap
+            all_combinations = chain.from_iterable(
+                combinations(list(X.columns), n) for n in range(X.shape[1] + 1))
+            heap = []
+            if executor is not None:
+                # fit contiguous shards of the subsets in the process pool
+                # and merge the best 10 subsets of each shard
+                nsubsets = 2**X.shape[1]
+                bounds = np.linspace(0, nsubsets, min(4 * n_jobs, nsubsets) + 1).astype(int)
+                futures = [executor.submit(ols_subsets_shard, spec_X, spec_y, columns, 
+                    start, stop, data['criterion'], 10)
+                    for start, stop in zip(bounds[:-1], bounds[1:])]
+                for future in futures:
+                    shard_heap, shard_empty = future.result()
+                    if shard_empty is not None:
+                        empty_score = shard_empty
+                    for score, key, new_row in shard_heap:
+                        topk_push(heap, 10, -score, key, new_row)
+                i = nsubsets - 1
+            else:
+                for i, combination in enumerate(all_combinations):
+                    selected_features = list(map(str,combination))
+                    model = sm.OLS(y, sm.add_constant(X[selected_features])).fit()
+                    if data['criterion'] == 'AIC':
+                        score = model.aic
+                    elif data['criterion'] == 'BIC':
+                        score = model.bic
+                    elif data['criterion'] == 'r2':
+                        score = 1-model.rsquared_adj
+                    if i == 0:
+                        # the constant-only model is not listed in step_features
+                        empty_score = score
+                        continue
+                    new_row = {'Rank': i, 'AIC': model.aic, 'BIC': model.bic, 
+                               'rsq_adj': model.rsquared_adj, 
+                               'Features': np.array(selected_features)}
+                    topk_push(heap, 10, score, -i, new_row)
+            ranked = topk_sorted(heap)
+            if ranked and ranked[0][0] < empty_score:
+                selected_features = ranked[0][2]['Features'].tolist()
+            else:
+                selected_features = []
+            model = cached_ols(fit_cache, X, y, selected_features, full=True)
+
+            # output dataframe of the best 10 subsets sorted by criterion
+            step_features = pd.DataFrame([row for score, key, row in ranked])
+            step_features['Rank'] = np.arange(0, step_features.shape[0])
+            nhead = step_features.shape[0]
+        
+            if data['verbose'] == 'on' and data['drop_insig'] == 'off':            
+                print("Best "+str(nhead)+" subsets of features in model_outputs['step_features']:\n")
+                print(step_features.head(nhead).to_markdown(index=False))
+                print('\nBest of all possible models before removing insignficant features if any:')
+                print('Best features: ', selected_features,'\n')
+                print(model.summary())
+ 
+            if data['drop_insig'] == 'on':
+    
+                while selected_features:
+                    # Backward elimination of non-signficant predictors
+                    model = cached_ols(fit_cache, X, y, selected_features)
+                    p_values = model.pvalues.iloc[1:]  # Ignore intercept
+                    max_p_value = p_values.max()
+                    if max_p_value > p_threshold:
+                        worst_feature = p_values.idxmax()
+                        selected_features.remove(worst_feature)
+                    else:
+                        model = cached_ols(fit_cache, X, y, selected_features)
+
+                        # add new row to the best 10 subsets
+                        new_row = {'Rank': i+1, 'AIC': model.aic, 'BIC': model.bic, 
+                                   'rsq_adj': model.rsquared_adj, 
+                                   'Features': np.array(selected_features)}
+                        if data['criterion'] == 'AIC':
+                            score = model.aic
+                        elif data['criterion'] == 'BIC':
+                            score = model.bic
+                        elif data['criterion'] == 'r2':
+                            score = 1-model.rsquared_adj
+                        topk_push(heap, 10, score, -(i+1), new_row)
+                        step_features = pd.DataFrame([row for score, key, row in topk_sorted(heap)])
+                        step_features['Rank'] = np.arange(0, step_features.shape[0])
+                        nhead = step_features.shape[0]
                     
-                    if data['verbose'] == 'on':
-                        print("Best "+str(nhead)+" subsets of features in model_outputs['step_features']:\n")
-                        print(step_features.head(nhead).to_markdown(index=False))
-                        print('\nBest of all possible models after removing insignficant features if any:')
-                        print('Best features: ', selected_features,'\n')
-                        print(model.summary())
-                    break
+                        if data['verbose'] == 'on':
+                            print("Best "+str(nhead)+" subsets of features in model_outputs['step_features']:\n")
+                            print(step_features.head(nhead).to_markdown(index=False))
+                            print('\nBest of all possible models after removing insignficant features if any:')
+                            print('Best features: ', selected_features,'\n')
+                            print(cached_ols(fit_cache, X, y, selected_features, full=True).summary())
+                        break
+    finally:
+        # release the process pool and the shared memory also on an 
+        # exception or interrupt
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+            shm_X.close()
+            shm_X.unlink()
+            shm_y.close()
+            shm_y.unlink()
+
+    # statsmodels results of the final model
+    model = cached_ols(fit_cache, X, y, selected_features, full=True)
             
     # Variance Inflation Factors of selected_features
     # Add a constant for the intercept
     X_ = sm.add_constant(X[selected_features])    
     vif = pd.DataFrame()
     vif['Feature'] = X_.columns
-    vif["VIF"] = [variance_inflation_factor(X_.values, i)
-                        for i in range(len(X_.columns))]
+    vif["VIF"] = vif_closed_form(X_)
     vif.set_index('Feature',inplace=True)
     if data['verbose'] == 'on':
         print("\nVariance Inflation Factors of selected_features:")
@@ -1394,6 +3953,9 @@ def stepwise(X, y, **kwargs):
     
     model_output['pcov'] = pcov
     model_output['vif'] = vif
+    model_output['fit_cache'] = {'hits': fit_cache['hits'], 
+        'misses': fit_cache['misses'], 'size': len(fit_cache['fits']),
+        'maxsize': fit_cache['maxsize']}
 
     # Summary statitistics
     list_name = ['r-squared','adjusted r-squared',
@@ -1460,12 +4022,278 @@ def stepwise(X, y, **kwargs):
     print(f"Time elapsed: {fit_time:.2f} sec")
     print('')
 
-    # Restore warnings to normal
-    warnings.filterwarnings("default")
-    
+    # Restore warnings to normal
+    warnings.filterwarnings("default")
+    
+    return model_object, model_output
+
+def stepwise_chunked(source, **kwargs):
+
+    """
+    Python function for stepwise linear regression to minimize AIC or BIC
+    and eliminate non-signficant predictors, for data that are too large
+    to fit in memory. The rows are read one chunk at a time to accumulate
+    n, X'X, X'y, and y'y, and every step of the selection, the p-values,
+    and the final model are computed from these cross-products alone.
+
+    REQUIRED INPUTS
+    source = any of the following sources of the rows of X and y:
+        - iterator of dataframes, such as pd.read_csv(file, chunksize=100000)
+        - path to a .csv file (read with pd.read_csv in chunks)
+        - path to a .parquet file or pyarrow Table (read in batches of rows)
+        - path to a .npy file (memory-mapped with np.load(mmap_mode='r'))
+        - 2-D numpy array or np.memmap (read in chunks of rows)
+        - dataframe (used as a single chunk)
+
+    OPTIONAL KEYWORD ARGUMENTS
+    **kwargs (optional keyword arguments):
+        y= name (dataframes) or column index (arrays) of the
+            dependent variable (default is the last column)
+        features= list of the names (dataframes) or column indices (arrays)
+            of the candidate features (default is every column except y)
+        chunksize= number of rows per chunk of .csv files and arrays
+            (default 100000)
+        criterion= 'aic' (default), 'bic', 'r2', or 'p_coef'
+            (same as stepwise)
+        verbose= 'on' (default) or 'off'
+        direction= 'forward' (default) or 'backward' (same as stepwise)
+        standardize= True or False (default) where
+            True: standardize X with the means and standard deviations
+                of the columns of X accumulated from the chunks
+            False: do not standardize X (default)
+        drop_insig= 'on' (default) or 'off'
+        p_threshold= threshold p-value to eliminate predictors (default 0.05)
+
+    RETURNS
+        model_object, model_output
+            model_object is a sklearn LinearRegression with the coefficients
+                and intercept of the final model for the unstandardized X,
+                also when standardize=True (use model_object.predict
+                on X[selected_features] of new chunks to predict y, 
+                while popt has the coefficients of the standardized X)
+            model_output is a dictionary of the following outputs:
+                - 'scaler': sklearn.preprocessing StandardScaler for X
+                - 'standardize': True scaler was used for X, False scaler not used
+                - 'selected_features' are the final selected features
+                - 'step_features' are the features and fitness score at each step
+                - 'popt': Constant (intercept) and coefficients of the final model
+                - 'pcov': Covariance matrix of features
+                - 'vif': Variance Inlfation Factors of selected_features
+                - 'stats': Regression statistics of the final model
+                - 'pvalues': standard errors, t-values and p-values
+                    of the constant and coefficients of the final model
+            (y_pred, residuals, and the statsmodels summary are not
+            returned because they would need all of the rows in memory)
+
+    EXAMPLE 1 - forward stepwise with AIC on a large csv file:
+    reader = pd.read_csv('big.csv', chunksize=500000)
+    model, output = stepwise_chunked(reader, y='target')
+
+    EXAMPLE 2 - backward stepwise with BIC on a memory-mapped .npy file
+    with y in the last column:
+    model, output = stepwise_chunked('big.npy', criterion='BIC', direction='backward')
+
+    """
+
+    from EasyMLR import gram_matrix_chunked, stepwise_sweep, sweep
+    from EasyMLR import sweep_pvalues, ols_criteria
+    import pandas as pd
+    import numpy as np
+    import sys
+    import time
+    from scipy import stats as scipy_stats
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.linear_model import LinearRegression
+    from EasyMLR import vif_standardized
+
+    # Define default values of input data arguments
+    defaults = {
+        'y': None,
+        'features': None,
+        'chunksize': 100000,
+        'criterion': 'AIC',
+        'verbose': 'on',
+        'direction': 'forward',
+        'standardize': False,
+        'drop_insig': 'on',
+        'p_threshold': 0.05
+        }
+
+    # Update input data argumements with any provided keyword arguments in kwargs
+    data = {**defaults, **kwargs}
+    if data['criterion'] == 'aic':
+        data['criterion'] = 'AIC'
+    if data['criterion'] == 'bic':
+        data['criterion'] = 'BIC'
+    if data['criterion'] == 'p_coef':
+        data['direction'] = 'backward'
+
+    # check for input errors
+    ctrl = data['direction'] in ['forward', 'backward']
+    if not ctrl:
+        print("direction needs to be 'forward' or 'backward' for stepwise_chunked!",'\n')
+        sys.exit()
+    ctrl = data['criterion'] in ['AIC', 'BIC', 'r2', 'p_coef']
+    if not ctrl:
+        print("criterion needs to be 'aic', 'bic', 'r2', or 'p_coef'!",'\n')
+        sys.exit()
+
+    print('Accumulating cross-products of X and y from the chunks, please wait ...')
+    if data['verbose'] == 'on':
+        print('')
+    start_time = time.time()
+
+    gram = gram_matrix_chunked(source, y=data['y'], features=data['features'],
+        chunksize=data['chunksize'])
+    n = gram['n']
+    features = gram['features']
+    p = len(features)
+
+    # scaler with the accumulated means and standard deviations of X
+    var = np.diag(gram['A'])[:p] / n
+    scale = np.sqrt(var)
+    scale[scale == 0] = 1.0
+    scaler = StandardScaler()
+    scaler.mean_ = gram['x_mean'].copy()
+    scaler.var_ = var
+    scaler.scale_ = scale
+    scaler.n_samples_seen_ = n
+    scaler.n_features_in_ = p
+
+    # Option to use standardized X
+    if data['standardize']:
+        d = np.append(1 / scale, 1.0)
+        gram['A'] = gram['A'] * np.outer(d, d)
+        gram['x_mean'] = np.zeros(p)
+
+    selected_features, step_features = stepwise_sweep(gram,
+        criterion=data['criterion'], direction=data['direction'],
+        drop_insig=data['drop_insig'], p_threshold=data['p_threshold'])
+
+    # final model from the cross-products with the selected features swept in
+    A0 = gram['A']
+    selected = [features.index(f) for f in selected_features]
+    A = A0.copy()
+    for j in selected:
+        sweep(A, j)
+    k = len(selected)
+    df_resid = n - k - 1
+    rss = A[p, p]
+    tss = A0[p, p]
+    crit = ols_criteria(rss, tss, n, k)
+    fit = sweep_pvalues(A, selected, n)
+    x_mean = gram['x_mean'][selected]
+    xtx_inv = -A[np.ix_(selected, selected)]
+    intercept = gram['y_mean'] - x_mean @ fit['params']
+    intercept_se = np.sqrt(rss / df_resid * (1 / n + x_mean @ xtx_inv @ x_mean))
+    intercept_t = intercept / intercept_se
+    names = ['const'] + selected_features
+
+    # sklearn model of the unstandardized X, with the coefficients of a
+    # standardized X divided by the scales of the columns and the 
+    # intercept shifted by their means
+    coef = np.array(fit['params'])
+    intercept_raw = intercept
+    if data['standardize']:
+        coef = coef / scale[selected]
+        intercept_raw = gram['y_mean'] - scaler.mean_[selected] @ coef
+    model_object = LinearRegression()
+    model_object.coef_ = coef
+    model_object.intercept_ = float(intercept_raw)
+    model_object.n_features_in_ = k
+    model_object.feature_names_in_ = np.array(selected_features, dtype=object)
+
+    # dataframe of model parameters, intercept and coefficients
+    popt = pd.DataFrame({'Feature': names,
+        'param': np.append(intercept, fit['params'])})
+    popt.set_index('Feature',inplace=True)
+
+    pvalues = pd.DataFrame({'Feature': names,
+        'std err': np.append(intercept_se, fit['bse']),
+        't': np.append(intercept_t, fit['tvalues']),
+        'P>|t|': np.append(2 * scipy_stats.t.sf(np.abs(intercept_t), df_resid),
+            fit['pvalues'])})
+    pvalues.set_index('Feature',inplace=True)
+
+    # Covariance matrix of the constant and selected features
+    pcov = np.zeros((k + 1, k + 1))
+    pcov[1:, 1:] = A0[np.ix_(selected, selected)] / (n - 1)
+    pcov = pd.DataFrame(pcov, index=names, columns=names)
+
+    # Variance Inflation Factors of selected_features
+    # (the same as statsmodels variance_inflation_factor with a constant,
+    # which gives the constant a VIF of 1 if it standardizes the columns)
+    if vif_standardized():
+        vif_const = 1.0
+    else:
+        vif_const = 1 + n * x_mean @ xtx_inv @ x_mean
+    vif = pd.DataFrame({'Feature': names,
+        'VIF': np.append(vif_const, np.diag(A0)[selected] * np.diag(xtx_inv))})
+    vif.set_index('Feature',inplace=True)
+
+    # Summary statitistics
+    if k > 0:
+        fvalue = ((tss - rss) / k) / (rss / df_resid)
+        f_pvalue = scipy_stats.f.sf(fvalue, k, df_resid)
+    else:
+        fvalue = np.nan
+        f_pvalue = np.nan
+    list_name = ['r-squared','adjusted r-squared',
+        'n_samples','df residuals','df model',
+        'F-statistic','Prob (F-statistic)',
+        'RMSE',
+        'Log-Likelihood','AIC','BIC']
+    list_stats = [1 - rss / tss, float(crit['rsq_adj']),
+        n, df_resid, k,
+        fvalue, f_pvalue,
+        np.sqrt(rss / n),
+        float(crit['llf']), float(crit['AIC']), float(crit['BIC'])]
+    stats = pd.DataFrame(
+        {
+            "Statistic": list_name,
+            "Value": list_stats
+        }
+        )
+    stats.set_index('Statistic',inplace=True)
+
+    model_output = {}
+    model_output['scaler'] = scaler
+    model_output['standardize'] = data['standardize']
+    model_output['selected_features'] = selected_features
+    model_output['step_features'] = step_features
+    model_output['popt'] = popt
+    model_output['pcov'] = pcov
+    model_output['vif'] = vif
+    model_output['stats'] = stats
+    model_output['pvalues'] = pvalues
+
+    if data['verbose'] == 'on':
+        if data['drop_insig'] == 'on' or data['criterion'] == 'p_coef':
+            when = 'after'
+        else:
+            when = 'before'
+        print("Model skill and features at each step in model_outputs['step_features']:\n")
+        print(step_features.to_markdown(index=False))
+        print('\nFinal '+data['direction']+' model '+when+' removing insignficant features if any:')
+        print('Best features: ', selected_features,'\n')
+        print(pd.concat([popt, pvalues], axis=1).to_markdown(index=True))
+        print("\nRegression statistics in model_outputs['stats']:\n")
+        print(stats.to_markdown(index=True))
+        print("\nVariance Inflation Factors of selected_features:")
+        print("Note: VIF>5 indicates excessive collinearity\n")
+        print(vif.to_markdown(index=True))
+
+    # Print the run time
+    fit_time = time.time() - start_time
+    if data['verbose'] == 'on':
+        print('')
+    print('Done')
+    print(f"Time elapsed: {fit_time:.2f} sec")
+    print('')
+
     return model_object, model_output
 
-def stats_given_model(X,y,model):
+def stats_given_model(X,y,model,feature_names=None):
 
     """
     Calculate linear regression summary statistics 
@@ -1483,6 +4311,7 @@ def stats_given_model(X,y,model):
     y = pandas dataframe of the observed dependent variable 
         that was used to fit the model
     model = output model object from sklearn.linear_model 
+    feature_names = column names if X is a scipy sparse matrix (optional)
     """
     import numpy as np
     import pandas as pd
@@ -1491,8 +4320,9 @@ def stats_given_model(X,y,model):
     from sklearn.linear_model import LassoCV
     import sys
 
-    from EasyMLR import check_X_y
+    from EasyMLR import check_X_y, column_names
     X, y = check_X_y(X,y)
+    names = column_names(X, feature_names)
         
     # Calculate regression summary stats
     y_pred = model.predict(X)                   # best fit of the predicted y values
@@ -1508,7 +4338,7 @@ def stats_given_model(X,y,model):
             popt[0][i] = 'const'
             popt[1][i] = model.intercept_
         else:
-            popt[0][i] = X.columns[i-1]
+            popt[0][i] = names[i-1]
             popt[1][i] = model.coef_[i-1]
     popt = pd.DataFrame(popt).T
     popt.columns = ['Feature', 'param']
@@ -1677,6 +4507,836 @@ def stats_given_y_pred(X,y,y_pred):
 
     return result
 
+def fold_plan(X, y, nfolds=20):
+
+    """
+    PURPOSE
+    Fold plan of k-fold cross-validation that is computed once and shared
+    by the cross-validated estimators of lasso and elastic. The folds are 
+    the same as sklearn KFold(n_splits=nfolds) without shuffle, which is 
+    the cv=nfolds of LassoCV, LassoLarsCV, and ElasticNetCV. The means and 
+    centered cross-products of the training rows of each fold are the 
+    totals of gram_matrix(X, y) minus the held-out block, and the 
+    cross-products of the held-out rows about the training means give 
+    the mean squared error of any coefficients with fold_mse, so that 
+    no fold needs to re-center its rows or recompute X'X and X'y.
+    The cross-products are only kept when there are more rows than 
+    features (the same rule as precompute='auto' of sklearn)
+    USAGE
+    plan = fold_plan(X, y, nfolds=20)
+    INPUT
+    X = dataframe of the independent variables
+    y = series of the dependent variable
+    nfolds = number of folds (default 20)
+    OUTPUT
+    plan = dictionary with the following:
+        'n': number of rows
+        'nfolds': number of folds
+        'features': list of the column names of X
+        'x_mean': means of the columns of X
+        'y_mean': mean of y
+        'A': centered cross-product matrix of X and y (same as gram_matrix),
+            or None if there are not more rows than features
+        'folds': list of dictionaries of each fold with the following:
+            'test': positions of the held-out rows (the training rows 
+                are all of the other rows)
+            'n': number of training rows
+            'x_mean': means of the columns of X of the training rows
+            'y_mean': mean of y of the training rows
+            'A': centered cross-product matrix of X and y of the training 
+                rows, or None if there are not more training rows than features
+            'T': cross-product matrix of X and y of the held-out rows 
+                centered at the training means, or None if there are not 
+                more held-out rows than features
+    """
+
+    import numpy as np
+    from sklearn.model_selection import KFold
+    from EasyMLR import gram_matrix
+
+    Xv = np.asarray(X, dtype=float)
+    yv = np.asarray(y, dtype=float).ravel()
+    n, p = Xv.shape
+    gram = gram_matrix(X, yv) if n > p else None
+    mean = np.append(Xv.mean(axis=0), yv.mean())
+
+    folds = []
+    for train, test in KFold(n_splits=nfolds).split(Xv):
+        n_f = len(test)
+        n_t = n - n_f
+        Zf = np.column_stack([Xv[test], yv[test]])
+        mean_f = Zf.mean(axis=0)
+        mean_t = (n * mean - n_f * mean_f) / n_t
+        delta = mean_f - mean_t
+        Zc = Zf - mean_f
+        M_f = Zc.T @ Zc
+        fold = {
+            'test': test,
+            'n': n_t,
+            'x_mean': mean_t[:p],
+            'y_mean': mean_t[p],
+            'A': None,
+            'T': None
+            }
+        if n_t > p:
+            fold['A'] = gram['A'] - M_f - np.outer(delta, delta) * (n_t * n_f / n)
+        if n_f > p:
+            fold['T'] = M_f + np.outer(delta, delta) * n_f
+        folds.append(fold)
+
+    plan = {
+        'n': n,
+        'nfolds': nfolds,
+        'features': list(map(str, X.columns)) if hasattr(X, 'columns')
+            else ['X' + str(i) for i in range(p)],
+        'x_mean': mean[:p],
+        'y_mean': mean[p],
+        'A': None if gram is None else gram['A'],
+        'folds': folds
+        }
+
+    return plan
+
+def fold_mse(fold, coefs, X, y):
+
+    """
+    PURPOSE
+    Mean squared error of the held-out rows of a fold of fold_plan for 
+    each column of coefficients of a model fitted to the training rows,
+    from the held-out cross-products of the fold, or from the held-out 
+    rows of X and y if the fold has no cross-products
+    USAGE
+    mse = fold_mse(fold, coefs, X, y)
+    INPUT
+    fold = dictionary of one fold of fold_plan(X, y)['folds']
+    coefs = p x k array of k columns of coefficients of the centered model
+    X = numpy array of the independent variables
+    y = numpy array of the dependent variable
+    OUTPUT
+    mse = array of the k mean squared errors
+    """
+
+    import numpy as np
+
+    n_f = len(fold['test'])
+    if fold['T'] is not None:
+        W = np.vstack([coefs, -np.ones(coefs.shape[1])])
+        return np.sum(W * (fold['T'] @ W), axis=0) / n_f
+    residues = ((X[fold['test']] - fold['x_mean']) @ coefs 
+        - (y[fold['test']] - fold['y_mean'])[:, np.newaxis])
+    return np.mean(residues**2, axis=0)
+
+def lars_models(X, y, nfolds=20, max_iter=10000, plan=None):
+
+    """
+    PURPOSE
+    Fit LassoLarsCV and LassoLarsIC with criterion 'aic' and 'bic' from 
+    one LARS path of the full data. AIC and BIC are two weightings of the
+    residuals of the same path, and the LassoLarsCV model at the 
+    cross-validated alpha is a point on that path, so only the paths of 
+    the k folds of the cross-validation are computed in addition to it.
+    The fitted models are the same as the sklearn fit of 
+    LassoLarsCV(cv=nfolds, max_iter=max_iter) and
+    LassoLarsIC(criterion=criterion, max_iter=max_iter)
+    USAGE
+    models = lars_models(X, y, nfolds=20, max_iter=10000, plan=None)
+    INPUT
+    X = dataframe of the independent variables
+    y = series of the dependent variable
+    nfolds = number of folds of the k-fold cross-validation (default 20)
+    max_iter = maximum number of LARS iterations (default 10000)
+    plan = fold_plan(X, y, nfolds) to share with other CV estimators
+        (default None computes it)
+    OUTPUT
+    models = dictionary of the fitted sklearn models 
+        'LassoLarsCV', 'LassoLarsAIC', and 'LassoLarsBIC', without 
+        'LassoLarsAIC' and 'LassoLarsBIC' when X has no more rows than 
+        columns + 1, where LassoLarsIC cannot estimate the noise variance
+    """
+
+    import numpy as np
+    from scipy import interpolate
+    from sklearn.linear_model import lars_path, lars_path_gram
+    from sklearn.linear_model import LassoLarsCV, LassoLarsIC, LinearRegression
+    from EasyMLR import fold_plan, fold_mse
+
+    Xv = np.asarray(X, dtype=float)
+    yv = np.asarray(y, dtype=float).ravel()
+    n, p = Xv.shape
+    names = None
+    if hasattr(X, 'columns') and all(isinstance(c, str) for c in X.columns):
+        names = np.asarray(X.columns, dtype=object)
+    x_mean = Xv.mean(axis=0)
+    y_mean = yv.mean()
+    Xc = Xv - x_mean
+    yc = yv - y_mean
+
+    def set_fit(model, coef):
+        model.coef_ = coef
+        model.intercept_ = y_mean - x_mean @ coef
+        model.n_features_in_ = p
+        if names is not None:
+            model.feature_names_in_ = names
+        return model
+
+    # LARS path of the full data shared by the three models
+    alphas, active, coef_path, n_iter = lars_path(Xc, yc, alpha_min=0.0, 
+        method='lasso', max_iter=max_iter, return_n_iter=True)
+
+    # LassoLarsIC: AIC and BIC of every step of the path, which need 
+    # the noise variance of the OLS fit with more rows than columns + 1
+    models = {}
+    ic = []
+    if n > p + 1:
+        rss = np.sum((yc[:, np.newaxis] - Xc @ coef_path)**2, axis=0)
+        dof = np.sum(np.abs(coef_path) > np.finfo(float).eps, axis=0)
+        y_ols = LinearRegression(fit_intercept=False).fit(Xc, yc).predict(Xc)
+        noise_variance = np.sum((yc - y_ols)**2) / (n - p - 1)
+        ic = [('LassoLarsAIC', 'aic', 2), ('LassoLarsBIC', 'bic', np.log(n))]
+    for name, criterion, factor in ic:
+        model = LassoLarsIC(criterion=criterion, max_iter=max_iter)
+        model.n_iter_ = n_iter
+        model.alphas_ = alphas
+        model.noise_variance_ = noise_variance
+        model.criterion_ = (n * np.log(2 * np.pi * noise_variance)
+            + rss / noise_variance + factor * dof)
+        i_best = np.argmin(model.criterion_)
+        model.alpha_ = alphas[i_best]
+        models[name] = set_fit(model, coef_path[:, i_best])
+
+    # LassoLarsCV: LARS path of each fold of the fold plan, from the
+    # cross-products of the training rows when the fold has them
+    if plan is None:
+        plan = fold_plan(X, y, nfolds)
+    cv_paths = []
+    for fold in plan['folds']:
+        if fold['A'] is not None:
+            a, _, c = lars_path_gram(fold['A'][:p, p], fold['A'][:p, :p], 
+                n_samples=fold['n'], method='lasso', max_iter=max_iter)
+        else:
+            train = np.delete(np.arange(n), fold['test'])
+            a, _, c = lars_path(Xv[train] - fold['x_mean'], 
+                yv[train] - fold['y_mean'], method='lasso', max_iter=max_iter)
+        cv_paths.append((a, c.T))
+    all_alphas = np.unique(np.concatenate([a for a, c in cv_paths]))
+    stride = int(max(1, int(len(all_alphas) / 1000.0)))
+    all_alphas = all_alphas[::stride]
+
+    # held-out mean squared error with the coefficients interpolated at 
+    # all_alphas (the residuals are linear in the coefficients, so this is
+    # the same as interpolating the residuals as LassoLarsCV does)
+    mse_path = np.empty((len(all_alphas), len(cv_paths)))
+    for index, (a, c) in enumerate(cv_paths):
+        a = a[::-1]
+        c = c[::-1]
+        if a[0] != 0:
+            a = np.r_[0, a]
+            c = np.r_[c[0, np.newaxis], c]
+        if a[-1] != all_alphas[-1]:
+            a = np.r_[a, all_alphas[-1]]
+            c = np.r_[c, c[-1, np.newaxis]]
+        this_coefs = interpolate.interp1d(a, c, axis=0)(all_alphas)
+        mse_path[:, index] = fold_mse(plan['folds'][index], this_coefs.T, Xv, yv)
+    mask = np.all(np.isfinite(mse_path), axis=-1)
+    all_alphas = all_alphas[mask]
+    mse_path = mse_path[mask]
+    best_alpha = all_alphas[np.argmin(mse_path.mean(axis=-1))]
+
+    # the full-data path down to the cross-validated alpha, interpolated at 
+    # that alpha in the same way as lars_path with alpha_min=best_alpha
+    tol = np.finfo(np.float32).eps
+    stop = np.flatnonzero(alphas <= best_alpha + tol)
+    k = int(stop[0]) if len(stop) else len(alphas) - 1
+    coef = coef_path[:, k]
+    alpha = alphas[k]
+    if len(stop) and abs(alpha - best_alpha) > tol:
+        if k > 0:
+            ss = (alphas[k-1] - best_alpha) / (alphas[k-1] - alphas[k])
+            coef = coef_path[:, k-1] + ss * (coef_path[:, k] - coef_path[:, k-1])
+        alpha = best_alpha
+    model = LassoLarsCV(cv=nfolds, max_iter=max_iter)
+    model.alpha_ = best_alpha
+    model.cv_alphas_ = all_alphas
+    model.mse_path_ = mse_path
+    model.alphas_ = np.r_[alphas[:k], alpha]
+    model.coef_path_ = np.column_stack([coef_path[:, :k], coef])
+    model.n_iter_ = k
+    # active features in the order that they entered the path
+    entered = np.argmax(np.abs(model.coef_path_) > 0, axis=1)
+    model.active_ = sorted(np.flatnonzero(coef).tolist(), key=lambda j: entered[j])
+    models['LassoLarsCV'] = set_fit(model, coef)
+
+    return models
+
+def enet_warm_path(Xc, yc, A, grid, l1_ratio, max_iter=1000, tol=1e-4, 
+    coef_init=None, screening=False):
+
+    """
+    PURPOSE
+    Warm-started coordinate descent path of sklearn enet_path from the 
+    largest to the smallest alpha of a grid, with the Gram matrix X'X 
+    of the cross-products A when they are given. With screening=True, 
+    the strong rule (Tibshirani et al., 2012) discards the features j 
+    with zero coefficients and |x_j'r| / n < l1_ratio * (2 * alpha - 
+    previous alpha) at the residuals r of the previous solution. The path
+    is split into segments of consecutive alphas with nearly the same 
+    strong set, each solved by one warm-started enet_path on its strong 
+    set, and the KKT condition |x_j'r| / n <= l1_ratio * alpha of the 
+    discarded features is re-checked at the end of each segment for all 
+    of its alphas, with any violators added back and the segment solved 
+    again, so that the path is the same as without screening. This skips
+    most of the features of wide X with correlated or many informative 
+    features, but it can be slower than no screening for small X
+    USAGE
+    coefs, gaps, n_iters, screened, violations = enet_warm_path(Xc, yc, A, 
+        grid, l1_ratio)
+    INPUT
+    Xc = Fortran-ordered numpy array of the centered X
+    yc = numpy array of the centered y
+    A = centered cross-product matrix of X and y (as gram_matrix), or None
+    grid = array of alphas in any order
+    l1_ratio = l1_ratio of ElasticNet (1.0 for Lasso)
+    max_iter = maximum number of coordinate descent iterations (default 1000)
+    tol = convergence tolerance of coordinate descent (default 1e-4)
+    coef_init = initial coefficients of the first alpha (default None)
+    screening = True or False (default) to use the strong rule
+    OUTPUT
+    coefs = p x len(grid) array of the coefficients at each alpha of grid
+    gaps = dual gaps at each alpha of grid
+    n_iters = numbers of iterations at each alpha of grid
+    screened = numbers of features skipped by the strong rule at each alpha
+    violations = numbers of features added back by the KKT check at each alpha
+    """
+
+    import numpy as np
+    from sklearn.linear_model import enet_path
+
+    n, p = Xc.shape
+    grid = np.asarray(grid, dtype=float)
+    order = np.argsort(grid)[::-1]
+    gram = False
+    Xy = None
+    if A is not None:
+        gram = A[:p, :p]
+        Xy = A[:p, p]
+    coefs = np.zeros((p, len(grid)))
+    gaps = np.zeros(len(grid))
+    n_iters = np.zeros(len(grid), dtype=int)
+    screened = np.zeros(len(grid), dtype=int)
+    violations = np.zeros(len(grid), dtype=int)
+
+    if not screening or l1_ratio == 0:
+        out = enet_path(Xc, yc, l1_ratio=l1_ratio, alphas=grid[order],
+            precompute=gram, Xy=Xy, copy_X=False, max_iter=max_iter,
+            tol=tol, coef_init=coef_init, return_n_iter=True)
+        coefs[:, order] = out[1]
+        gaps[order] = out[2]
+        n_iters[order] = out[3]
+        return coefs, gaps, n_iters, screened, violations
+
+    def correlation(coef):
+        # |x_j'r| / n of every feature at the residuals of each column of coef
+        if A is not None:
+            return np.abs(Xy[:, None] - gram @ coef) / n
+        return np.abs(Xc.T @ (yc[:, None] - Xc @ coef)) / n
+
+    coef = np.zeros(p) if coef_init is None else np.array(coef_init, dtype=float)
+    c = correlation(coef[:, None])[:, 0]
+    # the path starts at the smallest alpha with all coefficients zero
+    prev_alpha = grid[order[0]]
+    if coef_init is None:
+        prev_alpha = max(prev_alpha, np.max(c) / l1_ratio)
+    start = 0
+    while start < len(order):
+        # segment of the consecutive alphas whose strong sets by the strong 
+        # rule at the solution of the previous segment add at most 
+        # min(n, p / 10) features to the strong set of the first alpha,
+        # solved together on the strong set of the last alpha of the segment
+        active = coef != 0
+        strong = active | (c >= l1_ratio * (2 * grid[order[start]] - prev_alpha))
+        end = start + 1
+        if np.sum(strong) > p / 2:
+            # the strong rule keeps most of the features (as with a small 
+            # l1_ratio), so the rest of the path is solved without screening
+            strong[:] = True
+            end = len(order)
+        size = np.sum(strong) + min(n, p // 10)
+        while end < len(order):
+            rule = active | (c >= l1_ratio * (2 * grid[order[end]] - prev_alpha))
+            if np.sum(rule) > size:
+                break
+            strong = rule
+            end += 1
+        seg = order[start:end]
+        while True:
+            # one warm-started path over the segment on the strong set, 
+            # starting from the previous solution (which is zero outside 
+            # of the strong set)
+            keep = np.flatnonzero(strong)
+            coef_seg = np.zeros((p, len(seg)))
+            if len(keep) > 0:
+                full = len(keep) == p
+                out = enet_path(Xc if full else np.asfortranarray(Xc[:, keep]), 
+                    yc, l1_ratio=l1_ratio, alphas=grid[seg], 
+                    precompute=gram if full or A is None else gram[np.ix_(keep, keep)],
+                    Xy=None if A is None else Xy[keep], copy_X=False,
+                    max_iter=max_iter, tol=tol, coef_init=coef[keep],
+                    return_n_iter=True, check_input=full)
+                coef_seg[keep] = out[1]
+                gaps[seg] = out[2]
+                n_iters[seg] += out[3]
+            # KKT check of the features that were screened out, at every
+            # alpha of the segment in one product
+            c_seg = correlation(coef_seg)
+            violated = ~strong[:, None] & (c_seg > l1_ratio * grid[seg])
+            if not np.any(violated):
+                break
+            violations[seg] += np.sum(violated, axis=0)
+            strong |= np.any(violated, axis=1)
+        coefs[:, seg] = coef_seg
+        screened[seg] = p - np.sum(strong)
+        coef = coef_seg[:, -1]
+        c = c_seg[:, -1]
+        prev_alpha = grid[seg[-1]]
+        start = end
+
+    return coefs, gaps, n_iters, screened, violations
+
+def enet_fold_mse(X, y, fold, grids, l1_ratios, max_iter=1000, tol=1e-4, 
+    screening=False):
+
+    """
+    PURPOSE
+    Held-out mean squared error along the warm-started path of each 
+    l1_ratio for one fold of fold_plan, with the training rows centered 
+    once for all of the l1_ratios
+    USAGE
+    mse, screened, violations = enet_fold_mse(X, y, fold, grids, l1_ratios, 
+        max_iter, tol, screening)
+    INPUT
+    X = numpy array of the independent variables
+    y = numpy array of the dependent variable
+    fold = dictionary of one fold of fold_plan(X, y)['folds']
+    grids = list of the arrays of alphas of each l1_ratio
+    l1_ratios = list of l1_ratios
+    max_iter = maximum number of coordinate descent iterations (default 1000)
+    tol = convergence tolerance of coordinate descent (default 1e-4)
+    screening = True or False (default) to use the strong rule of enet_warm_path
+    OUTPUT
+    mse = len(l1_ratios) x len(grid) array of the mean squared errors
+    screened = total number of features skipped by the strong rule
+    violations = total number of features added back by the KKT check
+    """
+
+    import numpy as np
+    from EasyMLR import enet_warm_path, fold_mse
+
+    train = np.delete(np.arange(X.shape[0]), fold['test'])
+    Xt = np.asfortranarray(X[train] - fold['x_mean'])
+    yt = y[train] - fold['y_mean']
+    mse = []
+    screened = 0
+    violations = 0
+    for grid, l1_ratio in zip(grids, l1_ratios):
+        coefs, _, _, s, v = enet_warm_path(Xt, yt, fold['A'], grid, l1_ratio, 
+            max_iter=max_iter, tol=tol, screening=screening)
+        mse.append(fold_mse(fold, coefs, X, y))
+        screened += int(np.sum(s))
+        violations += int(np.sum(v))
+
+    return np.asarray(mse), screened, violations
+
+def enet_fold_shard(spec_X, spec_y, fold, grids, l1_ratios, max_iter=1000, tol=1e-4, 
+    screening=False):
+
+    """
+    PURPOSE
+    Worker process of enet_path_cv with n_jobs > 1 that runs enet_fold_mse
+    for one fold and a block of l1_ratios with X and y in shared memory 
+    made by shared_array
+    USAGE
+    out = enet_fold_shard(spec_X, spec_y, fold, grids, l1_ratios, max_iter, tol,
+        screening)
+    INPUT
+    spec_X, spec_y = shared memory specs of X and y made by shared_array
+    fold, grids, l1_ratios, max_iter, tol, screening = inputs of enet_fold_mse
+    OUTPUT
+    out = output of enet_fold_mse
+    """
+
+    from EasyMLR import enet_fold_mse
+
+    shm_X, X = attach_shared_array(spec_X)
+    shm_y, y = attach_shared_array(spec_y)
+    try:
+        out = enet_fold_mse(X, y, fold, grids, l1_ratios, max_iter, tol, screening)
+    finally:
+        del X, y
+        shm_X.close()
+        shm_y.close()
+
+    return out
+
+def enet_path_cv(X, y, alphas, **kwargs):
+
+    """
+    PURPOSE
+    Fit LassoCV or ElasticNetCV together with the coefficients of the full
+    data along a grid of alphas, using warm-started coordinate descent 
+    paths. Each path is solved in one sweep from the largest to the 
+    smallest alpha, starting from the solution of the previous alpha, and
+    with the precomputed Gram matrix X'X when there are more rows than 
+    columns. The refit of the CV model at the selected alpha is a point on
+    the same full-data path as the coefficients of the alpha grid.
+    The cross-validation is the same as LassoCV(cv=nfolds) or 
+    ElasticNetCV(l1_ratio=l1_ratio, cv=nfolds), and the coefficients agree
+    with independent fits of Lasso or ElasticNet to within the 
+    convergence tolerance of coordinate descent
+    USAGE
+    model_cv, coefs, screening = enet_path_cv(X, y, alphas, **kwargs)
+    INPUT
+    X = dataframe of the independent variables
+    y = series of the dependent variable
+    alphas = array of alphas for the coefficients of the full data
+    **kwargs (optional keyword arguments):
+        l1_ratio= None for LassoCV (default), or float or list of floats 
+            between 0 and 1 for ElasticNetCV
+        nfolds= number of folds of the k-fold cross-validation (default 5)
+        plan= fold_plan(X, y, nfolds) to share with other CV estimators
+            (default None computes it)
+        max_iter= maximum number of coordinate descent iterations (default 1000)
+        tol= convergence tolerance of coordinate descent (default 1e-4)
+        n_jobs= number of worker processes for the paths of the pairs
+            of fold and l1_ratio (default 1, -1 uses all cores),
+            with X and y in shared memory (same result as n_jobs=1)
+        screening= 'auto' (default), 'on', or 'off' to skip the features 
+            that the strong rule of enet_warm_path shows are zero, where
+            'auto' screens when X has more columns than rows
+    OUTPUT
+    model_cv = fitted sklearn LassoCV or ElasticNetCV model
+    coefs = list of coefficient arrays of the full data at each of alphas
+        (at the l1_ratio selected by cross-validation)
+    screening = dictionary of the following:
+        'screening': True if the strong rule was used
+        'n_features': number of features
+        'path': dataframe of the numbers of features 'screened' by the 
+            strong rule and of 'kkt_violations' added back by the KKT check
+            at each alpha of the full-data path
+        'cv_screened': total number of features screened over all of the
+            alphas of the CV paths of every fold and l1_ratio
+        'cv_kkt_violations': total number of KKT violations of the CV paths
+        'cv_fraction': fraction of the features of all alphas of the 
+            CV paths that were screened
+    """
+
+    import numpy as np
+    import pandas as pd
+    from concurrent.futures import ProcessPoolExecutor
+    from sklearn.linear_model import LassoCV, ElasticNetCV
+    from EasyMLR import fold_plan, enet_warm_path, enet_fold_mse
+    from EasyMLR import enet_fold_shard, shared_array, pool_size
+
+    defaults = {
+        'l1_ratio': None,
+        'nfolds': 5,
+        'plan': None,
+        'max_iter': 1000,
+        'tol': 1e-4,
+        'n_jobs': 1,
+        'screening': 'auto'
+        }
+    data = {**defaults, **kwargs}
+
+    Xv = np.asarray(X, dtype=float)
+    yv = np.asarray(y, dtype=float).ravel()
+    n, p = Xv.shape
+    names = None
+    if hasattr(X, 'columns') and all(isinstance(c, str) for c in X.columns):
+        names = np.asarray(X.columns, dtype=object)
+    if data['l1_ratio'] is None:
+        l1_ratios = np.array([1.0])
+    else:
+        l1_ratios = np.atleast_1d(np.asarray(data['l1_ratio'], dtype=float))
+    if np.any(l1_ratios == 0):
+        raise ValueError('Automatic alpha grid generation is not supported '
+            'for l1_ratio=0. Please supply a grid by providing your '
+            'estimator with the appropriate `alphas=` parameter.')
+    screening = (data['screening'] == 'on' 
+        or (data['screening'] == 'auto' and p > n))
+
+    plan = data['plan']
+    if plan is None:
+        plan = fold_plan(X, y, data['nfolds'])
+    x_mean = plan['x_mean']
+    y_mean = plan['y_mean']
+    Xc = np.asfortranarray(Xv - x_mean)
+    yc = yv - y_mean
+
+    # grid of 100 alphas for each l1_ratio, the same as sklearn
+    Xy = plan['A'][:p, p] if plan['A'] is not None else Xc.T @ yc
+    grids = []
+    for l1_ratio in l1_ratios:
+        alpha_max = np.max(np.abs(Xy)) / (n * l1_ratio)
+        if alpha_max <= np.finfo(float).resolution:
+            grids.append(np.full(100, np.finfo(float).resolution))
+        else:
+            grids.append(np.geomspace(alpha_max, alpha_max * 1e-3, num=100))
+
+    # mean squared error of the held-out rows along the path of each fold,
+    # with the training rows centered once per fold for all l1_ratios
+    folds = plan['folds']
+    mse_path = np.empty((len(l1_ratios), len(folds), 100))
+    n_jobs = min(pool_size(data['n_jobs']), len(folds) * len(l1_ratios))
+    cv_screened = 0
+    cv_violations = 0
+    if n_jobs == 1:
+        for k, fold in enumerate(folds):
+            mse_path[:, k], s, v = enet_fold_mse(Xv, yv, fold, grids, l1_ratios, 
+                data['max_iter'], data['tol'], screening)
+            cv_screened += s
+            cv_violations += v
+    else:
+        # tasks of one fold and a block of l1_ratios, enough for about 
+        # 4 tasks per worker, with X and y in shared memory
+        n_blocks = min(len(l1_ratios), int(np.ceil(4 * n_jobs / len(folds))))
+        blocks = np.array_split(np.arange(len(l1_ratios)), n_blocks)
+        shm_X, spec_X = shared_array(Xv)
+        shm_y, spec_y = shared_array(yv)
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                futures = {(k, b): executor.submit(enet_fold_shard, spec_X, spec_y, 
+                    fold, [grids[i] for i in block], l1_ratios[block], 
+                    data['max_iter'], data['tol'], screening)
+                    for k, fold in enumerate(folds) 
+                    for b, block in enumerate(blocks)}
+                for (k, b), future in futures.items():
+                    mse_path[blocks[b], k], s, v = future.result()
+                    cv_screened += s
+                    cv_violations += v
+        finally:
+            shm_X.close()
+            shm_X.unlink()
+            shm_y.close()
+            shm_y.unlink()
+    mean_mse = mse_path.mean(axis=1)
+    best_mse = np.inf
+    for i in range(len(l1_ratios)):
+        j = np.argmin(mean_mse[i])
+        if mean_mse[i, j] < best_mse:
+            i_best, j_best, best_mse = i, j, mean_mse[i, j]
+    best_alpha = grids[i_best][j_best]
+
+    # one full-data path at the selected l1_ratio through the CV alphas
+    # down to the selected alpha and the requested alphas
+    alphas = np.asarray(alphas, dtype=float)
+    grid = np.unique(np.r_[grids[i_best][:j_best + 1], alphas])
+    coefs, gaps, n_iters, screened, violations = enet_warm_path(Xc, yc, plan['A'], 
+        grid, l1_ratios[i_best], max_iter=data['max_iter'], tol=data['tol'],
+        screening=screening)
+
+    # refit at the selected alpha continued from the path solution to 
+    # 1/1000 of the tolerance, which is as accurate as a cold-start refit 
+    # and takes few iterations from the warm start
+    i_alpha = np.searchsorted(grid, best_alpha)
+    coef, gap, n_iter, _, _ = enet_warm_path(Xc, yc, plan['A'], [best_alpha], 
+        l1_ratios[i_best], max_iter=data['max_iter'], tol=data['tol'] / 1000,
+        coef_init=coefs[:, i_alpha], screening=screening)
+
+    if data['l1_ratio'] is None:
+        model_cv = LassoCV(cv=data['nfolds'], max_iter=data['max_iter'], 
+            tol=data['tol'], random_state=0)
+        model_cv.alphas_ = grids[0]
+    else:
+        model_cv = ElasticNetCV(l1_ratio=data['l1_ratio'], cv=data['nfolds'],
+            max_iter=data['max_iter'], tol=data['tol'], random_state=0)
+        model_cv.alphas_ = np.squeeze(np.asarray(grids))
+        model_cv.l1_ratio_ = l1_ratios[i_best]
+    model_cv.mse_path_ = np.squeeze(np.moveaxis(mse_path, 2, 1))
+    model_cv.alpha_ = best_alpha
+    model_cv.coef_ = coef[:, 0]
+    model_cv.intercept_ = y_mean - x_mean @ model_cv.coef_
+    model_cv.dual_gap_ = gap[0]
+    model_cv.n_iter_ = int(n_iters[i_alpha] + n_iter[0])
+    model_cv.n_features_in_ = p
+    if names is not None:
+        model_cv.feature_names_in_ = names
+
+    coefs = [coefs[:, i].copy() for i in np.searchsorted(grid, alphas)]
+
+    screening = {
+        'screening': screening,
+        'n_features': p,
+        'path': pd.DataFrame({
+            'alpha': grid,
+            'screened': screened,
+            'kkt_violations': violations
+            }).set_index('alpha'),
+        'cv_screened': cv_screened,
+        'cv_kkt_violations': cv_violations,
+        'cv_fraction': cv_screened / (p * mse_path.size)
+        }
+
+    return model_cv, coefs, screening
+
+def linear_sparse(X, y, models, **kwargs):
+
+    """
+    PURPOSE
+    Fit sklearn linear models that find their best alpha by k-fold CV 
+    to a scipy sparse X without converting it to a dense array, 
+    and make the outputs of lasso, ridge, and elastic for them, 
+    including the peak memory and the printed run time of the call. 
+    The standardized X is scaled by the standard deviations of the columns
+    but not centered (StandardScaler(with_mean=False)), which keeps X sparse
+    and gives the same coefficients as centering because sklearn centers 
+    sparse X inside the fit of the intercept. The pcov and vif outputs 
+    are not made because they need dense p x p matrices.
+    USAGE
+    model_objects, model_outputs = linear_sparse(X, y, models, **kwargs)
+    INPUT
+    X = scipy sparse CSR matrix of the candidate independent variables
+    y = pandas series of the dependent variable (from check_X_y)
+    models = dictionary of the names and unfitted sklearn estimators
+        that accept sparse X, e.g. {'LassoCV': LassoCV(cv=20)}, which
+        are fitted with the alphas of alpha_min, alpha_max, and n_alpha
+    **kwargs (optional keyword arguments):
+        alpha_min= minimum value of range of alphas to evaluate (default=1e-3)
+        alpha_max= maximum value of range of alphas to evaluate (default=1e3)
+        n_alpha= number of log-spaced alphas to evaluate (default=100)
+        start_time= time.time() at the start of the calling function
+            (default None uses the start of this call)
+        peak_start= peak_memory() at the start of the calling function
+            (default None uses the start of this call)
+        feature_names= list of the column names of X (default 'X0', 'X1', ...)
+        standardize= True (default) or False to scale the columns of X
+        title= name of the regression used in the printed outputs 
+            and plot files (default 'Linear')
+        verbose= 'on' (default), 'off', or 1=show stats and residuals plot
+    OUTPUT
+    model_objects = dictionary of the fitted models
+    model_outputs = dictionary of 'scaler', 'standardize', 'feature_names',
+        'y_pred', 'residuals', 'popt', 'popt_table', 'stats', 
+        'peak_memory', and 'peak_memory_increase'
+    """
+
+    from EasyMLR import stats_given_model, column_names, peak_memory
+    import time
+    import warnings
+    import pandas as pd
+    import numpy as np
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.metrics import PredictionErrorDisplay
+    import matplotlib.pyplot as plt
+
+    defaults = {
+        'alpha_min': 1.0e-3,
+        'alpha_max': 1.0e3,
+        'n_alpha': 100,
+        'start_time': None,
+        'peak_start': None,
+        'feature_names': None,
+        'standardize': True,
+        'title': 'Linear',
+        'verbose': 'on'
+        }
+    data = {**defaults, **kwargs}
+    names = column_names(X, data['feature_names'])
+    start_time = time.time() if data['start_time'] is None else data['start_time']
+    peak_start = peak_memory() if data['peak_start'] is None else data['peak_start']
+    alphas = 10**np.linspace(np.log10(data['alpha_min']), 
+        np.log10(data['alpha_max']), data['n_alpha'])
+
+    model_objects = {}
+    model_outputs = {}
+
+    scaler = StandardScaler(with_mean=False).fit(X)
+    model_outputs['scaler'] = scaler
+    model_outputs['standardize'] = data['standardize']
+    model_outputs['feature_names'] = names
+    if data['standardize']:
+        X = scaler.transform(X)
+
+    list1_name = ['alpha','r-squared','adjusted r-squared',
+                        'n_samples','df residuals','df model',
+                        'F-statistic','Prob (F-statistic)','RMSE',
+                        'Log-Likelihood','AIC','BIC']
+    y_pred = pd.DataFrame(index=y.index)
+    residuals = pd.DataFrame(index=y.index)
+    popt_table = pd.DataFrame(index=pd.Index(['const'] + names, name='Feature'))
+    popt_all = {}
+    stats = pd.DataFrame(index=pd.Index(list1_name, name='Statistic'))
+    for name, model in models.items():
+        model.set_params(alphas=alphas)
+        model.fit(X, y)
+        model_objects[name] = model
+        s = stats_given_model(X, y, model, feature_names=names)
+        y_pred[name] = s['y_pred']
+        residuals[name] = s['residuals']
+        popt = s['popt'].set_index('Feature')
+        popt_table[name] = popt['param'].astype(float).values
+        popt_all[name] = popt[popt['param'] != 0]
+        stats[name] = [model.alpha_, s["rsquared"], s["adj_rsquared"],
+                       s["n_samples"], s["df"], s["dfn"], 
+                       s["Fstat"], s["pvalue"], s["RMSE"],  
+                       s["log_likelihood"], s["aic"], s["bic"]]
+    model_outputs['y_pred'] = y_pred
+    model_outputs['residuals'] = residuals
+    model_outputs['popt'] = popt_all
+    model_outputs['popt_table'] = popt_table
+    model_outputs['stats'] = stats
+
+    # residual plot for training error
+    if data['verbose'] == 'on' or data['verbose'] == 1:
+        for name in models:
+            fig, axs = plt.subplots(ncols=2, figsize=(8, 4))
+            PredictionErrorDisplay.from_predictions(
+                y,
+                y_pred=y_pred[name],
+                kind="actual_vs_predicted",
+                ax=axs[0]
+            )
+            axs[0].set_title("Actual vs. Predicted")
+            PredictionErrorDisplay.from_predictions(
+                y,
+                y_pred=y_pred[name],
+                kind="residual_vs_predicted",
+                ax=axs[1]
+            )
+            axs[1].set_title("Residuals vs. Predicted")
+            fig.suptitle(
+                f"Predictions compared with actual values and residuals (RMSE={stats.loc['RMSE', name]:.3f})")
+            plt.tight_layout()
+            plt.savefig(name + "_predictions.png", dpi=300)
+
+    # Print model_outputs
+    if data['verbose'] == 'on' or data['verbose'] == 1:
+        print(data['title'] + " regression statistics of best models in model_outputs['stats']:")
+        print('')
+        print(stats.to_markdown(index=True))
+        print('')
+        if data['verbose'] != 1:
+            print("Non-zero coefficients of best models in model_outputs['popt']:")
+            print('')
+            print(popt_table[(popt_table != 0).any(axis=1)].to_markdown(index=True))
+            print('')
+
+    # Peak memory of the process (MB) and how much the call raised it
+    peak = peak_memory()
+    model_outputs['peak_memory'] = peak
+    model_outputs['peak_memory_increase'] = (None if peak is None or peak_start is None 
+        else peak - peak_start)
+
+    # Print the run time
+    fit_time = time.time() - start_time
+    print('Done')
+    print(f"Time elapsed: {fit_time:.2f} sec")
+    print('')
+
+    # Restore warnings to normal
+    warnings.filterwarnings("default")
+
+    return model_objects, model_outputs
+
 def lasso(X, y, **kwargs):
 
     """
@@ -1704,7 +5364,16 @@ def lasso(X, y, **kwargs):
         alpha_min= minimum value of range of alphas to evaluate (default=1e-3)
         alpha_max= maximum value of range of alphas to evaluate (default=1e3)
         n_alpha= number of log-spaced alphas to evaluate (default=100)
+        screening= 'auto' (default), 'on', or 'off' to skip features that 
+            the strong rule shows are zero in the coordinate descent of 
+            LassoCV, with KKT checks ('auto' screens when X has more 
+            columns than rows)
+        feature_names= list of the column names of X if X is a scipy 
+            sparse matrix, e.g. preprocess_train(df, sparse=True)['feature_names']
         verbose= 'on' (default), 'off', or 1=show stats and residuals plot
+        copy= True (default) to fit copies of X, or False to skip
+            the copies of X and of its scaled or preprocessed versions
+            to reduce the peak memory (X is not changed either way)
 
     Standardization is generally recommended for Lasso regression.
 
@@ -1727,13 +5396,20 @@ def lasso(X, y, **kwargs):
                 - LassoLarsCV: k-fold CV least angle regression
                 - LassoLarsAIC: LassoLarsIC using AIC
                 - LassoLarsBIC: LasspLarsIC using BIC
+                (LassoLarsAIC and LassoLarsBIC are omitted from all of the
+                outputs when X has no more rows than columns + 1, 
+                where LassoLarsIC cannot estimate the noise variance)
             model_outputs is a dictionary of the following outputs: 
                 - 'scaler': sklearn.preprocessing StandardScaler for X
                 - 'standardize': True scaler was used for X, False scaler not used
                 - 'alpha_vs_coef': model coefficients for each X variable
                     as a function of alpha using Lasso
                 - 'alpha_vs_AIC_BIC': AIC and BIC as a function of alpha 
-                    using LassoLarsIC
+                    using LassoLarsIC (if LassoLarsIC was fitted)
+                - 'fold_plan': folds and cross-products of the k-fold CV
+                    (pass to elastic as fold_plan= to reuse them)
+                - 'screening': numbers of features screened by the strong 
+                    rule in LassoCV (see enet_path_cv)
                 - 'y_pred': Predicted y values
                 - 'residuals': Residuals (y-y_pred) for each of the four methods
                 - 'popt': Constant (intercept) and coefficients for the 
@@ -1745,6 +5421,8 @@ def lasso(X, y, **kwargs):
                 - 'vif_table': Variance Inlfation Factors of features of 
                     all four methods in one table
                 - 'stats': Regression statistics for each model
+                - 'peak_memory': peak memory of the python process (MB) and
+                    'peak_memory_increase': how much this call raised it (MB)
 
     NOTE
     Do any necessary/optional cleaning of the data before 
@@ -1753,26 +5431,31 @@ def lasso(X, y, **kwargs):
     columns as needed, but y should only be one column. X should have unique
     column names for for each column
 
+    X can also be a scipy sparse matrix (e.g. from preprocess_train with 
+    sparse=True), which is used without converting it to a dense array. 
+    Only LassoCV is fitted for a sparse X (LassoLarsCV and LassoLarsIC need 
+    a dense X) and the outputs are those of linear_sparse.
+
     EXAMPLE 
     model_objects, model_outputs = lasso(X, y)
 
     """
 
     from EasyMLR import stats_given_model, detect_dummy_variables
+    from EasyMLR import peak_memory
+    from EasyMLR import lars_models, enet_path_cv, fold_plan, linear_sparse
+    from scipy.sparse import issparse
+    from sklearn.linear_model import LassoCV
     import time
     import pandas as pd
     import numpy as np
-    from sklearn.linear_model import Lasso
-    from sklearn.linear_model import LassoCV
-    from sklearn.linear_model import LassoLarsCV
-    from sklearn.linear_model import LassoLarsIC
     from sklearn.preprocessing import StandardScaler
     from sklearn.metrics import PredictionErrorDisplay
     import matplotlib.pyplot as plt
     import warnings
     import sys
     import statsmodels.api as sm
-    from statsmodels.stats.outliers_influence import variance_inflation_factor
+    from EasyMLR import vif_closed_form
    
     # Define default values of input data arguments
     defaults = {
@@ -1781,14 +5464,17 @@ def lasso(X, y, **kwargs):
         'alpha_min': 1.0e-3,
         'alpha_max': 1.0e3,
         'n_alpha': 100,
-        'verbose': 'on'
+        'screening': 'auto',
+        'feature_names': None,
+        'verbose': 'on',
+        'copy': True
         }
 
     # Update input data argumements with any provided keyword arguments in kwargs
     data = {**defaults, **kwargs}
 
     from EasyMLR import check_X_y
-    X, y = check_X_y(X,y)
+    X, y = check_X_y(X,y,copy=data['copy'])
 
     ctrl = data['alpha_min'] > 0 
     if not ctrl:
@@ -1811,6 +5497,16 @@ def lasso(X, y, **kwargs):
 
     # Set start time for calculating run time
     start_time = time.time()
+    peak_start = peak_memory()
+
+    # LassoCV of a sparse X without densifying it
+    if issparse(X):
+        return linear_sparse(X, y, 
+            {'LassoCV': LassoCV(cv=data['nfolds'], max_iter=10000)},
+            alpha_min=data['alpha_min'], alpha_max=data['alpha_max'], 
+            n_alpha=data['n_alpha'], start_time=start_time, peak_start=peak_start,
+            feature_names=data['feature_names'], standardize=data['standardize'],
+            title='Lasso', verbose=data['verbose'])
 
     # check if X contains dummy variables
     X_has_dummies = detect_dummy_variables(X)
@@ -1823,20 +5519,22 @@ def lasso(X, y, **kwargs):
 
     # Standardized X (X_scaled)
     scaler = StandardScaler().fit(X)
-    X_scaled = scaler.transform(X)
-    # Convert scaled arrays into pandas dataframes with same column names as X
-    X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
-    # Copy index from unscaled to scaled dataframes
-    X_scaled.index = X.index
     # model_outputs['X_scaled'] = X_scaled                 # standardized X
     model_outputs['scaler'] = scaler                     # scaler used to standardize X
     model_outputs['standardize'] = data['standardize']   # True: X_scaled was used to fit, False: X was used
 
     # Specify X to be used for fitting the models 
+    # (X_scaled is only made if it is used, and copy=False uses
+    # X_scaled or X as they are instead of copies of them)
     if data['standardize']:
-        X = X_scaled.copy()
+        X_scaled = scaler.transform(X)
+        # Convert scaled arrays into pandas dataframes with same column names as X
+        X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
+        # Copy index from unscaled to scaled dataframes
+        X_scaled.index = X.index
+        X = X_scaled.copy() if data['copy'] else X_scaled
     else:
-        X = X.copy()
+        X = X.copy() if data['copy'] else X
 
     # Calculate the role of alpha vs coefficient values
     alpha_min = np.log10(data['alpha_min'])
@@ -1844,47 +5542,56 @@ def lasso(X, y, **kwargs):
     n_alpha = data['n_alpha']    
     alphas = 10**np.linspace(alpha_min,alpha_max,n_alpha)
     # alphas = 10**np.linspace(-3,3,100)
-    lasso = Lasso(max_iter=10000)
-    coefs = []
-    for a in alphas:
-        lasso.set_params(alpha=a)
-        lasso.fit(X, y)
-        coefs.append(lasso.coef_)
+
+    # Fold plan of the k-fold cross validation shared by LassoCV and
+    # LassoLarsCV (and by elastic with fold_plan=model_outputs['fold_plan'])
+    plan = fold_plan(X, y, data['nfolds'])
+    model_outputs['fold_plan'] = plan
+
+    # LassoCV k-fold cross validation via coordinate descent, and the
+    # coefficients for each alpha from the same warm-started lasso path
+    model_cv, coefs, screening = enet_path_cv(X, y, alphas, nfolds=data['nfolds'], 
+        plan=plan, max_iter=10000, screening=data['screening'])
+    model_outputs['screening'] = screening
     alpha_vs_coef = pd.DataFrame({
         'alpha': alphas,
         'coef': coefs
         }).set_index("alpha")
     model_outputs['alpha_vs_coef'] = alpha_vs_coef
-
-    # LassoCV k-fold cross validation via coordinate descent
-    model_cv = LassoCV(cv=data['nfolds'], random_state=0, max_iter=10000).fit(X, y)
     model_objects['LassoCV'] = model_cv
     alpha_cv = model_cv.alpha_
 
+    # LassoLarsCV, and LassoLarsIC minimizing AIC and BIC,
+    # from one least angle regression path of the full data
+    # (LassoLarsIC needs more rows than columns + 1, e.g. not for p > n)
+    lars = lars_models(X, y, nfolds=data['nfolds'], max_iter=10000, plan=plan)
+    ic = 'LassoLarsAIC' in lars
+
     # LassoLarsCV k-fold cross validation via least angle regression
-    model_lars_cv = LassoLarsCV(cv=data['nfolds'], max_iter=10000).fit(X, y)
+    model_lars_cv = lars['LassoLarsCV']
     model_objects['LassoLarsCV'] = model_lars_cv
     alpha_lars_cv = model_lars_cv.alpha_
 
-    # LassoLarsIC minimizing AIC
-    model_aic = LassoLarsIC(criterion="aic", max_iter=10000).fit(X, y)
-    model_objects['LassoLarsAIC'] = model_aic
-    alpha_aic = model_aic.alpha_
+    if ic:
+        # LassoLarsIC minimizing AIC
+        model_aic = lars['LassoLarsAIC']
+        model_objects['LassoLarsAIC'] = model_aic
+        alpha_aic = model_aic.alpha_
 
-    # LassoLarsIC minimizing BIC
-    model_bic = LassoLarsIC(criterion="bic", max_iter=10000).fit(X, y)
-    model_objects['LassoLarsBIC'] = model_bic
-    alpha_bic = model_bic.alpha_
+        # LassoLarsIC minimizing BIC
+        model_bic = lars['LassoLarsBIC']
+        model_objects['LassoLarsBIC'] = model_bic
+        alpha_bic = model_bic.alpha_
 
-    # results of alphas to minimize AIC and BIC
-    alpha_vs_AIC_BIC = pd.DataFrame(
-        {
-            "alpha": model_aic.alphas_,
-            "AIC": model_aic.criterion_,
-            "BIC": model_bic.criterion_,
-        }
-        ).set_index("alpha")
-    model_outputs['alpha_vs_AIC_BIC'] = alpha_vs_AIC_BIC
+        # results of alphas to minimize AIC and BIC
+        alpha_vs_AIC_BIC = pd.DataFrame(
+            {
+                "alpha": model_aic.alphas_,
+                "AIC": model_aic.criterion_,
+                "BIC": model_bic.criterion_,
+            }
+            ).set_index("alpha")
+        model_outputs['alpha_vs_AIC_BIC'] = alpha_vs_AIC_BIC
 
     # Lasso Plot the results of lasso coef as function of alpha
     if data['verbose'] == 'on' and data['verbose'] != 1:
@@ -1946,7 +5653,7 @@ def lasso(X, y, **kwargs):
         plt.savefig("LassoLarsCV_alpha_vs_MSE.png", dpi=300)
 
     # LassoLarsIC Plot of alphas to minimize AIC and BIC
-    if data['verbose'] == 'on' and data['verbose'] != 1:
+    if data['verbose'] == 'on' and data['verbose'] != 1 and ic:
         results = alpha_vs_AIC_BIC
         ax = results.plot()
         ax.vlines(
@@ -1975,7 +5682,7 @@ def lasso(X, y, **kwargs):
         plt.savefig("LassoLarsIC_alpha_vs_AIC_BIC.png", dpi=300)
 
     # LassoLarsIC Plot sequence of alphas to minimize AIC and BIC
-    if data['verbose'] == 'on' and data['verbose'] != 1:
+    if data['verbose'] == 'on' and data['verbose'] != 1 and ic:
         plt.figure()
         aic_criterion = model_aic.criterion_
         bic_criterion = model_bic.criterion_
@@ -2011,29 +5718,32 @@ def lasso(X, y, **kwargs):
     # Calculate regression stats
     stats_cv = stats_given_model(X, y, model_cv)
     stats_lars_cv = stats_given_model(X, y, model_lars_cv)
-    stats_aic = stats_given_model(X, y, model_aic)
-    stats_bic = stats_given_model(X, y, model_bic)
+    if ic:
+        stats_aic = stats_given_model(X, y, model_aic)
+        stats_bic = stats_given_model(X, y, model_bic)
 
     # residual plot for training error
     if data['verbose'] == 'on' or data['verbose'] == 1:
         # plot predictions vs actual
         y_pred_cv = stats_cv['y_pred']
         y_pred_lars_cv = stats_lars_cv['y_pred']
-        y_pred_aic = stats_aic['y_pred']
-        y_pred_bic = stats_bic['y_pred']
         res_cv = stats_cv['residuals']
         res_lars_cv = stats_lars_cv['residuals']
-        res_aic = stats_aic['residuals']
-        res_bic = stats_bic['residuals']
         rmse_cv = stats_cv['RMSE']
         rmse_lars_cv = stats_lars_cv['RMSE']
-        rmse_aic = stats_aic['RMSE']
-        rmse_bic = stats_bic['RMSE']
+        if ic:
+            y_pred_aic = stats_aic['y_pred']
+            y_pred_bic = stats_bic['y_pred']
+            res_aic = stats_aic['residuals']
+            res_bic = stats_bic['residuals']
+            rmse_aic = stats_aic['RMSE']
+            rmse_bic = stats_bic['RMSE']
         plt.figure()
         plt.scatter(y_pred_cv, y, s=40, label=('LassoCV (RMSE={:.2f})'.format(rmse_cv)))
         plt.scatter(y_pred_lars_cv, y, s=15, label=('LassoLarsCV (RMSE={:.2f})'.format(rmse_lars_cv)))
-        plt.scatter(y_pred_aic, y, s=10, label=('LassoLarsAIC (RMSE={:.2f})'.format(rmse_aic)))
-        plt.scatter(y_pred_bic, y, s=5, label=('LassoLarsBIC (RMSE={:.2f})'.format(rmse_bic)))
+        if ic:
+            plt.scatter(y_pred_aic, y, s=10, label=('LassoLarsAIC (RMSE={:.2f})'.format(rmse_aic)))
+            plt.scatter(y_pred_bic, y, s=5, label=('LassoLarsBIC (RMSE={:.2f})'.format(rmse_bic)))
 
         # plt.hlines(y=0, xmin=min(y), xmax=max(y), color='k')
         y45 = np.linspace(min(y), max(y), 100)  # Adjust range as needed
@@ -2048,21 +5758,23 @@ def lasso(X, y, **kwargs):
         # plot predictions vs residuals
         y_pred_cv = stats_cv['y_pred']
         y_pred_lars_cv = stats_lars_cv['y_pred']
-        y_pred_aic = stats_aic['y_pred']
-        y_pred_bic = stats_bic['y_pred']
         res_cv = stats_cv['residuals']
         res_lars_cv = stats_lars_cv['residuals']
-        res_aic = stats_aic['residuals']
-        res_bic = stats_bic['residuals']
         rmse_cv = stats_cv['RMSE']
         rmse_lars_cv = stats_lars_cv['RMSE']
-        rmse_aic = stats_aic['RMSE']
-        rmse_bic = stats_bic['RMSE']
+        if ic:
+            y_pred_aic = stats_aic['y_pred']
+            y_pred_bic = stats_bic['y_pred']
+            res_aic = stats_aic['residuals']
+            res_bic = stats_bic['residuals']
+            rmse_aic = stats_aic['RMSE']
+            rmse_bic = stats_bic['RMSE']
         plt.figure()
         plt.scatter(y_pred_cv, (res_cv), s=40, label=('LassoCV (RMSE={:.2f})'.format(rmse_cv)))
         plt.scatter(y_pred_lars_cv, (res_lars_cv), s=15, label=('LassoLarsCV (RMSE={:.2f})'.format(rmse_lars_cv)))
-        plt.scatter(y_pred_aic, (res_aic), s=10, label=('LassoLarsAIC (RMSE={:.2f})'.format(rmse_aic)))
-        plt.scatter(y_pred_bic, (res_bic), s=5, label=('LassoLarsBIC (RMSE={:.2f})'.format(rmse_bic)))
+        if ic:
+            plt.scatter(y_pred_aic, (res_aic), s=10, label=('LassoLarsAIC (RMSE={:.2f})'.format(rmse_aic)))
+            plt.scatter(y_pred_bic, (res_bic), s=5, label=('LassoLarsBIC (RMSE={:.2f})'.format(rmse_bic)))
         plt.hlines(y=0, xmin=min(y), xmax=max(y), color='k')
         plt.title("Residuals vs. Predicted")
         plt.legend();
@@ -2071,12 +5783,13 @@ def lasso(X, y, **kwargs):
         plt.savefig("Lasso_predictions_vs_residuals.png", dpi=300)
 
     # Find the AIC and BIC of the LassoLarsAIC and LassoLarsBIC models
-    min_index_aic = model_outputs['alpha_vs_AIC_BIC']['AIC'].idxmin()
-    min_index_bic = model_outputs['alpha_vs_AIC_BIC']['BIC'].idxmin()
-    AIC_for_LassoLarsAIC = model_outputs['alpha_vs_AIC_BIC']['AIC'][min_index_aic]
-    BIC_for_LassoLarsAIC = model_outputs['alpha_vs_AIC_BIC']['BIC'][min_index_aic]
-    AIC_for_LassoLarsBIC = model_outputs['alpha_vs_AIC_BIC']['AIC'][min_index_bic]
-    BIC_for_LassoLarsBIC = model_outputs['alpha_vs_AIC_BIC']['BIC'][min_index_bic]
+    if ic:
+        min_index_aic = model_outputs['alpha_vs_AIC_BIC']['AIC'].idxmin()
+        min_index_bic = model_outputs['alpha_vs_AIC_BIC']['BIC'].idxmin()
+        AIC_for_LassoLarsAIC = model_outputs['alpha_vs_AIC_BIC']['AIC'][min_index_aic]
+        BIC_for_LassoLarsAIC = model_outputs['alpha_vs_AIC_BIC']['BIC'][min_index_aic]
+        AIC_for_LassoLarsBIC = model_outputs['alpha_vs_AIC_BIC']['AIC'][min_index_bic]
+        BIC_for_LassoLarsBIC = model_outputs['alpha_vs_AIC_BIC']['BIC'][min_index_bic]
 
     # Make the model_outputs dataframes
     list1_name = ['alpha','r-squared','adjusted r-squared',
@@ -2100,52 +5813,53 @@ def lasso(X, y, **kwargs):
     list2_lars_cv = list(stats_lars_cv['popt']['param'])
     list3_lars_cv = list1_lars_cv + list2_lars_cv
 
-    list1_aic = [model_aic.alpha_, stats_aic["rsquared"], stats_aic["adj_rsquared"], 
-                       stats_aic["n_samples"], stats_aic["df"], stats_aic["dfn"], 
-                       stats_aic["Fstat"], stats_aic["pvalue"], stats_aic["RMSE"], 
-                       stats_aic["log_likelihood"],AIC_for_LassoLarsAIC,BIC_for_LassoLarsAIC]
-    list2_aic = list(stats_aic['popt']['param'])
-    list3_aic = list1_aic + list2_aic
-
-    list1_bic = [model_bic.alpha_, stats_bic["rsquared"], stats_bic["adj_rsquared"], 
-                       stats_bic["n_samples"], stats_bic["df"], stats_bic["dfn"], 
-                       stats_bic["Fstat"], stats_bic["pvalue"], stats_bic["RMSE"], 
-                       stats_bic["log_likelihood"],AIC_for_LassoLarsBIC,BIC_for_LassoLarsBIC]
-    list2_bic = list(stats_bic['popt']['param'])
-    list3_bic = list1_bic + list2_bic
-
-    y_pred = pd.DataFrame(
-        {
-            "LassoCV": stats_cv['y_pred'],
-            "LassoLarsCV": stats_lars_cv['y_pred'],
-            "LassoLarsAIC": stats_aic['y_pred'],
-            "LassoLarsBIC": stats_bic['y_pred']
+    if ic:
+        list1_aic = [model_aic.alpha_, stats_aic["rsquared"], stats_aic["adj_rsquared"], 
+                           stats_aic["n_samples"], stats_aic["df"], stats_aic["dfn"], 
+                           stats_aic["Fstat"], stats_aic["pvalue"], stats_aic["RMSE"], 
+                           stats_aic["log_likelihood"],AIC_for_LassoLarsAIC,BIC_for_LassoLarsAIC]
+        list2_aic = list(stats_aic['popt']['param'])
+        list3_aic = list1_aic + list2_aic
+
+        list1_bic = [model_bic.alpha_, stats_bic["rsquared"], stats_bic["adj_rsquared"], 
+                           stats_bic["n_samples"], stats_bic["df"], stats_bic["dfn"], 
+                           stats_bic["Fstat"], stats_bic["pvalue"], stats_bic["RMSE"], 
+                           stats_bic["log_likelihood"],AIC_for_LassoLarsBIC,BIC_for_LassoLarsBIC]
+        list2_bic = list(stats_bic['popt']['param'])
+        list3_bic = list1_bic + list2_bic
+
+    y_pred = {
+        "LassoCV": stats_cv['y_pred'],
+        "LassoLarsCV": stats_lars_cv['y_pred']
         }
-        )
+    if ic:
+        y_pred["LassoLarsAIC"] = stats_aic['y_pred']
+        y_pred["LassoLarsBIC"] = stats_bic['y_pred']
+    y_pred = pd.DataFrame(y_pred)
     y_pred.index = y.index
     model_outputs['y_pred'] = y_pred
 
-    residuals = pd.DataFrame(
-        {
-            "LassoCV": stats_cv['residuals'],
-            "LassoLarsCV": stats_lars_cv['residuals'],
-            "LassoLarsAIC": stats_aic['residuals'],
-            "LassoLarsBIC": stats_bic['residuals']
+    residuals = {
+        "LassoCV": stats_cv['residuals'],
+        "LassoLarsCV": stats_lars_cv['residuals']
         }
-        )
+    if ic:
+        residuals["LassoLarsAIC"] = stats_aic['residuals']
+        residuals["LassoLarsBIC"] = stats_bic['residuals']
+    residuals = pd.DataFrame(residuals)
     residuals.index = y.index
     model_outputs['residuals'] = residuals
 
     # Table of all popt incl coef=0
-    popt_table = pd.DataFrame(
-        {
-            "Feature": list2_name,
-            "LassoCV": list2_cv,
-            "LassoLarsCV": list2_lars_cv,
-            "LassoLarsAIC": list2_aic,
-            "LassoLarsBIC": list2_bic
+    popt_table = {
+        "Feature": list2_name,
+        "LassoCV": list2_cv,
+        "LassoLarsCV": list2_lars_cv
         }
-        )
+    if ic:
+        popt_table["LassoLarsAIC"] = list2_aic
+        popt_table["LassoLarsBIC"] = list2_bic
+    popt_table = pd.DataFrame(popt_table)
     popt_table.set_index('Feature',inplace=True)
     model_outputs['popt_table'] = popt_table
     
@@ -2154,16 +5868,15 @@ def lasso(X, y, **kwargs):
     popt_all = {}
     pcov_all = {}
     vif_all = {}
+    vif_cache = {}    # VIFs of each set of selected features shared by the models
     # vif = pd.DataFrame()
-    col = X.columns
     # LassoCV
     model_ = model_objects['LassoCV']
     popt = stats_cv['popt'].copy()
-    X_ = X.copy()
-    for i in range(len(model_.coef_)):   # set X col to zero if coef = 0
-        if model_.coef_[i]==0:
-            X_ = X_.drop(col[i], axis = 1)
-            popt = popt.drop(index=i+1)
+    # select the columns of the nonzero coefs at once (no copy of X per drop)
+    nonzero = np.asarray(model_.coef_).ravel() != 0
+    X_ = X.loc[:, nonzero]
+    popt = popt.drop(index=[i+1 for i in np.flatnonzero(~nonzero)])
     if not X_has_dummies:
         X__ = sm.add_constant(X_)    # Add a constant for the intercept
         pcov = pd.DataFrame(np.cov(X__, rowvar=False), index=X__.columns)
@@ -2171,8 +5884,7 @@ def lasso(X, y, **kwargs):
         pcov_all['LassoCV'] = pcov
         vif = pd.DataFrame()
         vif['Feature'] = X__.columns
-        vif["VIF"] = [variance_inflation_factor(X__.values, i)
-                            for i in range(len(X__.columns))]
+        vif["VIF"] = vif_closed_form(X__, vif_cache)
         vif.set_index('Feature',inplace=True)
         vif_all["LassoCV"] = vif
     popt.set_index('Feature',inplace=True)
@@ -2180,11 +5892,10 @@ def lasso(X, y, **kwargs):
     # LassoLarsCV
     model_ = model_objects['LassoLarsCV']
     popt = stats_lars_cv['popt'].copy()
-    X_ = X.copy()
-    for i in range(len(model_.coef_)):   # set X col to zero if coef = 0
-        if model_.coef_[i]==0:
-            X_ = X_.drop(col[i], axis = 1)
-            popt = popt.drop(index=i+1)
+    # select the columns of the nonzero coefs at once (no copy of X per drop)
+    nonzero = np.asarray(model_.coef_).ravel() != 0
+    X_ = X.loc[:, nonzero]
+    popt = popt.drop(index=[i+1 for i in np.flatnonzero(~nonzero)])
     if not X_has_dummies:
         X__ = sm.add_constant(X_)    # Add a constant for the intercept
         pcov = pd.DataFrame(np.cov(X__, rowvar=False), index=X__.columns)
@@ -2192,54 +5903,50 @@ def lasso(X, y, **kwargs):
         pcov_all['LassoLarsCV'] = pcov
         vif = pd.DataFrame()
         vif['Feature'] = X__.columns
-        vif["VIF"] = [variance_inflation_factor(X__.values, i)
-                            for i in range(len(X__.columns))]
+        vif["VIF"] = vif_closed_form(X__, vif_cache)
         vif.set_index('Feature',inplace=True)
         vif_all["LassoLarsCV"] = vif
     popt.set_index('Feature',inplace=True)
     popt_all['LassoLarsCV'] = popt
-    # LassoLarsAIC
-    model_ = model_objects['LassoLarsAIC']
-    popt = stats_aic['popt'].copy()
-    X_ = X.copy()
-    for i in range(len(model_.coef_)):   # set X col to zero if coef = 0
-        if model_.coef_[i]==0:
-            X_ = X_.drop(col[i], axis = 1)
-            popt = popt.drop(index=i+1)
-    if not X_has_dummies:
-        X__ = sm.add_constant(X_)    # Add a constant for the intercept
-        pcov = pd.DataFrame(np.cov(X__, rowvar=False), index=X__.columns)
-        pcov.columns = X__.columns
-        pcov_all['LassoLarsAIC'] = pcov
-        vif = pd.DataFrame()
-        vif['Feature'] = X__.columns
-        vif["VIF"] = [variance_inflation_factor(X__.values, i)
-                            for i in range(len(X__.columns))]
-        vif.set_index('Feature',inplace=True)
-        vif_all["LassoLarsAIC"] = vif
-    popt.set_index('Feature',inplace=True)
-    popt_all['LassoLarsAIC'] = popt
-    # LassoLarsBIC
-    model_ = model_objects['LassoLarsBIC']
-    popt = stats_bic['popt'].copy()
-    X_ = X.copy()
-    for i in range(len(model_.coef_)):   # set X col to zero if coef = 0
-        if model_.coef_[i]==0:
-            X_ = X_.drop(col[i], axis = 1)
-            popt = popt.drop(index=i+1)
-    if not X_has_dummies:
-        X__ = sm.add_constant(X_)    # Add a constant for the intercept
-        pcov = pd.DataFrame(np.cov(X__, rowvar=False), index=X__.columns)
-        pcov.columns = X__.columns
-        pcov_all['LassoLarsBIC'] = pcov
-        vif = pd.DataFrame()
-        vif['Feature'] = X__.columns
-        vif["VIF"] = [variance_inflation_factor(X__.values, i)
-                            for i in range(len(X__.columns))]
-        vif.set_index('Feature',inplace=True)
-        vif_all["LassoLarsBIC"] = vif
-    popt.set_index('Feature',inplace=True)
-    popt_all['LassoLarsBIC'] = popt
+    if ic:
+        # LassoLarsAIC
+        model_ = model_objects['LassoLarsAIC']
+        popt = stats_aic['popt'].copy()
+        # select the columns of the nonzero coefs at once (no copy of X per drop)
+        nonzero = np.asarray(model_.coef_).ravel() != 0
+        X_ = X.loc[:, nonzero]
+        popt = popt.drop(index=[i+1 for i in np.flatnonzero(~nonzero)])
+        if not X_has_dummies:
+            X__ = sm.add_constant(X_)    # Add a constant for the intercept
+            pcov = pd.DataFrame(np.cov(X__, rowvar=False), index=X__.columns)
+            pcov.columns = X__.columns
+            pcov_all['LassoLarsAIC'] = pcov
+            vif = pd.DataFrame()
+            vif['Feature'] = X__.columns
+            vif["VIF"] = vif_closed_form(X__, vif_cache)
+            vif.set_index('Feature',inplace=True)
+            vif_all["LassoLarsAIC"] = vif
+        popt.set_index('Feature',inplace=True)
+        popt_all['LassoLarsAIC'] = popt
+        # LassoLarsBIC
+        model_ = model_objects['LassoLarsBIC']
+        popt = stats_bic['popt'].copy()
+        # select the columns of the nonzero coefs at once (no copy of X per drop)
+        nonzero = np.asarray(model_.coef_).ravel() != 0
+        X_ = X.loc[:, nonzero]
+        popt = popt.drop(index=[i+1 for i in np.flatnonzero(~nonzero)])
+        if not X_has_dummies:
+            X__ = sm.add_constant(X_)    # Add a constant for the intercept
+            pcov = pd.DataFrame(np.cov(X__, rowvar=False), index=X__.columns)
+            pcov.columns = X__.columns
+            pcov_all['LassoLarsBIC'] = pcov
+            vif = pd.DataFrame()
+            vif['Feature'] = X__.columns
+            vif["VIF"] = vif_closed_form(X__, vif_cache)
+            vif.set_index('Feature',inplace=True)
+            vif_all["LassoLarsBIC"] = vif
+        popt.set_index('Feature',inplace=True)
+        popt_all['LassoLarsBIC'] = popt
     # save pcov, vif, popt
     if not X_has_dummies:
         # save vif and pcov
@@ -2260,23 +5967,24 @@ def lasso(X, y, **kwargs):
         # LassoLarsCV
         vif = model_outputs['vif']['LassoLarsCV']['VIF'].values
         vif_table.loc[idx['LassoLarsCV'], "LassoLarsCV"] = vif
-        # LassoLarsAIC
-        vif = model_outputs['vif']['LassoLarsAIC']['VIF'].values
-        vif_table.loc[idx['LassoLarsAIC'], "LassoLarsAIC"] = vif
-        # LassoLarsBIC
-        vif = model_outputs['vif']['LassoLarsBIC']['VIF'].values
-        vif_table.loc[idx['LassoLarsBIC'], "LassoLarsBIC"] = vif
+        if ic:
+            # LassoLarsAIC
+            vif = model_outputs['vif']['LassoLarsAIC']['VIF'].values
+            vif_table.loc[idx['LassoLarsAIC'], "LassoLarsAIC"] = vif
+            # LassoLarsBIC
+            vif = model_outputs['vif']['LassoLarsBIC']['VIF'].values
+            vif_table.loc[idx['LassoLarsBIC'], "LassoLarsBIC"] = vif
         model_outputs['vif_table'] = vif_table
     
-    stats = pd.DataFrame(
-        {
-            "Statistic": list1_name,
-            "LassoCV": list1_cv,
-            "LassoLarsCV": list1_lars_cv,
-            "LassoLarsAIC": list1_aic,
-            "LassoLarsBIC": list1_bic
+    stats = {
+        "Statistic": list1_name,
+        "LassoCV": list1_cv,
+        "LassoLarsCV": list1_lars_cv
         }
-        )
+    if ic:
+        stats["LassoLarsAIC"] = list1_aic
+        stats["LassoLarsBIC"] = list1_bic
+    stats = pd.DataFrame(stats)
     stats.set_index('Statistic',inplace=True)
     model_outputs['stats'] = stats
     
@@ -2298,6 +6006,12 @@ def lasso(X, y, **kwargs):
                 print(model_outputs['vif_table'].to_markdown(index=True))
                 print('')
 
+    # Peak memory of the process (MB) and how much this call raised it
+    peak = peak_memory()
+    model_outputs['peak_memory'] = peak
+    model_outputs['peak_memory_increase'] = (None if peak is None or peak_start is None 
+        else peak - peak_start)
+
     # Print the run time
     fit_time = time.time() - start_time
     print('Done')
@@ -2309,7 +6023,91 @@ def lasso(X, y, **kwargs):
 
     return model_objects, model_outputs
 
-def vif_ridge(X, pen_factors, is_corr=False):
+def vif_standardized():
+
+    """
+    PURPOSE
+    True if the installed statsmodels variance_inflation_factor standardizes
+    the columns by default (statsmodels >= 0.15), which gives a constant
+    column a VIF of 1, or False if it regresses the raw columns
+    """
+
+    import inspect
+    from statsmodels.stats.outliers_influence import variance_inflation_factor
+
+    param = inspect.signature(variance_inflation_factor).parameters.get('standardize')
+
+    return param is not None and bool(param.default)
+
+def vif_closed_form(X_, cache=None):
+
+    """
+    PURPOSE
+    Variance Inflation Factors of every column of X_ from one inverse of the
+    correlation matrix of the features, instead of one auxiliary regression 
+    per column. The VIF of feature j is the diagonal element j of the inverse 
+    of the correlation matrix, and the VIF of the constant is 
+    1 + n * m' inv(R) m, where m are the means of the features divided by 
+    their root sum of squares about the mean (or 1 if statsmodels 
+    standardizes the columns, see vif_standardized).
+    The result is the same as the statsmodels loop
+    [variance_inflation_factor(X_.values, i) for i in range(X_.shape[1])],
+    which is used instead if X_ does not have exactly one constant column,
+    or if the correlation matrix is singular.
+    USAGE
+    vif = vif_closed_form(X_, cache=None)
+    INPUT
+    X_ = dataframe of the features with a constant from sm.add_constant
+    cache = optional dictionary to keep the VIFs of each set of columns
+        of X_, so that models with the same selected features share them 
+        (the dictionary must only be used with the same rows of X_)
+    OUTPUT
+    vif = numpy array of the VIF of each column of X_
+    """
+
+    import numpy as np
+    import pandas as pd
+    from statsmodels.stats.outliers_influence import variance_inflation_factor
+
+    cols = list(X_.columns)
+    key = frozenset(cols)
+    if cache is not None and key in cache:
+        return cache[key].reindex(cols).values
+
+    Xv = np.asarray(X_, dtype=float)
+    n, ncols = Xv.shape
+    is_const = np.ptp(Xv, axis=0) == 0
+    vif = None
+    if is_const.sum() == 1 and ncols > 1:
+        i_const = int(np.nonzero(is_const)[0][0])
+        feat = [i for i in range(ncols) if i != i_const]
+        x_mean = Xv[:, feat].mean(axis=0)
+        Xc = Xv[:, feat] - x_mean
+        ss = np.sqrt(np.einsum('ij,ij->j', Xc, Xc))
+        try:
+            R_inv = np.linalg.inv((Xc.T @ Xc) / np.outer(ss, ss))
+            vif_feat = np.diag(R_inv)
+            ok = np.isfinite(vif_feat).all() and (vif_feat > 1 - 1e-8).all()
+        except np.linalg.LinAlgError:
+            ok = False
+        if ok:
+            vif = np.empty(ncols)
+            # statsmodels caps the r-squared of the auxiliary regressions
+            vif[feat] = np.minimum(vif_feat, 1e15)
+            if vif_standardized():
+                vif[i_const] = 1.0
+            else:
+                m = x_mean / ss
+                vif[i_const] = min(1 + n * m @ R_inv @ m, 1e15)
+    if vif is None:
+        vif = np.array([variance_inflation_factor(Xv, i) for i in range(ncols)])
+
+    if cache is not None:
+        cache[key] = pd.Series(vif, index=cols)
+
+    return vif
+
+def vif_ridge(X, pen_factors, is_corr=False, method='eigh', dtype=None):
 
     """
     Variance Inflation Factor for Ridge regression 
@@ -2337,6 +6135,18 @@ def vif_ridge(X, pen_factors, is_corr=False):
         (see explanation in note below for difference between sklearn and statsmodels)
     is_corr : bool (default False)
         Boolean to indicate how corr_x is interpreted, see corr_x
+    method : 'eigh' (default) or 'inv'
+        'eigh': eigendecompose the correlation matrix once as Q diag(lam) Q'
+            and evaluate the VIF of all penalty factors k at once as
+            vif[k, j] = sum_m Q[j,m]**2 * lam[m] / (lam[m] + k)**2
+        'inv': invert corr + k * I for each penalty factor
+        (the two methods give the same VIF to rounding error, 
+        and 'inv' is used if the correlation matrix has nan values)
+    dtype : None (default) or np.float32
+        None computes in float64, and np.float32 computes the 'eigh'
+        method in single precision for less memory and time with 
+        very wide X (relative error of about 1e-6 of the float64 VIF, 
+        and up to about 1e-5 with strongly correlated columns)
 
     Returns
     -------
@@ -2344,8 +6154,6 @@ def vif_ridge(X, pen_factors, is_corr=False):
         variance inflation factors for parameters in columns and 
         ridge penalization factors in rows
 
-    could be optimized for repeated calculations
-
     Note about scaling of alpha in statsmodels vs sklearn 
     -------
     An analysis by Paul Zivich (https://sph.unc.edu/adv_profile/paul-zivich/) explains 
@@ -2407,6 +6215,16 @@ def vif_ridge(X, pen_factors, is_corr=False):
     else:
         corr = X
 
+    if method == 'eigh' and np.all(np.isfinite(corr)):
+        dtype = np.float64 if dtype is None else dtype
+        lam, Q = np.linalg.eigh(np.asarray(corr, dtype=dtype))
+        if not is_corr and X.shape[0] <= X.shape[1]:
+            # corr of n rows has rank n - 1 at most, and its other (zero)
+            # eigenvalues are rounding errors that would be divided by k**2
+            lam[:X.shape[1] - X.shape[0] + 1] = 0
+        k = np.asarray(pen_factors, dtype=dtype).reshape(-1, 1)
+        return (lam / (lam + k)**2) @ (Q**2).T
+
     eye = np.eye(corr.shape[1])
     res = []
     for k in pen_factors:
@@ -2416,6 +6234,89 @@ def vif_ridge(X, pen_factors, is_corr=False):
 
     return np.asarray(res)
 
+def ridge_svd(X, y, alphas):
+
+    """
+    PURPOSE
+    Ridge regression for every alpha from one thin SVD of the centered X.
+    With Xc = U S V', the coefficients, the leave-one-out errors of RidgeCV,
+    and the VIF of vif_ridge are spectral filters of the singular values
+    for each alpha, so that the cost is one decomposition plus
+    matrix products over all alphas at once, instead of a separate fit
+    and matrix inverse for each alpha. The coefficients and errors are
+    the same as sklearn Ridge(alpha) and RidgeCV(alphas, store_cv_results=True)
+    USAGE
+    svd = ridge_svd(X, y, alphas)
+    INPUT
+    X = dataframe of the independent variables
+    y = series of the dependent variable
+    alphas = array of the alphas of sklearn Ridge
+    OUTPUT
+    svd = dictionary with the following:
+        'coef': n_alpha x p array of the coefficients for each alpha
+        'intercept': array of the intercepts for each alpha
+        'RidgeCV': fitted sklearn RidgeCV model (leave-one-out)
+        'vif': n_alpha x p array of the VIF of vif_ridge(X, alphas / n)
+            for each alpha, or None if the columns of X do not all have 
+            the same variance (such as X that is not standardized),
+            in which case the VIF need vif_ridge
+    """
+
+    import numpy as np
+    from sklearn.linear_model import RidgeCV
+
+    Xv = np.asarray(X, dtype=float)
+    yv = np.asarray(y, dtype=float).ravel()
+    n, p = Xv.shape
+    alphas = np.asarray(alphas, dtype=float)
+    x_mean = Xv.mean(axis=0)
+    y_mean = yv.mean()
+    Xc = Xv - x_mean
+    yc = yv - y_mean
+    U, s, Vt = np.linalg.svd(Xc, full_matrices=False)
+    Uty = U.T @ yc
+    s2 = s**2
+
+    # coefficients of every alpha: V diag(s / (s^2 + alpha)) U'y
+    coef = (s / (s2 + alphas[:, np.newaxis]) * Uty) @ Vt
+    intercept = y_mean - coef @ x_mean
+
+    # leave-one-out errors of every alpha from the residuals and the
+    # diagonal of the hat matrix 11'/n + U diag(s^2 / (s^2 + alpha)) U'
+    shrink = s2 / (s2 + alphas[:, np.newaxis])
+    residuals = yc[:, np.newaxis] - U @ (shrink * Uty).T
+    leverage = 1 / n + (U**2) @ shrink.T
+    cv_results = (residuals / (1 - leverage))**2
+    i_best = np.argmin(cv_results.mean(axis=0))
+
+    model_cv = RidgeCV(alphas=alphas, store_cv_results=True)
+    model_cv.alpha_ = float(alphas[i_best])
+    model_cv.best_score_ = -cv_results[:, i_best].mean()
+    model_cv.cv_results_ = cv_results
+    model_cv.coef_ = coef[i_best].copy()
+    model_cv.intercept_ = intercept[i_best]
+    model_cv.n_features_in_ = p
+    if hasattr(X, 'columns') and all(isinstance(c, str) for c in X.columns):
+        model_cv.feature_names_in_ = np.asarray(X.columns, dtype=object)
+
+    # VIF of the correlation matrix V diag(s^2 / ss) V' of columns with
+    # the same sum of squares ss, with the penalty factors alphas / n
+    vif = None
+    ss = np.sum(Xc**2, axis=0)
+    if ss[0] > 0 and np.allclose(ss, ss[0]):
+        lam = s2 / ss[0]
+        k = alphas[:, np.newaxis] / n
+        vif = (lam / (lam + k)**2) @ (Vt**2)
+
+    svd = {
+        'coef': coef,
+        'intercept': intercept,
+        'RidgeCV': model_cv,
+        'vif': vif
+        }
+
+    return svd
+
 def ridge(X, y, **kwargs):
 
     """
@@ -2441,7 +6342,18 @@ def ridge(X, y, **kwargs):
         alpha_max= maximum value of range of alphas to evaluate (default=1e3)
         n_alpha= number of log-spaced alphas to evaluate (default=100)
         vif_target= VIF target for use with RidgeVIF (default=1.0)
+        engine= 'svd' (default) or 'sklearn' where
+            'svd': coefficients, RidgeCV leave-one-out errors, and VIF
+                of every alpha from one SVD of X (ridge_svd)
+            'sklearn': fit sklearn Ridge for each alpha and RidgeCV
+        nfolds= number of folds of the k-fold CV of RidgeCV if X is a 
+            scipy sparse matrix (default 5)
+        feature_names= list of the column names of X if X is a scipy 
+            sparse matrix, e.g. preprocess_train(df, sparse=True)['feature_names']
         verbose= 'on' (default), 'off', or 1=show stats and residuals plot
+        copy= True (default) to fit copies of X, or False to skip
+            the copies of X and of its scaled or preprocessed versions
+            to reduce the peak memory (X is not changed either way)
 
     Standardization is generally recommended for Ridge regression.
 
@@ -2471,6 +6383,8 @@ def ridge(X, y, **kwargs):
                 - 'vif_table': Variance Inlfation Factors of features of 
                     all methods in one table
                 - 'stats': Regression statistics for each model
+                - 'peak_memory': peak memory of the python process (MB) and
+                    'peak_memory_increase': how much this call raised it (MB)
 
     NOTE
     Do any necessary/optional cleaning of the data before 
@@ -2479,12 +6393,21 @@ def ridge(X, y, **kwargs):
     columns as needed, but y should only be one column. X should have unique
     column names for for each column
 
+    X can also be a scipy sparse matrix (e.g. from preprocess_train with 
+    sparse=True), which is used without converting it to a dense array. 
+    Only RidgeCV is fitted for a sparse X, with k-fold CV instead of 
+    leave-one-out CV, because the SVD, leave-one-out CV, and VIF of RidgeVIF 
+    need dense matrices, and the outputs are those of linear_sparse.
+
     EXAMPLE 
     model_objects, model_outputs = ridge(X, y)
 
     """
 
     from EasyMLR import stats_given_model, vif_ridge, detect_dummy_variables
+    from EasyMLR import peak_memory
+    from EasyMLR import ridge_svd, linear_sparse
+    from scipy.sparse import issparse
     import time
     import pandas as pd
     import numpy as np
@@ -2506,21 +6429,25 @@ def ridge(X, y, **kwargs):
         'alpha_max': 1.0e3,
         'n_alpha': 100,
         'vif_target': 1.0,
-        'verbose': 'on'
+        'engine': 'svd',
+        'nfolds': 5,
+        'feature_names': None,
+        'verbose': 'on',
+        'copy': True
         }
 
     # Update input data argumements with any provided keyword arguments in kwargs
     data = {**defaults, **kwargs}
 
+    from EasyMLR import check_X_y
+    X, y = check_X_y(X,y,copy=data['copy'])
+
     # check for input errors
     has_dummies = detect_dummy_variables(X)
     # if ctrl:
     #     print('Check X: Ridge can not handle dummies. Try using lasso if X has dummies.','\n')
     #     sys.exit()
 
-    from EasyMLR import check_X_y
-    X, y = check_X_y(X,y)
-
     ctrl = data['alpha_min'] > 0 
     if not ctrl:
         print('Check inputs of alpha_min, it must be greater than zero!','\n')
@@ -2533,6 +6460,10 @@ def ridge(X, y, **kwargs):
     if not ctrl:
         print('Check inputs of n_alpha, it must be greater than 1!','\n')
         sys.exit()
+    ctrl = data['engine'] in ['svd', 'sklearn']
+    if not ctrl:
+        print("Check inputs of engine, it must be 'svd' or 'sklearn'!",'\n')
+        sys.exit()
         
     # Suppress warnings
     warnings.filterwarnings('ignore')
@@ -2542,6 +6473,16 @@ def ridge(X, y, **kwargs):
 
     # Set start time for calculating run time
     start_time = time.time()
+    peak_start = peak_memory()
+
+    # RidgeCV of a sparse X without densifying it
+    if issparse(X):
+        return linear_sparse(X, y, 
+            {'RidgeCV': RidgeCV(cv=data['nfolds'])},
+            alpha_min=data['alpha_min'], alpha_max=data['alpha_max'], 
+            n_alpha=data['n_alpha'], start_time=start_time, peak_start=peak_start,
+            feature_names=data['feature_names'], standardize=data['standardize'],
+            title='Ridge', verbose=data['verbose'])
 
     # Initialize output dictionaries
     model_objects = {}
@@ -2549,20 +6490,22 @@ def ridge(X, y, **kwargs):
 
     # Standardized X (X_scaled)
     scaler = StandardScaler().fit(X)
-    X_scaled = scaler.transform(X)
-    # Convert scaled arrays into pandas dataframes with same column names as X
-    X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
-    # Copy index from unscaled to scaled dataframes
-    X_scaled.index = X.index
     # model_outputs['X_scaled'] = X_scaled                 # standardized X
     model_outputs['scaler'] = scaler                     # scaler used to standardize X
     model_outputs['standardize'] = data['standardize']   # True: X_scaled was used to fit, False: X was used
 
     # Specify X to be used for fitting the models 
+    # (X_scaled is only made if it is used, and copy=False uses
+    # X_scaled or X as they are instead of copies of them)
     if data['standardize']:
-        X = X_scaled.copy()
+        X_scaled = scaler.transform(X)
+        # Convert scaled arrays into pandas dataframes with same column names as X
+        X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
+        # Copy index from unscaled to scaled dataframes
+        X_scaled.index = X.index
+        X = X_scaled.copy() if data['copy'] else X_scaled
     else:
-        X = X.copy()
+        X = X.copy() if data['copy'] else X
 
     # Calculate the role of alpha vs coefficient values
     alpha_min = np.log10(data['alpha_min'])
@@ -2571,14 +6514,19 @@ def ridge(X, y, **kwargs):
     alphas = 10**np.linspace(alpha_min,alpha_max,n_alpha)
     # alphas = np.logspace(data['alpha_min'],data['alpha_max'],data['n_alpha'])
     # ridge = Ridge(max_iter=15000)
-    ridge = Ridge()
     coefs = []
     pen_factors = []
     n_samples, n_columns = X.shape   # sklearn ridge scales alpha by n_samples
-    for a in alphas:
-        ridge.set_params(alpha=a)
-        ridge.fit(X, y)
-        coefs.append(ridge.coef_)
+    if data['engine'] == 'svd':
+        # every alpha from one SVD of X
+        svd = ridge_svd(X, y, alphas)
+        coefs = list(svd['coef'])
+    else:
+        ridge = Ridge()
+        for a in alphas:
+            ridge.set_params(alpha=a)
+            ridge.fit(X, y)
+            coefs.append(ridge.coef_)
 
     if not has_dummies:
         pen_factors = alphas / n_samples   # use this line if using sklearn Ridge
@@ -2590,7 +6538,10 @@ def ridge(X, y, **kwargs):
             'alpha': alphas,
             'pen_factors':pen_factors
             }).set_index("alpha")
-        vifs = pd.DataFrame(vif_ridge(X, pen_factors))
+        if data['engine'] == 'svd' and svd['vif'] is not None:
+            vifs = pd.DataFrame(svd['vif'])
+        else:
+            vifs = pd.DataFrame(vif_ridge(X, pen_factors))
         vifs.columns = X.columns
         vifs_ = vifs.copy()     # vifs_ = vifs before inserting alphas
         vifs.insert(0, 'alpha', alphas)
@@ -2601,7 +6552,10 @@ def ridge(X, y, **kwargs):
     model_outputs['alpha_vs_penalty'] = alpha_vs_penalty
     
     # RidgeCV default using MSE
-    model_cv = RidgeCV(alphas=alphas, store_cv_results=True).fit(X, y)
+    if data['engine'] == 'svd':
+        model_cv = svd['RidgeCV']
+    else:
+        model_cv = RidgeCV(alphas=alphas, store_cv_results=True).fit(X, y)
     model_objects['RidgeCV'] = model_cv
     alpha_cv = model_cv.alpha_
     # Get the cross-validated MSE for each alpha
@@ -2614,7 +6568,15 @@ def ridge(X, y, **kwargs):
         rmse_vif_res = np.sqrt(np.sum((vif_target-vifs_)**2,1))
         idx = (np.abs(rmse_vif_res)).argmin()
         best_alpha_vif = alphas[idx]
-        model_vif = Ridge(alpha=best_alpha_vif).fit(X, y)
+        if data['engine'] == 'svd':
+            model_vif = Ridge(alpha=best_alpha_vif)
+            model_vif.coef_ = svd['coef'][idx]
+            model_vif.intercept_ = svd['intercept'][idx]
+            model_vif.n_features_in_ = model_cv.n_features_in_
+            if hasattr(model_cv, 'feature_names_in_'):
+                model_vif.feature_names_in_ = model_cv.feature_names_in_
+        else:
+            model_vif = Ridge(alpha=best_alpha_vif).fit(X, y)
         model_objects['RidgeVIF'] = model_vif  
         model_outputs['best_alpha_vif'] = best_alpha_vif
     
@@ -2824,7 +6786,10 @@ def ridge(X, y, **kwargs):
         pf_cv = np.array(df[df['alpha'] == alphas[0]]['pen_factors'])
         pf_vif = np.array(df[df['alpha'] == alphas[1]]['pen_factors'])
         pen_factors = [pf_cv, pf_vif]
-        vif_calc = vif_ridge(X,pen_factors)
+        if data['engine'] == 'svd' and svd['vif'] is not None:
+            vif_calc = svd['vif'][[np.argmax(df['alpha'] == a) for a in alphas]]
+        else:
+            vif_calc = vif_ridge(X,pen_factors)
     
     # Calculate the covariance matrix of the features
     popt_all = {}
@@ -2833,16 +6798,13 @@ def ridge(X, y, **kwargs):
         pcov_all = {}
         vif_all = {}
     
-    col = X.columns
-
     # RidgeCV
     model_ = model_objects['RidgeCV']
     popt = stats_cv['popt'].copy()
-    X_ = X.copy()
-    for i in range(len(model_.coef_)):   # set X col to zero if coef = 0
-        if model_.coef_[i]==0:
-            X_ = X_.drop(col[i], axis = 1)
-            popt = popt.drop(index=i+1)
+    # select the columns of the nonzero coefs at once (no copy of X per drop)
+    nonzero = np.asarray(model_.coef_).ravel() != 0
+    X_ = X.loc[:, nonzero]
+    popt = popt.drop(index=[i+1 for i in np.flatnonzero(~nonzero)])
     if not has_dummies:
         X__ = sm.add_constant(X_)    # Add a constant for the intercept
         pcov = pd.DataFrame(np.cov(X__, rowvar=False), index=X__.columns)
@@ -2861,11 +6823,10 @@ def ridge(X, y, **kwargs):
         # RidgeVIF
         model_ = model_objects['RidgeVIF']
         popt = stats_vif['popt'].copy()
-        X_ = X.copy()
-        for i in range(len(model_.coef_)):   # set X col to zero if coef = 0
-            if model_.coef_[i]==0:
-                X_ = X_.drop(col[i], axis = 1)
-                popt = popt.drop(index=i+1)
+        # select the columns of the nonzero coefs at once (no copy of X per drop)
+        nonzero = np.asarray(model_.coef_).ravel() != 0
+        X_ = X.loc[:, nonzero]
+        popt = popt.drop(index=[i+1 for i in np.flatnonzero(~nonzero)])
         X__ = sm.add_constant(X_)    # Add a constant for the intercept
         pcov = pd.DataFrame(np.cov(X__, rowvar=False), index=X__.columns)
         pcov.columns = X__.columns
@@ -2922,6 +6883,12 @@ def ridge(X, y, **kwargs):
                 print(model_outputs['vif_table'].to_markdown(index=True))
                 print('')
 
+    # Peak memory of the process (MB) and how much this call raised it
+    peak = peak_memory()
+    model_outputs['peak_memory'] = peak
+    model_outputs['peak_memory_increase'] = (None if peak is None or peak_start is None 
+        else peak - peak_start)
+
     # Print the run time
     fit_time = time.time() - start_time
     print('Done')
@@ -2968,7 +6935,21 @@ def elastic(X, y, **kwargs):
             the different values are tested by cross-validation 
             and the one giving the best prediction score is used. 
             default is l1_ratio= np.linspace(0.01,1,100)        
+        fold_plan= model_outputs['fold_plan'] of lasso with the same X, y,
+            nfolds, and standardize to reuse its folds and cross-products
+            (default None computes them)
+        n_jobs= number of worker processes for the cross-validation of 
+            the pairs of l1_ratio and fold (default 1, -1 uses all cores)
+        screening= 'auto' (default), 'on', or 'off' to skip features that 
+            the strong rule shows are zero in the coordinate descent of 
+            ElasticNetCV, with KKT checks ('auto' screens when X has more 
+            columns than rows)
+        feature_names= list of the column names of X if X is a scipy 
+            sparse matrix, e.g. preprocess_train(df, sparse=True)['feature_names']
         verbose= 'on' (default), 'off', or 1=show stats and residuals plot
+        copy= True (default) to fit copies of X, or False to skip
+            the copies of X and of its scaled or preprocessed versions
+            to reduce the peak memory (X is not changed either way)
 
     Standardization is generally recommended for ElasticNet regression.
 
@@ -2990,6 +6971,8 @@ def elastic(X, y, **kwargs):
                 - 'standardize': True scaler was used for X, False scaler not used
                 - 'alpha_vs_coef': model coefficients for each X variable
                     as a function of alpha using ElasticNet
+                - 'screening': numbers of features screened by the strong 
+                    rule in ElasticNetCV (see enet_path_cv)
                 - 'y_pred': Predicted y values
                 - 'residuals': Residuals (y-y_pred) for each of the four methods
                 - 'popt': Constant (intercept) and coefficients for the 
@@ -2999,6 +6982,8 @@ def elastic(X, y, **kwargs):
                 - 'pcov': Covariance matrix of features 
                 - 'vif': Variance Inlfation Factors of features
                 - 'stats': Regression statistics for each model
+                - 'peak_memory': peak memory of the python process (MB) and
+                    'peak_memory_increase': how much this call raised it (MB)
 
     NOTE
     Do any necessary/optional cleaning of the data before 
@@ -3007,24 +6992,30 @@ def elastic(X, y, **kwargs):
     columns as needed, but y should only be one column. X should have unique
     column names for for each column
 
+    X can also be a scipy sparse matrix (e.g. from preprocess_train with 
+    sparse=True), which is fitted with sklearn ElasticNetCV without 
+    converting it to a dense array, and the outputs are those of linear_sparse.
+
     EXAMPLE 
     model_objects, model_outputs = elastic(X, y)
 
     """
 
     from EasyMLR import stats_given_model, detect_dummy_variables
+    from EasyMLR import peak_memory
+    from EasyMLR import enet_path_cv, fold_plan, linear_sparse
+    from scipy.sparse import issparse
     import time
     import pandas as pd
     import numpy as np
-    from sklearn.linear_model import ElasticNet, ElasticNetCV
-    from sklearn.linear_model import MultiTaskElasticNet, MultiTaskElasticNetCV
+    from sklearn.linear_model import ElasticNetCV
     from sklearn.preprocessing import StandardScaler
     from sklearn.metrics import PredictionErrorDisplay
     import matplotlib.pyplot as plt
     import warnings
     import sys
     import statsmodels.api as sm
-    from statsmodels.stats.outliers_influence import variance_inflation_factor
+    from EasyMLR import vif_closed_form
    
     # Define default values of input data arguments
     defaults = {
@@ -3034,14 +7025,19 @@ def elastic(X, y, **kwargs):
         'alpha_max': 1.0e3,
         'n_alpha': 100,
         'l1_ratio': np.linspace(0.01,1,100),      # e.g. 0.5 or list [.1, .5, .7, .9, .95, .99, 1]
-        'verbose': 'on'
+        'fold_plan': None,
+        'n_jobs': 1,
+        'screening': 'auto',
+        'feature_names': None,
+        'verbose': 'on',
+        'copy': True
         }
 
     # Update input data argumements with any provided keyword arguments in kwargs
     data = {**defaults, **kwargs}
 
     from EasyMLR import check_X_y
-    X, y = check_X_y(X,y)
+    X, y = check_X_y(X,y,copy=data['copy'])
 
     ctrl = data['alpha_min'] > 0 
     if not ctrl:
@@ -3068,6 +7064,17 @@ def elastic(X, y, **kwargs):
 
     # Set start time for calculating run time
     start_time = time.time()
+    peak_start = peak_memory()
+
+    # ElasticNetCV of a sparse X without densifying it
+    if issparse(X):
+        return linear_sparse(X, y, 
+            {'ElasticNetCV': ElasticNetCV(l1_ratio=data['l1_ratio'], 
+                cv=data['nfolds'], n_jobs=data['n_jobs'])},
+            alpha_min=data['alpha_min'], alpha_max=data['alpha_max'], 
+            n_alpha=data['n_alpha'], start_time=start_time, peak_start=peak_start,
+            feature_names=data['feature_names'], standardize=data['standardize'],
+            title='Elastic Net', verbose=data['verbose'])
 
     # check if X contains dummy variables
     X_has_dummies = detect_dummy_variables(X)
@@ -3080,29 +7087,22 @@ def elastic(X, y, **kwargs):
 
     # Standardized X (X_scaled)
     scaler = StandardScaler().fit(X)
-    X_scaled = scaler.transform(X)
-    # Convert scaled arrays into pandas dataframes with same column names as X
-    X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
-    # Copy index from unscaled to scaled dataframes
-    X_scaled.index = X.index
     # model_outputs['X_scaled'] = X_scaled                 # standardized X
     model_outputs['scaler'] = scaler                     # scaler used to standardize X
     model_outputs['standardize'] = data['standardize']   # True: X_scaled was used to fit, False: X was used
 
     # Specify X to be used for fitting the models 
+    # (X_scaled is only made if it is used, and copy=False uses
+    # X_scaled or X as they are instead of copies of them)
     if data['standardize']:
-        X = X_scaled.copy()
+        X_scaled = scaler.transform(X)
+        # Convert scaled arrays into pandas dataframes with same column names as X
+        X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
+        # Copy index from unscaled to scaled dataframes
+        X_scaled.index = X.index
+        X = X_scaled.copy() if data['copy'] else X_scaled
     else:
-        X = X.copy()
-
-    # ElasticNetCV k-fold cross validation
-    model_cv = ElasticNetCV(l1_ratio=data['l1_ratio'], cv=data['nfolds'], 
-        random_state=0).fit(X, y)
-    model_objects['ElasticNetCV'] = model_cv
-    # model_objects = model_cv
-    alpha_ = model_cv.alpha_
-    l1_ratio_ = model_cv.l1_ratio_
-    l1_ratio_idx = np.where(data['l1_ratio'] == model_cv.l1_ratio_)[0]
+        X = X.copy() if data['copy'] else X
 
     # Calculate the role of alpha vs coefficient values at best fit l1_ratio
     alpha_min = np.log10(data['alpha_min'])
@@ -3110,12 +7110,31 @@ def elastic(X, y, **kwargs):
     n_alpha = data['n_alpha']    
     alphas = 10**np.linspace(alpha_min,alpha_max,n_alpha)
     # alphas = 10**np.linspace(-3,3,100)
-    elastic = ElasticNet(l1_ratio=model_cv.l1_ratio_)
-    coefs = []
-    for a in alphas:
-        elastic.set_params(alpha=a)
-        elastic.fit(X, y)
-        coefs.append(elastic.coef_)
+
+    # Fold plan of the k-fold cross validation, reused from lasso if provided
+    plan = data['fold_plan']
+    if plan is None:
+        plan = fold_plan(X, y, data['nfolds'])
+    ctrl = (plan['nfolds'] == data['nfolds'] and plan['n'] == X.shape[0]
+        and plan['features'] == list(map(str, X.columns))
+        and np.allclose(plan['x_mean'], X.mean(axis=0))
+        and np.isclose(plan['y_mean'], np.mean(y)))
+    if not ctrl:
+        print('Check fold_plan: it needs to be from lasso with the same X, y, nfolds, and standardize!','\n')
+        sys.exit()
+
+    # ElasticNetCV k-fold cross validation, and the coefficients for each 
+    # alpha from the same warm-started path at the best fit l1_ratio
+    model_cv, coefs, screening = enet_path_cv(X, y, alphas, l1_ratio=data['l1_ratio'], 
+        nfolds=data['nfolds'], plan=plan, n_jobs=data['n_jobs'], 
+        screening=data['screening'])
+    model_outputs['screening'] = screening
+    model_objects['ElasticNetCV'] = model_cv
+    # model_objects = model_cv
+    alpha_ = model_cv.alpha_
+    l1_ratio_ = model_cv.l1_ratio_
+    l1_ratio_idx = np.where(data['l1_ratio'] == model_cv.l1_ratio_)[0]
+
     alpha_vs_coef = pd.DataFrame({
         'alpha': alphas,
         'coef': coefs
@@ -3245,16 +7264,15 @@ def elastic(X, y, **kwargs):
     popt_all = {}
     pcov_all = {}
     vif_all = {}
+    vif_cache = {}    # VIFs of each set of selected features shared by the models
     # vif = pd.DataFrame()
-    col = X.columns
     # ElasticNetCV
     model_ = model_objects['ElasticNetCV']
     popt = stats_cv['popt'].copy()
-    X_ = X.copy()
-    for i in range(len(model_.coef_)):   # set X col to zero if coef = 0
-        if model_.coef_[i]==0:
-            X_ = X_.drop(col[i], axis = 1)
-            popt = popt.drop(index=i+1)
+    # select the columns of the nonzero coefs at once (no copy of X per drop)
+    nonzero = np.asarray(model_.coef_).ravel() != 0
+    X_ = X.loc[:, nonzero]
+    popt = popt.drop(index=[i+1 for i in np.flatnonzero(~nonzero)])
     if not X_has_dummies:
         X__ = sm.add_constant(X_)    # Add a constant for the intercept
         pcov = pd.DataFrame(np.cov(X__, rowvar=False), index=X__.columns)
@@ -3262,8 +7280,7 @@ def elastic(X, y, **kwargs):
         pcov_all['ElasticNetCV'] = pcov
         vif = pd.DataFrame()
         vif['Feature'] = X__.columns
-        vif["VIF"] = [variance_inflation_factor(X__.values, i)
-                            for i in range(len(X__.columns))]
+        vif["VIF"] = vif_closed_form(X__, vif_cache)
         vif.set_index('Feature',inplace=True)
         vif_all["ElasticNetCV"] = vif
     popt.set_index('Feature',inplace=True)
@@ -3314,6 +7331,12 @@ def elastic(X, y, **kwargs):
                 print(model_outputs['vif_table'].to_markdown(index=True))
                 print('')
 
+    # Peak memory of the process (MB) and how much this call raised it
+    peak = peak_memory()
+    model_outputs['peak_memory'] = peak
+    model_outputs['peak_memory_increase'] = (None if peak is None or peak_start is None 
+        else peak - peak_start)
+
     # Print the run time
     fit_time = time.time() - start_time
     print('Done')
@@ -4040,6 +8063,9 @@ def svr_auto(X, y, **kwargs):
     OPTIONAL KEYWORD ARGUMENTS
     **kwargs (optional keyword arguments):
         verbose= 'on' (default) or 'off'
+        copy= True (default) to fit copies of X, or False to skip
+            the copies of X and of its scaled or preprocessed versions
+            to reduce the peak memory (X is not changed either way)
         standardize= True (default) or False where
             True: standardize X using sklearn.preprocessing StandardScaler
             False: do not standardize X (only used if X is already standardized)
@@ -4084,6 +8110,8 @@ def svr_auto(X, y, **kwargs):
                 - 'y_pred': Predicted y values
                 - 'residuals': Residuals (y-y_pred) for each of the four methods
                 - 'stats': Regression statistics for each model
+                - 'peak_memory': peak memory of the python process (MB) and
+                    'peak_memory_increase': how much this call raised it (MB)
 
     NOTE
     Do any necessary/optional cleaning of the data before 
@@ -4098,6 +8126,7 @@ def svr_auto(X, y, **kwargs):
     """
 
     from EasyMLR import stats_given_y_pred, detect_dummy_variables, detect_gpu
+    from EasyMLR import peak_memory
     import time
     import pandas as pd
     import numpy as np
@@ -4125,6 +8154,7 @@ def svr_auto(X, y, **kwargs):
         'gpu': True,                        # Autodetect to use gpu if present
         'standardize': True,
         'verbose': 'on',
+        'copy': True,
 
         # params for model that are optimized by optuna
         'C': [0.1, 1000],           # range of C Regularization parameter. The strength of the regularization is inversely proportional to C. Must be strictly positive. The penalty is a squared l2.
@@ -4157,13 +8187,14 @@ def svr_auto(X, y, **kwargs):
         data['device'] = 'cpu'
 
     from EasyMLR import check_X_y
-    X, y = check_X_y(X,y)
+    X, y = check_X_y(X,y,copy=data['copy'])
 
     # Suppress warnings
     warnings.filterwarnings('ignore')
 
     # Set start time for calculating run time
     start_time = time.time()
+    peak_start = peak_memory()
 
     # Set global random seed
     np.random.seed(data['random_state'])
@@ -4177,20 +8208,22 @@ def svr_auto(X, y, **kwargs):
 
     # Standardized X (X_scaled)
     scaler = StandardScaler().fit(X)
-    X_scaled = scaler.transform(X)
-    # Convert scaled arrays into pandas dataframes with same column names as X
-    X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
-    # Copy index from unscaled to scaled dataframes
-    X_scaled.index = X.index
     # model_outputs['X_scaled'] = X_scaled                 # standardized X
     model_outputs['scaler'] = scaler                     # scaler used to standardize X
     model_outputs['standardize'] = data['standardize']   # True: X_scaled was used to fit, False: X was used
 
     # Specify X to be used for fitting the models 
+    # (X_scaled is only made if it is used, and copy=False uses
+    # X_scaled or X as they are instead of copies of them)
     if data['standardize']:
-        X = X_scaled.copy()
+        X_scaled = scaler.transform(X)
+        # Convert scaled arrays into pandas dataframes with same column names as X
+        X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
+        # Copy index from unscaled to scaled dataframes
+        X_scaled.index = X.index
+        X = X_scaled.copy() if data['copy'] else X_scaled
     else:
-        X = X.copy()
+        X = X.copy() if data['copy'] else X
 
     # extra params in addition to those being optimized by optuna
     extra_params = {
@@ -4300,6 +8333,12 @@ def svr_auto(X, y, **kwargs):
         print(model_outputs['popt_table'].to_markdown(index=True))
         print('')
 
+    # Peak memory of the process (MB) and how much this call raised it
+    peak = peak_memory()
+    model_outputs['peak_memory'] = peak
+    model_outputs['peak_memory_increase'] = (None if peak is None or peak_start is None 
+        else peak - peak_start)
+
     # Print the run time
     fit_time = time.time() - start_time
     print('Done')
@@ -4334,7 +8373,11 @@ def sgd(X, y, **kwargs):
             True: standardize X using sklearn.preprocessing StandardScaler
             False: do not standardize X (only used if X is already standardized)
         random_state= (default random_state=42)        - initial random seed
+        feature_names= list of the column names of X if X is a scipy 
+            sparse matrix, e.g. preprocess_train(df, sparse=True)['feature_names']
         verbose= 'on' (default) or 'off'
+        dtype= None (default) to fit with float64 X or np.float32
+            to halve the memory of X
 
     Standardization is generally recommended
 
@@ -4355,12 +8398,18 @@ def sgd(X, y, **kwargs):
     columns as needed, but y should only be one column. X should have unique
     column names for for each column
 
+    X can also be a scipy sparse matrix (e.g. from preprocess_train with 
+    sparse=True), which is used without converting it to a dense array 
+    (the scaler of a sparse X does not center the columns).
+
     EXAMPLE 
     model_objects, model_outputs = sgd(X, y)
 
     """
 
-    from EasyMLR import stats_given_y_pred, detect_dummy_variables
+    from EasyMLR import stats_given_y_pred, detect_dummy_variables, column_names
+    from EasyMLR import as_dtype
+    from scipy.sparse import issparse
     import time
     import pandas as pd
     import numpy as np
@@ -4387,14 +8436,17 @@ def sgd(X, y, **kwargs):
     defaults = {
         'random_state': 42,
         'standardize': True,
-        'verbose': 'on'
+        'feature_names': None,
+        'verbose': 'on',
+        'dtype': None
         }
 
     # Update input data argumements with any provided keyword arguments in kwargs
     data = {**defaults, **kwargs}
 
     from EasyMLR import check_X_y
-    X, y = check_X_y(X,y)
+    X, y = check_X_y(X,y,dtype=data['dtype'])
+    names = column_names(X, data['feature_names'])
 
     # Suppress warnings
     warnings.filterwarnings('ignore')
@@ -4412,13 +8464,14 @@ def sgd(X, y, **kwargs):
     model_objects = {}
     model_outputs = {}
 
-    # Standardized X (X_scaled)
-    scaler = StandardScaler().fit(X)
+    # Standardized X (X_scaled), not centered if X is sparse to keep it sparse
+    scaler = StandardScaler(with_mean=not issparse(X)).fit(X)
     X_scaled = scaler.transform(X)
-    # Convert scaled arrays into pandas dataframes with same column names as X
-    X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
-    # Copy index from unscaled to scaled dataframes
-    X_scaled.index = X.index
+    if not issparse(X):
+        # Convert scaled arrays into pandas dataframes with same column names as X
+        X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
+        # Copy index from unscaled to scaled dataframes
+        X_scaled.index = X.index
     # model_outputs['X_scaled'] = X_scaled                 # standardized X
     model_outputs['scaler'] = scaler                     # scaler used to standardize X
     model_outputs['standardize'] = data['standardize']   # True: X_scaled was used to fit, False: X was used
@@ -4428,13 +8481,16 @@ def sgd(X, y, **kwargs):
         X = X_scaled.copy()
     else:
         X = X.copy()
+
+    # Option to fit with float32 X (or any other floating point dtype)
+    X = as_dtype(X, data['dtype'])
     
     model = SGDRegressor(
         random_state=data['random_state']).fit(X,y)
 
     # check to see of the model has intercept and coefficients
     if (hasattr(model, 'intercept_') and hasattr(model, 'coef_') 
-            and model.coef_.size==len(X.columns)):
+            and model.coef_.size==len(names)):
         intercept = model.intercept_
         coefficients = model.coef_
         # dataframe of model parameters, intercept and coefficients, including zero coefs
@@ -4443,9 +8499,9 @@ def sgd(X, y, **kwargs):
         for i in range(n_param):
             if i == 0:
                 popt[0][i] = 'Intercept'
-                popt[1][i] = model.intercept_
+                popt[1][i] = model.intercept_[0]   # SGDRegressor intercept_ has shape (1,)
             else:
-                popt[0][i] = X.columns[i-1]
+                popt[0][i] = names[i-1]
                 popt[1][i] = model.coef_[i-1]
         popt = pd.DataFrame(popt).T
         popt.columns = ['Feature', 'Parameter']
@@ -5268,6 +9324,8 @@ def xgb(X, y, **kwargs):
     OPTIONAL KEYWORD ARGUMENTS
     **kwargs (optional keyword arguments):
         verbose= 'on' (default) or 'off'
+        dtype= None (default) to fit with float64 X or np.float32
+            to halve the memory of X
         preprocess= True,           # Apply OneHotEncoder and StandardScaler
         preprocess_result= None,    # dict of the following result from 
                                     # preprocess_train if available:         
@@ -5339,6 +9397,7 @@ def xgb(X, y, **kwargs):
     """
 
     from EasyMLR import stats_given_y_pred, detect_dummy_variables, detect_gpu
+    from EasyMLR import as_dtype
     from EasyMLR import check_X_y, preprocess_train, preprocess_test, extract_linear_metrics
     import time
     import pandas as pd
@@ -5373,6 +9432,7 @@ def xgb(X, y, **kwargs):
         'selected_features': None,    # pre-optimized selected features
         'standardize': True,
         'verbose': 'on',
+        'dtype': None,
         'gpu': True,                  # Autodetect if the computer has a gpu, if no gpu is detected then cpu will be used
 
         # params that are optimized by optuna
@@ -5422,12 +9482,8 @@ def xgb(X, y, **kwargs):
     else:
         data['device'] = 'cpu'
 
-    # copy X and y to prevent altering original
-    X = X.copy()
-    y = y.copy()
-    
-    # QC check X and y
-    X, y = check_X_y(X,y)
+    # QC check X and y (check_X_y copies X and y to prevent altering original)
+    X, y = check_X_y(X,y,dtype=data['dtype'])
 
     # Set start time for calculating run time
     start_time = time.time()
@@ -5446,9 +9502,12 @@ def xgb(X, y, **kwargs):
             X = preprocess_test(X, data['preprocess_result'])
         else:
             data['preprocess_result'] = preprocess_train(
-                X, threshold=data['threshold'])
+                X, threshold=data['threshold'], dtype=data['dtype'])
             X = data['preprocess_result']['df_processed']
 
+    # Option to fit with float32 X (or any other floating point dtype)
+    X = as_dtype(X, data['dtype'])
+
     if data['selected_features'] == None:
         data['selected_features'] = X.columns
     else:
@@ -5698,6 +9757,11 @@ def xgb_auto(X, y, **kwargs):
     OPTIONAL KEYWORD ARGUMENTS
     **kwargs (optional keyword arguments):
         verbose= 'on' (default) or 'off'
+        dtype= None (default) to fit with float64 X or np.float32
+            to halve the memory of X
+        copy= True (default) to fit copies of X, or False to skip
+            the copies of X and of its scaled or preprocessed versions
+            to reduce the peak memory (X is not changed either way)
         preprocess= True,           # Apply OneHotEncoder and StandardScaler
         preprocess_result= None,    # dict of the following result from 
                                     # preprocess_train if available:         
@@ -5715,6 +9779,23 @@ def xgb_auto(X, y, **kwargs):
                                     # unique values to identify
                                     # categorical numeric features
                                     # to encode with OneHotEncoder
+        sparse= False,              # True for preprocess_train to return
+                                    # a scipy CSR matrix, which is used
+                                    # without converting it to dense
+        encoding= 'onehot',         # encoder of the categorical features
+                                    # in preprocess_train: 'onehot',
+                                    # 'hashing' (FeatureHasher), or 
+                                    # 'target' (out-of-fold TargetEncoder)
+        feature_names= None,        # column names if X is a scipy 
+                                    # sparse matrix that is already 
+                                    # preprocessed (preprocess is skipped)
+        categorical= False,         # True to pass the object, category, 
+                                    # and bool columns of X to XGBoost as
+                                    # categorical features instead of 
+                                    # one-hot encoding them, or list of 
+                                    # the names of the categorical columns
+                                    # (enable_categorical is set to True 
+                                    # and feature_selection to False)
 
         # [min, max] ranges of params for model to be optimized by optuna:
         learning_rate= [1e-4, 1.0], # Step size shrinkage (also called eta).
@@ -5759,6 +9840,7 @@ def xgb_auto(X, y, **kwargs):
                     - 'categorical_cols': categorical numerical columns
                     - 'non_numeric_cats': non-numeric categorical columns
                     - 'continous_cols': continuous numerical columns                
+                    (or the output of native_categorical if categorical is used)
                 - 'optuna_study': optimzed optuna study object
                 - 'optuna_model': optimzed optuna model object
                 - 'best_trial': best trial from the optuna study
@@ -5768,6 +9850,8 @@ def xgb_auto(X, y, **kwargs):
                 - 'extra_params': other model options used to fit the model
                 - 'metrics': dict of goodness of fit metrics for train data
                 - 'stats': dataframe of goodness of fit metrics for train data
+                - 'peak_memory': peak memory of the python process (MB) and
+                    'peak_memory_increase': how much this call raised it (MB)
                 - 'X_processed': pre-processed X with encoding and scaling
                 - 'y_pred': best model predicted y
 
@@ -5784,7 +9868,11 @@ def xgb_auto(X, y, **kwargs):
     """
 
     from EasyMLR import stats_given_y_pred, detect_dummy_variables, detect_gpu
+    from EasyMLR import peak_memory
+    from EasyMLR import as_dtype
     from EasyMLR import preprocess_train, preprocess_test, extract_linear_metrics
+    from EasyMLR import column_names, select_columns, native_categorical
+    from scipy.sparse import issparse
     import time
     import pandas as pd
     import numpy as np
@@ -5815,6 +9903,8 @@ def xgb_auto(X, y, **kwargs):
                                             # - non_numeric_cats (non-numeric cats)
                                             # - continuous_cols  (continuous columns)
         'verbose': 'on',
+        'dtype': None,
+        'copy': True,
         'gpu': True,                        # Autodetect to use gpu if present
         'n_splits': 5,                      # number of splits for KFold CV
         'pruning': False,                   # prune poor optuna trials
@@ -5822,6 +9912,10 @@ def xgb_auto(X, y, **kwargs):
         'threshold': 10,                    # threshold for number of 
                                             # unique values for 
                                             # categorical numeric features
+        'sparse': False,                    # preprocess to a scipy CSR matrix
+        'encoding': 'onehot',               # 'onehot', 'hashing', or 'target'
+        'feature_names': None,              # column names of a sparse X
+        'categorical': False,               # True or list of categorical columns
 
         # params that are optimized by optuna
         'learning_rate': [1e-4, 1.0],       # Step size shrinkage (also called eta).
@@ -5864,18 +9958,16 @@ def xgb_auto(X, y, **kwargs):
     else:
         data['device'] = 'cpu'
 
-    # copy X and y to avoid altering the originals
-    X = X.copy()
-    y = y.copy()
-    
+    # check_X_y copies X and y to avoid altering the originals
     from EasyMLR import check_X_y
-    X, y = check_X_y(X,y)
+    X, y = check_X_y(X,y,dtype=data['dtype'],copy=data['copy'])
 
     # Suppress warnings
     warnings.filterwarnings('ignore')
 
     # Set start time for calculating run time
     start_time = time.time()
+    peak_start = peak_memory()
 
     # Set global random seed
     np.random.seed(data['random_state'])
@@ -5888,15 +9980,36 @@ def xgb_auto(X, y, **kwargs):
     model_outputs = {}
 
     # Pre-process X to apply OneHotEncoder and StandardScaler
-    if data['preprocess']:
+    # (a sparse X is already encoded and is used as it is),
+    # or only StandardScaler with the categorical columns as category 
+    # dtypes for enable_categorical (SelectKBest needs numeric X)
+    if data['categorical'] is not False:
+        data['preprocess_result'] = native_categorical(X, data['categorical'], 
+            preprocess_result=data['preprocess_result'], standardize=data['preprocess'])
+        X = data['preprocess_result']['df_processed']
+        data['enable_categorical'] = True
+        data['feature_selection'] = False
+    elif data['preprocess'] and not issparse(X):
         if data['preprocess_result']!=None:
             X = preprocess_test(X, data['preprocess_result'])
         else:
             data['preprocess_result'] = preprocess_train(
-                X, threshold=data['threshold'])
+                X, threshold=data['threshold'], sparse=data['sparse'],
+                encoding=data['encoding'], y=y, dtype=data['dtype'], 
+                copy=data['copy'])
             X = data['preprocess_result']['df_processed']
+        if issparse(X):
+            data['feature_names'] = data['preprocess_result']['feature_names']
 
-    data['feature_names'] = X.columns
+    # Option to fit with float32 X (or any other floating point dtype)
+    X = as_dtype(X, data['dtype'])
+
+    data['feature_names'] = column_names(X, data['feature_names'])
+
+    # copy=False fits one numpy array of X (a view of a dataframe with
+    # one dtype), with columns selected by column-index arrays
+    if not data['copy'] and isinstance(X, pd.DataFrame) and not data['enable_categorical']:
+        X = X.to_numpy()
     # print('after preprocess_train: ',X.shape, y.shape,X.columns)
     
     extra_params = {
@@ -5931,7 +10044,7 @@ def xgb_auto(X, y, **kwargs):
             direction="maximize", 
             sampler=optuna.samplers.TPESampler(seed=data['random_state'], multivariate=True))
     
-    X_opt = X.copy()    # copy X to prevent altering the original
+    X_opt = X.copy() if data['copy'] else X    # copy X to prevent altering the original
 
     from EasyMLR import xgb_objective
     study.optimize(lambda trial: xgb_objective(trial, X_opt, y, **data), n_trials=data['n_trials'])
@@ -5939,7 +10052,7 @@ def xgb_auto(X, y, **kwargs):
     # save outputs
     model_outputs['preprocess'] = data['preprocess']   
     model_outputs['preprocess_result'] = data['preprocess_result'] 
-    model_outputs['X_processed'] = X.copy()
+    model_outputs['X_processed'] = X.copy() if data['copy'] else X
     model_outputs['pruning'] = data['pruning']
     model_outputs['optuna_study'] = study
     model_outputs['optuna_model'] = study.best_trial.user_attrs.get('model')
@@ -5954,13 +10067,14 @@ def xgb_auto(X, y, **kwargs):
     # user attributes for optuna
 
     print('Fitting XGBRegressor model with best parameters, please wait ...')
+    X_selected = select_columns(X, model_outputs['selected_features'], data['feature_names'])
     fitted_model = XGBRegressor(
         **best_params, **extra_params).fit(
-        X[model_outputs['selected_features']],y)
+        X_selected,y)
        
     # check to see of the model has intercept and coefficients
     if (hasattr(fitted_model, 'intercept_') and hasattr(fitted_model, 'coef_') 
-            and fitted_model.coef_.size==len(X[model_outputs['selected_features']].columns)):
+            and fitted_model.coef_.size==len(model_outputs['selected_features'])):
         intercept = fitted_model.intercept_
         coefficients = fitted_model.coef_
         # dataframe of model parameters, intercept and coefficients, including zero coefs
@@ -5971,7 +10085,7 @@ def xgb_auto(X, y, **kwargs):
                 popt[0][i] = 'Intercept'
                 popt[1][i] = model.intercept_
             else:
-                popt[0][i] = X[model_outputs['selected_features']].columns[i-1]
+                popt[0][i] = model_outputs['selected_features'][i-1]
                 popt[1][i] = model.coef_[i-1]
         popt = pd.DataFrame(popt).T
         popt.columns = ['Feature', 'Parameter']
@@ -5986,13 +10100,13 @@ def xgb_auto(X, y, **kwargs):
     # Goodness of fit statistics
     metrics = extract_linear_metrics(
         fitted_model, 
-        X[model_outputs['selected_features']], y)
+        X_selected, y)
     stats = pd.DataFrame([metrics]).T
     stats.index.name = 'Statistic'
     stats.columns = ['XGBRegressor']
     model_outputs['metrics'] = metrics
     model_outputs['stats'] = stats
-    model_outputs['y_pred'] = fitted_model.predict(X[model_outputs['selected_features']])
+    model_outputs['y_pred'] = fitted_model.predict(X_selected)
 
     if data['verbose'] == 'on':
         print('')
@@ -6030,6 +10144,12 @@ def xgb_auto(X, y, **kwargs):
         # plt.show()
         plt.savefig("XGBRegressor_predictions.png", dpi=300)
 
+    # Peak memory of the process (MB) and how much this call raised it
+    peak = peak_memory()
+    model_outputs['peak_memory'] = peak
+    model_outputs['peak_memory_increase'] = (None if peak is None or peak_start is None 
+        else peak - peak_start)
+
     # Print the run time
     fit_time = time.time() - start_time
     print('Done')
@@ -6061,9 +10181,15 @@ def lgbm(X, y, **kwargs):
     OPTIONAL KEYWORD ARGUMENTS
     **kwargs (optional keyword arguments):
         verbose= 'on' (default) or 'off'
+        dtype= None (default) to fit with float64 X or np.float32
+            to halve the memory of X
         standardize= True (default) or False where
             True: standardize X using sklearn.preprocessing StandardScaler
             False: do not standardize X (only used if X is already standardized)
+        categorical= False (default) to use only numeric X, True to pass 
+            the object, category, and bool columns of X to LightGBM as 
+            categorical features (categorical_feature) without one-hot 
+            encoding, or list of the names of the categorical columns
         boosting_type='gbdt',  # Gradient Boosting Decision Tree (default boosting method)
         num_leaves=31,         # Maximum number of leaves in one tree
         max_depth=-1,          # No limit on tree depth (-1 means no limit)
@@ -6093,6 +10219,8 @@ def lgbm(X, y, **kwargs):
             model_outputs is a dictionary of the following outputs: 
                 - 'scaler': sklearn.preprocessing StandardScaler for X
                 - 'standardize': True scaler was used for X, False scaler not used
+                - 'categorical': output of native_categorical if categorical 
+                    is used (categories and scaler of the continuous columns)
                 - 'y_pred': Predicted y values
                 - 'residuals': Residuals (y-y_pred) for each of the four methods
                 - 'stats': Regression statistics for each model
@@ -6109,7 +10237,8 @@ def lgbm(X, y, **kwargs):
 
     """
 
-    from EasyMLR import stats_given_y_pred, detect_dummy_variables
+    from EasyMLR import stats_given_y_pred, detect_dummy_variables, native_categorical
+    from EasyMLR import as_dtype
     import time
     import pandas as pd
     import numpy as np
@@ -6131,7 +10260,9 @@ def lgbm(X, y, **kwargs):
     defaults = {
         'random_state': 42,       # Random seed for reproducibility
         'standardize': True,
+        'categorical': False,     # True or list of categorical columns
         'verbose': 'on',
+        'dtype': None,
         'verbosity': -1,  # -1 to turn off lgbm warnings
         'boosting_type': 'gbdt',  # Gradient Boosting Decision Tree (default boosting method)
         'num_leaves': 31,         # Maximum number of leaves in one tree
@@ -6157,7 +10288,7 @@ def lgbm(X, y, **kwargs):
     data = {**defaults, **kwargs}
 
     from EasyMLR import check_X_y
-    X, y = check_X_y(X,y)
+    X, y = check_X_y(X,y,dtype=data['dtype'])
 
     # Suppress warnings
     warnings.filterwarnings('ignore')
@@ -6175,22 +10306,36 @@ def lgbm(X, y, **kwargs):
     model_objects = {}
     model_outputs = {}
 
-    # Standardized X (X_scaled)
-    scaler = StandardScaler().fit(X)
-    X_scaled = scaler.transform(X)
-    # Convert scaled arrays into pandas dataframes with same column names as X
-    X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
-    # Copy index from unscaled to scaled dataframes
-    X_scaled.index = X.index
-    # model_outputs['X_scaled'] = X_scaled                 # standardized X
-    model_outputs['scaler'] = scaler                     # scaler used to standardize X
-    model_outputs['standardize'] = data['standardize']   # True: X_scaled was used to fit, False: X was used
-
-    # Specify X to be used for fitting the models 
-    if data['standardize']:
-        X = X_scaled.copy()
+    # Categorical columns as pandas category dtype for the native 
+    # categorical support of LightGBM (only continuous columns are scaled)
+    native = None
+    if data['categorical'] is not False:
+        native = native_categorical(X, data['categorical'], standardize=data['standardize'])
+        X = native['df_processed']
+        scaler = native['scaler']
+        model_outputs['scaler'] = scaler
+        model_outputs['standardize'] = data['standardize']
+        model_outputs['categorical'] = native
     else:
-        X = X.copy()
+        # Standardized X (X_scaled)
+        scaler = StandardScaler().fit(X)
+        X_scaled = scaler.transform(X)
+        # Convert scaled arrays into pandas dataframes with same column names as X
+        X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
+        # Copy index from unscaled to scaled dataframes
+        X_scaled.index = X.index
+        # model_outputs['X_scaled'] = X_scaled                 # standardized X
+        model_outputs['scaler'] = scaler                     # scaler used to standardize X
+        model_outputs['standardize'] = data['standardize']   # True: X_scaled was used to fit, False: X was used
+
+        # Specify X to be used for fitting the models 
+        if data['standardize']:
+            X = X_scaled.copy()
+        else:
+            X = X.copy()
+
+    # Option to fit with float32 X (or any other floating point dtype)
+    X = as_dtype(X, data['dtype'])
 
     fitted_model = LGBMRegressor(
         random_state= data['random_state'],     
@@ -6214,7 +10359,8 @@ def lgbm(X, y, **kwargs):
         n_jobs= data['n_jobs'],            
         # silent= data['silent'],         
         importance_type= data['importance_type'] 
-        ).fit(X,y)
+        ).fit(X, y, categorical_feature=(native['categorical_cols'] 
+            if native is not None else 'auto'))
         
     # check to see of the model has intercept and coefficients
     if (hasattr(fitted_model, 'intercept_') and hasattr(fitted_model, 'coef_') 
@@ -6340,8 +10486,13 @@ def catboost(X, y, **kwargs):
         random_state= 42,    # initial random seed
         standardize= True,    # standardize X
         verbose= 'on',        # 'on' to display summary stats and residual plots
+        dtype= None,          # np.float32 to halve the memory of X
         gpu= False,           # Autodetect to use gpu if present
         thread_count= -1,     # number of CPU cores to use (-1 for all cores)
+        categorical= False,   # True to pass the object, category, and bool
+                              # columns of X to CatBoost as cat_features
+                              # without one-hot encoding, or list of 
+                              # the names of the categorical columns
         
         # [min, max] range of params optimized by optuna
         learning_rate= [0.01, 0.3],         # Balances step size in gradient updates.
@@ -6368,6 +10519,11 @@ def catboost(X, y, **kwargs):
             model_outputs is a dictionary of the following outputs: 
                 - 'scaler': sklearn.preprocessing StandardScaler for X
                 - 'standardize': True scaler was used for X, False scaler not used
+                - 'categorical': output of native_categorical if categorical 
+                    is used (categories and scaler of the continuous columns,
+                    to transform test data for model.predict with
+                    native_categorical(X_test, preprocess_result=
+                    model_outputs['categorical'])['df_processed'])
                 - 'y_pred': Predicted y values
                 - 'residuals': Residuals (y-y_pred) for each of the four methods
                 - 'stats': Regression statistics for each model
@@ -6384,7 +10540,8 @@ def catboost(X, y, **kwargs):
 
     """
 
-    from EasyMLR import stats_given_y_pred, detect_dummy_variables
+    from EasyMLR import stats_given_y_pred, detect_dummy_variables, native_categorical
+    from EasyMLR import as_dtype
     import time
     import pandas as pd
     import numpy as np
@@ -6406,9 +10563,11 @@ def catboost(X, y, **kwargs):
         'random_state': 42,     # Random seed for reproducibility.
         'standardize': True,    # standardize X
         'verbose': 'on',        # 'on' to display stats and residual plots
+        'dtype': None,          # np.float32 to fit with float32 X
         'gpu': False,           # Autodetect to use gpu if present
         'devices': '0',         # Which GPU to use (0 to use first GPU)
         'thread_count': -1,     # number of CPUs to use (-1 for all cores)
+        'categorical': False,   # True or list of categorical columns
 
         # [min, max] range of params optimized by optuna
         'learning_rate': 0.03,         # Balances step size in gradient updates.
@@ -6437,7 +10596,7 @@ def catboost(X, y, **kwargs):
         data['device'] = 'CPU'
     
     from EasyMLR import check_X_y
-    X, y = check_X_y(X,y)
+    X, y = check_X_y(X,y,dtype=data['dtype'])
 
     # Suppress warnings
     warnings.filterwarnings('ignore')
@@ -6455,22 +10614,38 @@ def catboost(X, y, **kwargs):
     model_objects = {}
     model_outputs = {}
 
-    # Standardized X (X_scaled)
-    scaler = StandardScaler().fit(X)
-    X_scaled = scaler.transform(X)
-    # Convert scaled arrays into pandas dataframes with same column names as X
-    X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
-    # Copy index from unscaled to scaled dataframes
-    X_scaled.index = X.index
-    # model_outputs['X_scaled'] = X_scaled                 # standardized X
-    model_outputs['scaler'] = scaler                     # scaler used to standardize X
-    model_outputs['standardize'] = data['standardize']   # True: X_scaled was used to fit, False: X was used
-
-    # Specify X to be used for fitting the models 
-    if data['standardize']:
-        X = X_scaled.copy()
+    # Categorical columns as strings for the native categorical support 
+    # of CatBoost, with 'nan' for missing and unknown categories 
+    # (only continuous columns are scaled)
+    native = None
+    if data['categorical'] is not False:
+        native = native_categorical(X, data['categorical'], standardize=data['standardize'],
+            strings=True)
+        X = native['df_processed']
+        scaler = native['scaler']
+        model_outputs['scaler'] = scaler
+        model_outputs['standardize'] = data['standardize']
+        model_outputs['categorical'] = native
     else:
-        X = X.copy()
+        # Standardized X (X_scaled)
+        scaler = StandardScaler().fit(X)
+        X_scaled = scaler.transform(X)
+        # Convert scaled arrays into pandas dataframes with same column names as X
+        X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
+        # Copy index from unscaled to scaled dataframes
+        X_scaled.index = X.index
+        # model_outputs['X_scaled'] = X_scaled                 # standardized X
+        model_outputs['scaler'] = scaler                     # scaler used to standardize X
+        model_outputs['standardize'] = data['standardize']   # True: X_scaled was used to fit, False: X was used
+
+        # Specify X to be used for fitting the models 
+        if data['standardize']:
+            X = X_scaled.copy()
+        else:
+            X = X.copy()
+
+    # Option to fit with float32 X (or any other floating point dtype)
+    X = as_dtype(X, data['dtype'])
 
     params = {        
         # [min, max] range of params optimized by optuna
@@ -6499,7 +10674,8 @@ def catboost(X, y, **kwargs):
         extra_params['thread_count'] = data['thread_count']
     
     fitted_model = CatBoostRegressor(
-        **params, **extra_params, verbose=False).fit(X,y)
+        **params, **extra_params, verbose=False).fit(X, y, 
+        cat_features=native['categorical_cols'] if native is not None else None)
         
     # check to see of the model has intercept and coefficients
     if (hasattr(fitted_model, 'intercept_') and hasattr(fitted_model, 'coef_') 
@@ -6690,6 +10866,7 @@ def catboost_auto(X, y, **kwargs):
         n_trials= 50,         # number of optuna trials
         standardize= True,    # standardize X
         verbose= 'on',        # 'on' to display summary stats and residual plots
+        dtype= None,          # np.float32 to halve the memory of X
         n_splits= 5,          # number of splits for KFold CV
         gpu= False,           # Autodetect to use gpu if present
         thread_count= -1,     # number of CPU cores to use (-1 for all cores)
@@ -6738,6 +10915,7 @@ def catboost_auto(X, y, **kwargs):
     """
 
     from EasyMLR import stats_given_y_pred, detect_dummy_variables, detect_gpu
+    from EasyMLR import as_dtype
     import time
     import pandas as pd
     import numpy as np
@@ -6763,6 +10941,7 @@ def catboost_auto(X, y, **kwargs):
         'n_trials': 50,         # number of optuna trials
         'standardize': True,    # standardize X
         'verbose': 'on',        # 'on' to display stats and residual plots
+        'dtype': None,          # np.float32 to fit with float32 X
         'gpu': False,           # Autodetect to use gpu if present
         'n_splits': 5,          # number of splits for KFold CV
         'devices': '0',         # Which GPU to use (0 to use first GPU)
@@ -6794,7 +10973,7 @@ def catboost_auto(X, y, **kwargs):
         data['device'] = 'CPU'
 
     from EasyMLR import check_X_y
-    X, y = check_X_y(X,y)
+    X, y = check_X_y(X,y,dtype=data['dtype'])
 
     # Suppress warnings
     warnings.filterwarnings('ignore')
@@ -6829,6 +11008,9 @@ def catboost_auto(X, y, **kwargs):
     else:
         X = X.copy()
 
+    # Option to fit with float32 X (or any other floating point dtype)
+    X = as_dtype(X, data['dtype'])
+
     extra_params = {
         'random_seed': data['random_state'],         
         'task_type': data['device'],                   
@@ -6970,6 +11152,7 @@ def forest(X, y, **kwargs):
         n_trials= 50,                     # number of optuna trials
         standardize= True,
         verbose= 'on',                    # 'on' to display all 
+        dtype= None,                      # np.float32 to halve the memory of X
         gpu= True,                        # Autodetect to use gpu if present
         n_splits= 5,                      # number of splits for KFold CV
 
@@ -7030,6 +11213,7 @@ def forest(X, y, **kwargs):
     """
 
     from EasyMLR import stats_given_y_pred, detect_dummy_variables, detect_gpu
+    from EasyMLR import as_dtype
     import time
     import pandas as pd
     import numpy as np
@@ -7051,6 +11235,7 @@ def forest(X, y, **kwargs):
         'n_trials': 50,                     # number of optuna trials
         'standardize': True,
         'verbose': 'on',
+        'dtype': None,
         'gpu': True,                        # Autodetect to use gpu if present
         'n_splits': 5,                      # number of splits for KFold CV
 
@@ -7100,7 +11285,7 @@ def forest(X, y, **kwargs):
         data['device'] = 'cpu'
 
     from EasyMLR import check_X_y
-    X, y = check_X_y(X,y)
+    X, y = check_X_y(X,y,dtype=data['dtype'])
 
     # Suppress warnings
     warnings.filterwarnings('ignore')
@@ -7135,6 +11320,9 @@ def forest(X, y, **kwargs):
     else:
         X = X.copy()
 
+    # Option to fit with float32 X (or any other floating point dtype)
+    X = as_dtype(X, data['dtype'])
+
     params = {
         'n_estimators': data['n_estimators'],               
         'max_depth': data['max_depth'],                 
@@ -7331,6 +11519,7 @@ def forest_auto(X, y, **kwargs):
         n_trials= 50,                     # number of optuna trials
         standardize= True,
         verbose= 'on',                    # 'on' to display all 
+        dtype= None,                      # np.float32 to halve the memory of X
         gpu= True,                        # Autodetect to use gpu if present
         n_splits= 5,                      # number of splits for KFold CV
 
@@ -7393,6 +11582,7 @@ def forest_auto(X, y, **kwargs):
     """
 
     from EasyMLR import stats_given_y_pred, detect_dummy_variables, detect_gpu
+    from EasyMLR import as_dtype
     import time
     import pandas as pd
     import numpy as np
@@ -7414,6 +11604,7 @@ def forest_auto(X, y, **kwargs):
         'n_trials': 50,                     # number of optuna trials
         'standardize': True,
         'verbose': 'on',
+        'dtype': None,
         'gpu': True,                        # Autodetect to use gpu if present
         'n_splits': 5,                      # number of splits for KFold CV
 
@@ -7464,7 +11655,7 @@ def forest_auto(X, y, **kwargs):
         data['device'] = 'cpu'
 
     from EasyMLR import check_X_y
-    X, y = check_X_y(X,y)
+    X, y = check_X_y(X,y,dtype=data['dtype'])
 
     # Suppress warnings
     warnings.filterwarnings('ignore')
@@ -7499,6 +11690,9 @@ def forest_auto(X, y, **kwargs):
     else:
         X = X.copy()
 
+    # Option to fit with float32 X (or any other floating point dtype)
+    X = as_dtype(X, data['dtype'])
+
     extra_params = {
         'verbose': 0,                 
         'random_state': data['random_state'],                
@@ -7643,6 +11837,7 @@ def knn(X, y, **kwargs):
         n_trials= 50,                     # number of optuna trials
         standardize= True,                # standardize X
         verbose= 'on',
+        dtype= None,                      # np.float32 to halve the memory of X
         gpu= True,                        # Autodetect to use gpu if present
 
         # user params 
@@ -7687,6 +11882,7 @@ def knn(X, y, **kwargs):
     """
 
     from EasyMLR import stats_given_y_pred, detect_dummy_variables, detect_gpu
+    from EasyMLR import as_dtype
     import time
     import pandas as pd
     import numpy as np
@@ -7712,6 +11908,7 @@ def knn(X, y, **kwargs):
         'n_trials': 50,                     # number of optuna trials
         'standardize': True,                # standardize X
         'verbose': 'on',
+        'dtype': None,
         'gpu': True,                        # Autodetect to use gpu if present
         # 'n_splits': 5,                      # number of splits for KFold CV
         # 'pruning': False,                   # prune poor optuna trials
@@ -7751,7 +11948,7 @@ def knn(X, y, **kwargs):
         data['device'] = 'cpu'
 
     from EasyMLR import check_X_y
-    X, y = check_X_y(X,y)
+    X, y = check_X_y(X,y,dtype=data['dtype'])
 
     # Suppress warnings
     warnings.filterwarnings('ignore')
@@ -7786,6 +11983,9 @@ def knn(X, y, **kwargs):
     else:
         X = X.copy()
 
+    # Option to fit with float32 X (or any other floating point dtype)
+    X = as_dtype(X, data['dtype'])
+
     if data['pca_transform'] and data['pca'] == None:
         # fit new PCA transformer
         if n_components == None:
@@ -8056,6 +12256,10 @@ def knn_auto(X, y, **kwargs):
         n_trials= 50,                     # number of optuna trials
         standardize= True,                # standardize X
         verbose= 'on',
+        dtype= None,                      # np.float32 to halve the memory of X
+        copy= True (default) to fit copies of X, or False to skip
+            the copies of X and of its scaled or preprocessed versions
+            to reduce the peak memory (X is not changed either way)
         gpu= True,                        # Autodetect to use gpu if present
         n_splits= 5,                      # number of splits for KFold CV
         pruning= False,                   # prune poor optuna trials
@@ -8098,6 +12302,8 @@ def knn_auto(X, y, **kwargs):
                 - 'y_pred': Predicted y values
                 - 'residuals': Residuals (y-y_pred) for each of the four methods
                 - 'stats': Regression statistics for each model
+                - 'peak_memory': peak memory of the python process (MB) and
+                    'peak_memory_increase': how much this call raised it (MB)
 
     NOTE
     Do any necessary/optional cleaning of the data before 
@@ -8112,6 +12318,8 @@ def knn_auto(X, y, **kwargs):
     """
 
     from EasyMLR import stats_given_y_pred, detect_dummy_variables, detect_gpu
+    from EasyMLR import peak_memory
+    from EasyMLR import as_dtype
     import time
     import pandas as pd
     import numpy as np
@@ -8137,6 +12345,8 @@ def knn_auto(X, y, **kwargs):
         'n_trials': 50,                     # number of optuna trials
         'standardize': True,                # standardize X
         'verbose': 'on',
+        'dtype': None,
+        'copy': True,
         'gpu': True,                        # Autodetect to use gpu if present
         'n_splits': 5,                      # number of splits for KFold CV
         'pruning': False,                   # prune poor optuna trials
@@ -8166,12 +12376,6 @@ def knn_auto(X, y, **kwargs):
     # Update input data argumements with any provided keyword arguments in kwargs
     data = {**defaults, **kwargs}
 
-    # store the names of the features
-    if isinstance(X, pd.DataFrame):
-        data['feature_names'] = X.columns
-    else:
-        data['feature_names'] = [f"X_{i}" for i in range(X.shape[1])]
-     
     # Auto-detect if GPU is present and use GPU if present
     if data['gpu']:
         use_gpu = detect_gpu()
@@ -8183,13 +12387,17 @@ def knn_auto(X, y, **kwargs):
         data['device'] = 'cpu'
 
     from EasyMLR import check_X_y
-    X, y = check_X_y(X,y)
+    X, y = check_X_y(X,y,dtype=data['dtype'],copy=data['copy'])
+
+    # store the names of the features
+    data['feature_names'] = X.columns
 
     # Suppress warnings
     warnings.filterwarnings('ignore')
 
     # Set start time for calculating run time
     start_time = time.time()
+    peak_start = peak_memory()
 
     # Set global random seed
     np.random.seed(data['random_state'])
@@ -8203,19 +12411,24 @@ def knn_auto(X, y, **kwargs):
 
     # Standardized X (X_scaled)
     scaler = StandardScaler().fit(X)
-    X_scaled = scaler.transform(X)
-    # Convert scaled arrays into pandas dataframes with same column names as X
-    X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
-    # Copy index from unscaled to scaled dataframes
-    X_scaled.index = X.index
     model_outputs['scaler'] = scaler                     
     model_outputs['standardize'] = data['standardize']   
-    
+
     # Specify X to be used for fitting the models 
+    # (X_scaled is only made if it is used, and copy=False uses
+    # X_scaled or X as they are instead of copies of them)
     if data['standardize']:
-        X = X_scaled.copy()
+        X_scaled = scaler.transform(X)
+        # Convert scaled arrays into pandas dataframes with same column names as X
+        X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
+        # Copy index from unscaled to scaled dataframes
+        X_scaled.index = X.index
+        X = X_scaled.copy() if data['copy'] else X_scaled
     else:
-        X = X.copy()
+        X = X.copy() if data['copy'] else X
+
+    # Option to fit with float32 X (or any other floating point dtype)
+    X = as_dtype(X, data['dtype'])
 
     extra_params = {
         # extra_params that are optional user-specified
@@ -8236,7 +12449,7 @@ def knn_auto(X, y, **kwargs):
             direction="maximize", 
             sampler=optuna.samplers.TPESampler(seed=data['random_state'], multivariate=True))
     
-    X_opt = X.copy()
+    X_opt = X.copy() if data['copy'] else X
 
     from EasyMLR import knn_objective
     study.optimize(
@@ -8367,6 +12580,12 @@ def knn_auto(X, y, **kwargs):
         print(model_outputs['popt_table'].to_markdown(index=True))
         print('')
 
+    # Peak memory of the process (MB) and how much this call raised it
+    peak = peak_memory()
+    model_outputs['peak_memory'] = peak
+    model_outputs['peak_memory_increase'] = (None if peak is None or peak_start is None 
+        else peak - peak_start)
+
     # Print the run time
     fit_time = time.time() - start_time
     print('Done')
@@ -8485,11 +12704,8 @@ def test_logistic_model(
     from EasyMLR import (preprocess_test, plot_confusion_matrix, 
         plot_roc_auc, extract_logistic_metrics, check_X_y)
 
-    # copy X and y to avoid altering originals
-    X = X.copy()
-    y = y.copy()
-
     # check X and y and put into dataframe if needed
+    # (check_X_y copies X and y to avoid altering originals)
     X, y = check_X_y(X, y)
     
     if selected_features==None:
@@ -8681,10 +12897,7 @@ def logistic(X, y, **kwargs):
     else:
         data['device'] = 'cpu'
 
-    # copy X and y to prevent altering original
-    X = X.copy()
-    y = y.copy()
-
+    # check_X_y copies X and y to prevent altering original
     # print('before preprocess_train: ',X.shape, y.shape)
     X, y = check_X_y(X,y)
     # print('after check_X_y: ',X.shape, y.shape,X.columns)
@@ -8892,6 +13105,16 @@ def logistic_auto(X, y, **kwargs):
                                   # unique values to identify
                                   # categorical numeric features
                                   # to encode with OneHotEncoder
+        sparse= False,            # True for preprocess_train to return
+                                  # a scipy CSR matrix, which is used
+                                  # without converting it to dense
+        encoding= 'onehot',       # encoder of the categorical features
+                                  # in preprocess_train: 'onehot',
+                                  # 'hashing' (FeatureHasher), or 
+                                  # 'target' (out-of-fold TargetEncoder)
+        feature_names= None,      # column names if X is a scipy 
+                                  # sparse matrix that is already 
+                                  # preprocessed (preprocess is skipped)
          
         # [min,max] model params that are optimized by optuna
         C= [1e-4, 10.0],          # Inverse regularization strength
@@ -8944,7 +13167,9 @@ def logistic_auto(X, y, **kwargs):
 
     """
 
-    from EasyMLR import preprocess_train 
+    from EasyMLR import preprocess_train, preprocess_test
+    from EasyMLR import column_names, select_columns
+    from scipy.sparse import issparse
     from EasyMLR import extract_logistic_metrics, pseudo_r2
     from EasyMLR import plot_confusion_matrix, plot_roc_auc
     from EasyMLR import detect_gpu 
@@ -8988,6 +13213,9 @@ def logistic_auto(X, y, **kwargs):
         'threshold': 10,            # threshold for number of 
                                     # unique values for 
                                     # categorical numeric features
+        'sparse': False,            # preprocess to a scipy CSR matrix
+        'encoding': 'onehot',       # 'onehot', 'hashing', or 'target'
+        'feature_names': None,      # column names of a sparse X
         
         # [min,max] model params that are optimized by optuna
         'C': [1e-4, 10.0],                  # Inverse regularization strength
@@ -9034,15 +13262,19 @@ def logistic_auto(X, y, **kwargs):
     model_outputs = {}
 
     # Pre-process X to apply OneHotEncoder and StandardScaler
-    if data['preprocess']:
+    # (a sparse X is already encoded and is used as it is)
+    if data['preprocess'] and not issparse(X):
         if data['preprocess_result']!=None:
             X = preprocess_test(X, data['preprocess_result'])
         else:
             data['preprocess_result'] = preprocess_train(
-                X, threshold=data['threshold'])
+                X, threshold=data['threshold'], sparse=data['sparse'],
+                encoding=data['encoding'], y=y)
             X = data['preprocess_result']['df_processed']
+        if issparse(X):
+            data['feature_names'] = data['preprocess_result']['feature_names']
 
-    data['feature_names'] = X.columns
+    data['feature_names'] = column_names(X, data['feature_names'])
     # print('after preprocess_train: ',X.shape, y.shape,X.columns)
     
     extra_params = {
@@ -9098,32 +13330,31 @@ def logistic_auto(X, y, **kwargs):
 
     # prepare X for use in the final fitted model
     # print('before final fit: ',X.shape, y.shape,X.columns)
+    X_selected = select_columns(X, model_outputs['selected_features'], data['feature_names'])
     fitted_model = LogisticRegression(
         **best_params, **extra_params).fit(
-        X[model_outputs['selected_features']],y)
+        X_selected,y)
 
     if data['verbose'] == 'on':
 
         # confusion matrix
-        selected_features = model_outputs['selected_features']
-        hfig = plot_confusion_matrix(fitted_model, X[selected_features], y)
+        hfig = plot_confusion_matrix(fitted_model, X_selected, y)
         hfig.savefig("LogisticRegression_confusion_matrix.png", dpi=300)
         
         # ROC curve with AUC
-        selected_features = model_outputs['selected_features']
-        hfig = plot_roc_auc(fitted_model, X[selected_features], y)
+        hfig = plot_roc_auc(fitted_model, X_selected, y)
         hfig.savefig("LogisticRegression_ROC_curve.png", dpi=300)
         
     # Goodness of fit statistics
     metrics = extract_logistic_metrics(
         fitted_model, 
-        X[model_outputs['selected_features']], y)
+        X_selected, y)
     stats = pd.DataFrame([metrics]).T
     stats.index.name = 'Statistic'
     stats.columns = ['LogisticRegression']
     model_outputs['metrics'] = metrics
     model_outputs['stats'] = stats
-    model_outputs['y_pred'] = fitted_model.predict(X[model_outputs['selected_features']])
+    model_outputs['y_pred'] = fitted_model.predict(X_selected)
 
     if data['verbose'] == 'on':
         print('')